@@ -2,10 +2,23 @@ import asyncio
 import os
 
 from functools import wraps
-from typing import Dict
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 from argparse import Namespace
 
+from .bulk import run_bulk
 from .constants import (
+    BULK_CONCURRENCY,
+    INVENTORY_TTL,
+    LIST_PAGE_SIZE,
     Phase,
     DASHBOARD_FLOW_URL_MARKDOWN,
     DASHBOARD_DEPLOYMENT_URL_MARKDOWN,
@@ -21,15 +34,21 @@ from .helper import (
     jsonify,
     yamlify,
     get_or_reuse_loop,
+    exit_error,
     exit_if_flow_defines_secret,
+    with_shared_session,
 )
-from .normalize import flow_normalize
+
+if TYPE_CHECKING:
+    from rich.table import Table
 
 
 def asyncify(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
-        return get_or_reuse_loop().run_until_complete(f(*args, **kwargs))
+        return get_or_reuse_loop().run_until_complete(
+            with_shared_session(f(*args, **kwargs))
+        )
 
     return wrapper
 
@@ -37,19 +56,140 @@ def asyncify(f):
 @asyncify
 async def deploy(args):
     if Resources.Flow in args.jc_cli:
-        exit_if_flow_defines_secret(args.path)
-        return await CloudFlow(path=args.path).__aenter__()
+        flow = CloudFlow(path=args.path, push_concurrency=args.push_concurrency)
+        # the Flow YAML loaded here is reused for the whole deployment
+        exit_if_flow_defines_secret(flow.flow_dict)
+        return await flow.__aenter__()
     elif Resources.Deployment in args.jc_cli:
         # exit_if_deployment_defines_secret(args.path)
         return await CloudDeployment(path=args.path).__aenter__()
 
 
 def normalize(args):
-    flow_normalize(path=args.path, verbose=args.verbose, output_path=args.output)
+    from .normalize import flow_normalize
+
+    flow_normalize(
+        path=args.path,
+        verbose=args.verbose,
+        output_path=args.output,
+        push_concurrency=args.push_concurrency,
+    )
+
+
+async def _fetch_status(jc_cli: Resources, res_id: str) -> Optional[Dict]:
+    if jc_cli == Resources.Deployment:
+        return await CloudDeployment(deployment_id=res_id).status
+    return await CloudFlow(flow_id=res_id).status
+
+
+async def _status_multi(args: Namespace, res_ids: List[str]):
+    res_name = 'deployment' if args.jc_cli == Resources.Deployment else 'flow'
+    if not res_ids and not args.labels:
+        exit_error(f'Please pass {res_name} ID(s), or --labels to select them.')
+
+    statuses = {}
+    if args.labels:
+        # listed resources already come with their status
+        async for page in _iter_list_pages(
+            args.jc_cli, _phase_or_default(None), None, args.labels
+        ):
+            statuses.update((resource['id'], resource) for resource in page)
+    res_ids = [*dict.fromkeys(res_ids), *(i for i in statuses if i not in res_ids)]
+
+    writer = None
+    if args.output:
+        from .output import OutputWriter
+
+        writer = OutputWriter(args.output)
+        for resource in statuses.values():
+            writer.write(resource)
+
+    async def _fetch(res_id: str):
+        _result = await _fetch_status(args.jc_cli, res_id)
+        if not _result:
+            raise RuntimeError('no status returned')
+        statuses[res_id] = _result
+
+    def _on_done(res_id: str, reason: Optional[str]):
+        if writer is not None:
+            writer.write(
+                statuses[res_id] if reason is None else {'id': res_id, 'error': reason}
+            )
+
+    to_fetch = [res_id for res_id in res_ids if res_id not in statuses]
+    if writer is not None:
+        result = await run_bulk(
+            to_fetch, _fetch, concurrency=args.concurrency, on_done=_on_done
+        )
+        writer.close()
+    else:
+        from rich import box
+        from rich.console import Console
+        from rich.table import Table
+
+        from .helper import CustomHighlighter
+
+        console = Console(highlighter=CustomHighlighter())
+        with console.status(
+            f'[bold]Fetching status of [green]{len(res_ids)}[/green] {res_name}s ...'
+        ):
+            result = await run_bulk(to_fetch, _fetch, concurrency=args.concurrency)
+
+        _t = Table(
+            'ID',
+            'Status',
+            'Endpoint(s)',
+            'Credits Per Hour',
+            'Updated',
+            box=box.ROUNDED,
+            highlight=True,
+        )
+        for res_id in res_ids:
+            if res_id in result.failed:
+                _t.add_row(
+                    res_id,
+                    '[red]Unknown[/red]',
+                    f'[red]{result.failed[res_id]}[/red]',
+                    '',
+                    '',
+                )
+                continue
+            resource = statuses[res_id]
+            _t.add_row(
+                res_id,
+                get_phase_from_response(resource),
+                get_str_endpoints_from_response(resource),
+                get_cph_from_response(resource),
+                cleanup_dt(resource.get('utime') or resource.get('ctime', '')),
+            )
+        console.print(_t)
+
+    if result.failed:
+        message = f'Failed fetching the status of {len(result.failed)} of {len(res_ids)} {res_name}s, please check!'
+        if writer is None:
+            exit_error(message)
+        from rich.console import Console
+
+        from .helper import JCloudExit
+
+        # stdout only has the records, the exit code tells about the failures
+        Console(stderr=True).print(f'[red]{message}[/red]')
+        raise JCloudExit(message)
 
 
 @asyncify
 async def status(args):
+    res_ids = args.deployments if args.jc_cli == Resources.Deployment else args.flows
+    if args.labels or len(res_ids) != 1:
+        return await _status_multi(args, res_ids)
+
+    if args.output:
+        from .output import write_output
+
+        _result = await _fetch_status(args.jc_cli, res_ids[0])
+        write_output(_result or {}, args.output)
+        return
+
     from rich import box
     from rich.console import Console
     from rich.json import JSON
@@ -69,16 +209,15 @@ async def status(args):
     )
 
     console = Console(highlighter=CustomHighlighter())
+    res = res_ids[0]
     if args.jc_cli == Resources.Flow:
-        res = args.flow
         dashboard = Markdown(
-            DASHBOARD_FLOW_URL_MARKDOWN.format(flow_id=args.flow),
+            DASHBOARD_FLOW_URL_MARKDOWN.format(flow_id=res),
             justify='center',
         )
     elif args.jc_cli == Resources.Deployment:
-        res = args.deployment
         dashboard = Markdown(
-            DASHBOARD_DEPLOYMENT_URL_MARKDOWN.format(deployment_id=args.deployment),
+            DASHBOARD_DEPLOYMENT_URL_MARKDOWN.format(deployment_id=res),
             justify='center',
         )
     else:
@@ -88,10 +227,7 @@ async def status(args):
         return
 
     with console.status(f'[bold]Fetching status of [green]{res}[/green] ...'):
-        if args.jc_cli == Resources.Flow:
-            _result = await CloudFlow(flow_id=res).status
-        elif args.jc_cli == Resources.Deployment:
-            _result = await CloudDeployment(deployment_id=res).status
+        _result = await _fetch_status(args.jc_cli, res)
         if not _result:
             console.print(
                 f'[red]Something went wrong while fetching the details for {res} ![/red]. Please retry after sometime.'
@@ -168,27 +304,7 @@ async def status(args):
             console.print(_t)
 
 
-async def _list_by_phase(
-    phase: str, name: str, labels: Dict[str, str], jc_cli: Resources = Resources.Flow
-):
-    from rich import box
-    from rich.console import Console
-    from rich.table import Table
-
-    from .helper import CustomHighlighter
-
-    _t = Table(
-        'ID',
-        'Status',
-        'Endpoint(s)',
-        'Credits Per Hour',
-        'Created',
-        box=box.ROUNDED,
-        highlight=True,
-    )
-
-    console = Console(highlighter=CustomHighlighter())
-
+def _phase_or_default(phase: Optional[str]) -> str:
     # If no phase is passed, show all flows that are not in `Deleted` phase
     if phase is None:
         phase_to_str = lambda phase: str(phase.value)
@@ -201,40 +317,139 @@ async def _list_by_phase(
                 phase_to_str(Phase.Paused),
             ]
         )
-    if labels is not None:
-        labels = labels.replace(',', '&')
+    return phase
+
+
+async def _iter_list_pages(
+    jc_cli: Resources,
+    phase: str,
+    name: str,
+    labels: Optional[str],
+    cached: bool = False,
+) -> AsyncIterator[List[Dict]]:
+    key = 'deployments' if jc_cli == Resources.Deployment else 'flows'
+    resource = CloudDeployment() if key == 'deployments' else CloudFlow()
+    if not cached:
+        async for _page in resource.iter_pages(
+            phase=phase,
+            name=name,
+            labels=labels.replace(',', '&') if labels is not None else None,
+        ):
+            yield _page
+        return
+
+    from .inventory import Inventory, parse_labels
+
+    kind = Resources.Deployment if key == 'deployments' else Resources.Flow
+    with Inventory() as inventory:
+        if inventory.is_stale(kind, INVENTORY_TTL):
+            # every phase is fetched, so that any later query is answered locally
+            _all = await resource.list_all(phase='All', quiet=True)
+            inventory.refresh(kind, (_all or {}).get(key, []))
+        _resources = inventory.query(
+            kind,
+            phases=None if phase == 'All' else phase.split(','),
+            name=name,
+            labels=parse_labels(labels),
+        )
+    for i in range(0, len(_resources), LIST_PAGE_SIZE):
+        yield _resources[i : i + LIST_PAGE_SIZE]
+
+
+def _list_page_table(show_header: bool) -> 'Table':
+    from rich import box
+    from rich.table import Column, Table
+
+    # fixed widths, so that the tables of consecutive pages line up as a single one
+    return Table(
+        Column('ID', width=24, overflow='fold'),
+        Column('Status', width=9),
+        Column('Endpoint(s)', ratio=1, overflow='fold'),
+        Column('Credits Per Hour', width=8),
+        Column('Created', width=17),
+        box=box.SIMPLE_HEAD,
+        show_edge=False,
+        show_header=show_header,
+        expand=True,
+        highlight=True,
+    )
+
+
+async def _list_by_phase(
+    phase: str,
+    name: str,
+    labels: Dict[str, str],
+    jc_cli: Resources = Resources.Flow,
+    output: Optional[str] = None,
+    cached: bool = False,
+    collect: bool = True,
+):
+    phase = _phase_or_default(phase)
+    key = 'deployments' if jc_cli == Resources.Deployment else 'flows'
+    # every page is shown once fetched, and only kept if the caller needs it
+    _res = []
+    _pages = _iter_list_pages(jc_cli, phase, name, labels, cached=cached)
+    if output:
+        from .output import OutputWriter
+
+        writer = OutputWriter(output)
+        async for page in _pages:
+            for resource in page:
+                writer.write(resource)
+            if collect:
+                _res.extend(page)
+        writer.close()
+        return {key: _res}
+
+    from rich.console import Console
+
+    from .helper import CustomHighlighter
+
+    console = Console(highlighter=CustomHighlighter())
     phases = phase.split(',')
 
     msg = f'[bold]Fetching [green]{phases[0] if len(phases) == 1 else ", ".join(phases)}[/green] {jc_cli}s'
     if name:
         msg += f' with name [green]{name}[/green]'
     msg += ' ...'
+    count = 0
     with console.status(msg):
-        _res = dict()
-        if jc_cli == Resources.Flow:
-            _result = await CloudFlow().list_all(phase=phase, name=name, labels=labels)
-            if _result and 'flows' in _result:
-                _res = _result['flows']
-        elif jc_cli == Resources.Deployment:
-            _result = await CloudDeployment().list_all(
-                phase=phase, name=name, labels=labels
-            )
-            if _result and 'deployments' in _result:
-                _res = _result['deployments']
-
-        for resource in _res:
-            _t.add_row(
-                resource['id'],
-                get_phase_from_response(resource),
-                get_str_endpoints_from_response(resource),
-                get_cph_from_response(resource),
-                cleanup_dt(resource['ctime']),
-            )
-        console.print(_t)
-    return _result
+        async for page in _pages:
+            _t = _list_page_table(show_header=count == 0)
+            for resource in page:
+                _t.add_row(
+                    resource['id'],
+                    get_phase_from_response(resource),
+                    get_str_endpoints_from_response(resource),
+                    get_cph_from_response(resource),
+                    cleanup_dt(resource['ctime']),
+                )
+            if page:
+                console.print(_t)
+            count += len(page)
+            if collect:
+                _res.extend(page)
+    if not count:
+        console.print(
+            f'\nYou don\'t have any {jc_cli.title()}s deployed with status [green]{phase}[/green]. '
+            f'Please pass a different [i]--status[/i] or use [i]jc deploy[/i] to deploy a new {jc_cli.title()}'
+        )
+    return {key: _res}
 
 
 async def _display_resources(args: Namespace):
+    if args.output:
+        from .output import write_output
+
+        if args.subcommand == 'list':
+            resources = await CloudFlow(flow_id=args.flow).list_resources(args.jc_cli)
+        else:
+            resources = await CloudFlow(flow_id=args.flow).get_resource(
+                args.jc_cli, args.name
+            )
+        write_output(resources, args.output)
+        return
+
     from rich import box
     from rich.console import Console
     from rich.json import JSON
@@ -298,7 +513,15 @@ async def _display_resources(args: Namespace):
 @asyncify
 async def list(args):
     if Resources.Flow in args.jc_cli or Resources.Deployment in args.jc_cli:
-        await _list_by_phase(args.phase, args.name, args.labels, args.jc_cli)
+        await _list_by_phase(
+            args.phase,
+            args.name,
+            args.labels,
+            args.jc_cli,
+            output=args.output,
+            cached=args.cached,
+            collect=False,
+        )
     else:
         await _display_resources(args)
 
@@ -388,63 +611,84 @@ async def remove(args):
 
             resources = [res['id'] for res in _raw_list[res_key]]
 
-        await _remove_multi(resources, args.phase, args.jc_cli)
+        await _remove_multi(
+            resources,
+            args.phase,
+            args.jc_cli,
+            concurrency=args.concurrency,
+            timeout=args.timeout,
+            summary_file=args.summary_file,
+        )
     else:
         await CloudFlow(flow_id=args.flow).delete_resource(args.jc_cli, args.name)
 
         print(f'Successfully removed {args.jc_cli} with name {args.name}')
 
 
-async def _remove_multi(res_id_list, phase, jc_cli: Resources = Resources.Flow):
+async def _remove_multi(
+    res_id_list,
+    phase,
+    jc_cli: Resources = Resources.Flow,
+    concurrency: int = BULK_CONCURRENCY,
+    timeout: Optional[float] = None,
+    summary_file: Optional[str] = None,
+):
     from rich import print
 
     from .helper import get_pbar
+    from .watcher import StatusWatcher
 
     num_res_to_remove = len(res_id_list)
     pbar, pb_task = get_pbar(
         '', total=num_res_to_remove, disable='JCLOUD_NO_PROGRESSBAR' in os.environ
     )
+    if Resources.Deployment in jc_cli:
+        terminate, res_name = _terminate_deployment_simplified, 'deployment'
+    else:
+        terminate, res_name = _terminate_flow_simplified, 'flow'
 
+    counter = 0
+
+    def _on_done(res_id: str, reason: Optional[str]):
+        nonlocal counter
+        counter += 1
+        if reason is None:
+            print(f'[red]{res_id} removed![/red]')
+        else:
+            print(f'[yellow]{res_id} not removed: {reason}[/yellow]')
+        pbar.update(
+            pb_task,
+            advance=1,
+            description=f'Last {res_name} done: [red]{res_id}[/red]. {num_res_to_remove - counter} {res_name}(s) to go',
+        )
+
+    # one watcher polls the status of all the resources being removed
+    watcher = StatusWatcher(jc_cli)
     with pbar:
         pbar.start_task(pb_task)
         pbar.update(
             pb_task,
             description='Starting',
-            title=f'Removing {num_res_to_remove} flows...',
+            title=f'Removing {num_res_to_remove} {res_name}s...',
         )
-
-        if Resources.Deployment in jc_cli:
-            coros = [
-                _terminate_deployment_simplified(deployment, phase)
-                for deployment in res_id_list
-            ]
-            res_name = "deployment"
-        else:
-            coros = [_terminate_flow_simplified(flow, phase) for flow in res_id_list]
-            res_name = "flow"
-        counter = 0
-        has_failure_task = False
-        for coro in asyncio.as_completed(coros):
-            try:
-                res_id = await coro
-                counter += 1
-                print(f'[red]{res_id} removed![/red]')
-                pbar.update(
-                    pb_task,
-                    advance=1,
-                    description=f'Last {res_name} removed: [red]{res_id}[/red]. {num_res_to_remove - counter} {res_name}(s) to go',
-                )
-            except:
-                has_failure_task = True
-        if Resources.Deployment in jc_cli:
-            await CloudDeployment._cancel_pending()
-        else:
-            await CloudFlow._cancel_pending()
-
-    if has_failure_task:
-        print(f'Some {res_name}s were not removed properly, please check!')
-    else:
-        print(f'Successfully removed {res_name}s listed above.')
+        try:
+            result = await run_bulk(
+                res_id_list,
+                lambda res_id: terminate(res_id, phase, watcher=watcher),
+                concurrency=concurrency,
+                timeout=timeout,
+                on_done=_on_done,
+            )
+        finally:
+            watcher.close()
+
+    if summary_file:
+        result.dump(summary_file)
+    if result.failed:
+        exit_error(
+            f'{len(result.failed)} of {result.total} {res_name}s were not removed properly, please check!'
+        )
+    print(f'Successfully removed {res_name}s listed above.')
 
 
 def login(args):
@@ -577,15 +821,172 @@ async def recreate(args):
     await CloudFlow(flow_id=args.flow).recreate()
 
 
+def _get_logs_fetcher(
+    args: Namespace, tail: Optional[int] = None, since: Optional[float] = None
+) -> Callable[[], Awaitable[Dict[str, str]]]:
+    """Get the coroutine function fetching the logs asked for by `args`, per pod, or
+    per Job.
+
+    :param args: the parsed arguments of `logs`
+    :param tail: ask the API for this number of lines from the end only
+    :param since: ask the API for the lines of the last `since` seconds only
+    :return: the coroutine function
+    """
+    limits = {k: v for k, v in (('tail', tail), ('since', since)) if v is not None}
+    if Resources.Flow in args.jc_cli:
+        flow = CloudFlow(flow_id=args.flow)
+        if args.all:
+            return lambda: flow.all_logs(**limits)
+        if args.gateway:
+            return lambda: flow.logs(**limits)
+        return lambda: flow.logs(args.executor, **limits)
+    if Resources.Deployment in args.jc_cli:
+        deployment = CloudDeployment(deployment_id=args.deployment)
+        return lambda: deployment.logs(**limits)
+
+    flow = CloudFlow(flow_id=args.flow)
+
+    async def _job_logs():
+        return {args.name: await flow.job_logs(args.name, **limits)}
+
+    return _job_logs
+
+
+async def _write_logs(args: Namespace):
+    from .logs import limit_lines
+    from .output import write_output
+
+    key = 'job' if Resources.Job in args.jc_cli else 'pod'
+    logs = await _get_logs_fetcher(args, args.tail, args.since)()
+    write_output(
+        (
+            {key: name, 'logs': '\n'.join(limit_lines(_logs, args.tail, args.since))}
+            for name, _logs in logs.items()
+        ),
+        args.output,
+    )
+
+
+def _merges_pods(args: Namespace) -> bool:
+    return Resources.Flow in args.jc_cli and args.all
+
+
+async def _follow_logs(args: Namespace):
+    from .logs import LogFollower, follow_logs, write_lines
+
+    if args.output not in (None, 'ndjson'):
+        exit_error('Only [b]--output ndjson[/b] can be used with [b]--follow[/b].')
+
+    on_lines = write_lines
+    if args.output:
+        from .output import write_output
+
+        key = 'job' if Resources.Job in args.jc_cli else 'pod'
+
+        def on_lines(name, lines):
+            write_output(({key: name, 'line': line} for line in lines), args.output)
+
+    # refetches must not be limited, they'd miss lines, the limits only apply to
+    # the lines shown first
+    await follow_logs(
+        _get_logs_fetcher(args),
+        on_lines,
+        follower=LogFollower(tail=args.tail, since=args.since),
+        merge=_merges_pods(args),
+    )
+
+
+def _logs_scope(args: Namespace) -> Tuple[str, str]:
+    """Get the ID of the resource whose logs are asked for by `args`, and which of
+    its logs."""
+    if Resources.Flow in args.jc_cli:
+        if args.all:
+            return args.flow, 'all'
+        return args.flow, 'gateway' if args.gateway else f'executor/{args.executor}'
+    if Resources.Deployment in args.jc_cli:
+        return args.deployment, 'deployment'
+    return args.flow, f'job/{args.name}'
+
+
+async def _grep_logs(args: Namespace):
+    import re
+    import time
+
+    from .logs import LogStore, write_pod_lines
+
+    if args.follow or args.tail is not None or args.since is not None:
+        exit_error(
+            '[b]--grep[/b] searches all the logs, it can\'t be used with '
+            '[b]--follow[/b], [b]--tail[/b] or [b]--since[/b].'
+        )
+    try:
+        pattern = re.compile(args.grep)
+    except re.error as e:
+        exit_error(f'Invalid pattern [b]{args.grep}[/b]: {e}')
+
+    resource_id, scope = _logs_scope(args)
+    store = LogStore(resource_id)
+    fetched_at = time.time()
+    # only the logs written since the last sync are asked for
+    logs = await _get_logs_fetcher(args, since=store.fetch_since(scope))()
+    matches = store.grep(pattern, store.sync(scope, logs, fetched_at))
+
+    if args.output:
+        from .output import write_output
+
+        key = 'job' if Resources.Job in args.jc_cli else 'pod'
+        write_output(({key: pod, 'line': line} for pod, line in matches), args.output)
+    else:
+        write_pod_lines(matches)
+
+
+async def _export_logs(args: Namespace):
+    from rich import print
+
+    from .logs import export_logs, human_size
+
+    if args.follow or args.grep is not None or args.output:
+        exit_error(
+            '[b]--export[/b] can\'t be used with [b]--follow[/b], [b]--grep[/b] or '
+            '[b]--output[/b].'
+        )
+    print(
+        f'Exporting the logs of the Flow [green]{args.flow}[/green] to [b]{args.export}[/b]'
+    )
+    stats = await export_logs(
+        CloudFlow(flow_id=args.flow).iter_all_logs(args.tail, args.since),
+        args.export,
+        args.tail,
+        args.since,
+    )
+    rate = stats['raw_bytes'] / max(stats['seconds'], 1e-6)
+    print(
+        f'Exported {stats["lines"]} lines of {stats["pods"]} pods to [b]{args.export}[/b]: '
+        f'{human_size(stats["bytes"])} ({human_size(stats["raw_bytes"])} uncompressed) '
+        f'in {stats["seconds"]:.1f}s, {human_size(rate)}/s'
+    )
+
+
 @asyncify
 async def logs(args):
+    if Resources.Flow in args.jc_cli and args.export:
+        return await _export_logs(args)
+    if args.grep is not None:
+        return await _grep_logs(args)
+    if args.follow:
+        return await _follow_logs(args)
+    if args.output:
+        return await _write_logs(args)
+
     from rich import print
     from rich import box
     from rich.console import Console
     from rich.syntax import Syntax
     from rich.table import Table
 
+    from .constants import LOGS_HIGHLIGHT_MAX_LINES
     from .helper import add_table_row_fn, center_align
+    from .logs import limit_lines, merge_lines, write_lines, write_pod_lines
 
     _t = Table(
         'Attribute',
@@ -595,62 +996,53 @@ async def logs(args):
         show_lines=True,
     )
     console = Console()
-    if Resources.Flow in args.jc_cli or Resources.Deployment in args.jc_cli:
-
-        if Resources.Flow in args.jc_cli:
+    if Resources.Flow in args.jc_cli:
+        if args.all:
+            name = 'gateway and executors'
+        else:
             name = 'gateway' if args.gateway else f'executor {args.executor}'
-            print(
-                f'Fetching the logs for {name} of the Flow: [green]{args.flow}[/green]'
-            )
-
-            if args.gateway:
-                logs = await CloudFlow(flow_id=args.flow).logs()
-            else:
-                logs = await CloudFlow(flow_id=args.flow).logs(args.executor)
-
-        if Resources.Deployment in args.jc_cli:
-            print(f'Fetching the logs for Deployment: [green]{args.deployment}[/green]')
-            logs = await CloudDeployment(deployment_id=args.deployment).logs()
-
-        for pod, pod_logs in logs.items():
-            with console.status(
-                f'[bold]Displaying logs of pod [green]{pod}[/green]...'
-            ):
-                _pod_id_row = add_table_row_fn(_t, 'POD_ID', center_align(pod))
-
-                _pod_logs_lines = '\n'.join(pod_logs.split('\n'))
-                _pod_logs_row = add_table_row_fn(
-                    _t,
-                    'Logs',
-                    Syntax(
-                        _pod_logs_lines,
-                        lexer='vctreestatus',
-                        line_numbers=1,
-                        code_width=90,
-                    ),
-                )
+        print(f'Fetching the logs for {name} of the Flow: [green]{args.flow}[/green]')
+    elif Resources.Deployment in args.jc_cli:
+        print(f'Fetching the logs for Deployment: [green]{args.deployment}[/green]')
 
-                for fn in [_pod_id_row, _pod_logs_row]:
-                    fn()
-                console.print(_t)
+    if Resources.Job in args.jc_cli:
+        kind, id_key = 'job', 'JOB_NAME'
     else:
-        logs = await CloudFlow(flow_id=args.flow).job_logs(args.name)
-        with console.status(
-            f'[bold]Displaying logs of job [green]{args.name}[/green]...'
-        ):
-            _job_id_row = add_table_row_fn(_t, 'JOB_NAME', center_align(args.name))
-            _job_logs_lines = '\n'.join(logs.split('\n'))
-            _job_logs_row = add_table_row_fn(
+        kind, id_key = 'pod', 'POD_ID'
+    logs = await _get_logs_fetcher(args, args.tail, args.since)()
+    if _merges_pods(args):
+        write_pod_lines(
+            merge_lines(
+                {
+                    pod: limit_lines(pod_logs, args.tail, args.since)
+                    for pod, pod_logs in logs.items()
+                }
+            )
+        )
+        return
+
+    for pod, pod_logs in logs.items():
+        # the API may not support the limits, they are applied here as well
+        lines = limit_lines(pod_logs, args.tail, args.since)
+        if len(lines) > LOGS_HIGHLIGHT_MAX_LINES:
+            # highlighting is too slow for large logs, they are streamed as is
+            write_lines(pod, lines)
+            continue
+
+        with console.status(f'[bold]Displaying logs of {kind} [green]{pod}[/green]...'):
+            _pod_id_row = add_table_row_fn(_t, id_key, center_align(pod))
+            _pod_logs_row = add_table_row_fn(
                 _t,
                 'Logs',
                 Syntax(
-                    _job_logs_lines,
+                    '\n'.join(lines),
                     lexer='vctreestatus',
                     line_numbers=1,
                     code_width=90,
                 ),
             )
-            for fn in [_job_id_row, _job_logs_row]:
+
+            for fn in [_pod_id_row, _pod_logs_row]:
                 fn()
             console.print(_t)
 
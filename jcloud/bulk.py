@@ -0,0 +1,101 @@
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .constants import BULK_CONCURRENCY
+from .helper import JCloudExit
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk operation, per item."""
+
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return len(self.succeeded) + len(self.failed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'succeeded': self.succeeded,
+            'failed': [
+                {'id': item, 'reason': reason} for item, reason in self.failed.items()
+            ],
+        }
+
+    def dump(self, path: str):
+        """Write the summary as JSON to the file `path`."""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _failure_reason(error: BaseException, timeout: Optional[float]) -> str:
+    if isinstance(error, asyncio.TimeoutError) and not str(error):
+        return f'timed out after {timeout:g}s'
+    if isinstance(error, JCloudExit):
+        from rich.text import Text
+
+        return Text.from_markup(error.message).plain
+    return str(error) or type(error).__name__
+
+
+async def run_bulk(
+    items: Iterable[str],
+    fn: Callable[[str], Awaitable[Any]],
+    concurrency: int = BULK_CONCURRENCY,
+    timeout: Optional[float] = None,
+    on_done: Optional[Callable[[str, Optional[str]], None]] = None,
+) -> BulkResult:
+    """Run `fn` on every item, with at most `concurrency` of them in flight.
+
+    Failures of an item, including a per-item timeout, are recorded and don't stop
+    the others. Only the tasks started here are cancelled on exit, other tasks of
+    the event loop are left alone.
+
+    :param items: the items to process, e.g. Flow IDs
+    :param fn: coroutine function processing one item
+    :param concurrency: maximum number of items processed at once
+    :param timeout: seconds allowed per item, once it started, None for no limit
+    :param on_done: callback called with the item and the failure reason, None on
+        success, as soon as the item is done
+    :return: the succeeded and failed items, with the reason of every failure
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    result = BulkResult()
+
+    async def _call(item: str):
+        try:
+            await fn(item)
+        except SystemExit as e:
+            # a SystemExit escaping a task stops the whole event loop
+            return e
+
+    async def _run_one(item: str):
+        async with semaphore:
+            try:
+                error = await asyncio.wait_for(_call(item), timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+            return item, None if error is None else _failure_reason(error, timeout)
+
+    tasks = [asyncio.ensure_future(_run_one(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            item, reason = await next_done
+            if reason is None:
+                result.succeeded.append(item)
+            else:
+                result.failed[item] = reason
+            if on_done is not None:
+                on_done(item, reason)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return result
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .constants import CACHE_DIR
+from .helper import get_logger
+
+logger = get_logger()
+
+# written by `hubble_push` on every push, it must not change the digest
+_IGNORED_FILES = frozenset({'manifest.yml'})
+_IGNORED_DIRS = frozenset({'__pycache__', '.git', '.pytest_cache'})
+
+
+def executor_digest(
+    src_dir: Union[str, Path],
+    yaml_dict: Optional[Dict] = None,
+    tag: Optional[str] = None,
+    secret: Optional[str] = None,
+) -> str:
+    """Compute the content hash of a local executor.
+
+    The hash covers every file of `src_dir`, config YAML, requirements and Dockerfile
+    included, the executor config as used in the Flow, and the tag and secret it is
+    pushed with.
+
+    :param src_dir: the directory pushed to Hubble
+    :param yaml_dict: the executor config
+    :param tag: the tag the executor is pushed with
+    :param secret: the secret the executor is pushed with
+    :return: the hex digest
+    """
+    src_dir = Path(src_dir)
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            {'yaml': yaml_dict, 'tag': tag, 'secret': secret},
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if d not in _IGNORED_DIRS)
+        for filename in sorted(files):
+            if filename in _IGNORED_FILES or filename.endswith('.pyc'):
+                continue
+            path = Path(root, filename)
+            digest.update(path.relative_to(src_dir).as_posix().encode() + b'\0')
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    digest.update(chunk)
+            digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class JSONCache:
+    """A small persistent key-value store, kept as a JSON file in the cache directory.
+
+    Unreadable cache files are ignored, and writes are atomic, so a corrupted or
+    concurrently written cache never fails a command.
+
+    :param name: the file name, relative to the cache directory
+    :param cache_dir: the cache directory, defaults to `JCLOUD_CACHE_DIR`
+    :param max_age: seconds after which values are dropped on the next write, None
+        to keep values forever
+    """
+
+    def __init__(
+        self,
+        name: str,
+        cache_dir: Optional[Union[str, Path]] = None,
+        max_age: Optional[float] = None,
+    ):
+        self.path = Path(cache_dir or CACHE_DIR) / name
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._data: Optional[Dict] = None
+
+    def _load(self) -> Dict:
+        if self._data is None:
+            try:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Get the value stored for `key`.
+
+        :param key: the key
+        :param max_age: seconds after which a stored value is ignored, None to keep
+            values forever
+        :return: the stored value, None if missing or expired
+        """
+        with self._lock:
+            entry = self._load().get(key)
+        if not isinstance(entry, dict) or 'value' not in entry:
+            return None
+        if max_age is not None and time.time() - entry.get('cached_at', 0) > max_age:
+            return None
+        return entry['value']
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            data = self._load()
+            now = time.time()
+            if self.max_age is not None:
+                for expired in [
+                    k
+                    for k, entry in data.items()
+                    if not isinstance(entry, dict)
+                    or now - entry.get('cached_at', 0) > self.max_age
+                ]:
+                    del data[expired]
+            data[key] = {'value': value, 'cached_at': now}
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    'w', dir=self.path.parent, delete=False, suffix='.tmp'
+                ) as f:
+                    json.dump(data, f)
+                os.replace(f.name, self.path)
+            except OSError as e:
+                logger.debug(f'Failed writing cache {self.path}: {e}')
+
+
+def build_cache_disabled() -> bool:
+    return 'JCLOUD_NO_BUILD_CACHE' in os.environ
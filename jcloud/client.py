@@ -0,0 +1,411 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+)
+
+from .constants import (
+    LIST_CONCURRENCY,
+    LIST_PAGE_SIZE,
+    POLL_TIMEOUT,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRY_MAX_ATTEMPTS,
+    Phase,
+)
+from .helper import _exit_if_response_error, get_aiohttp_session, get_logger
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = get_logger()
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a `Retry-After` header, given either in seconds or as an HTTP date.
+
+    :param value: the raw header value
+    :return: the number of seconds to wait, or None if absent or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0,
+            (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(),
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter for transient JCloud API failures."""
+
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    backoff_base: float = RETRY_BACKOFF_BASE
+    backoff_max: float = RETRY_BACKOFF_MAX
+    jitter: bool = True
+    # transient statuses, retried for idempotent requests
+    retry_statuses: FrozenSet[int] = frozenset(
+        {
+            HTTPStatus.TOO_MANY_REQUESTS,
+            HTTPStatus.BAD_GATEWAY,
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            HTTPStatus.GATEWAY_TIMEOUT,
+        }
+    )
+    # statuses telling the request was not processed, safe to retry for any verb
+    unprocessed_statuses: FrozenSet[int] = frozenset(
+        {HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE}
+    )
+
+    def __post_init__(self):
+        # at least the first attempt is always sent
+        self.max_attempts = max(1, self.max_attempts)
+
+    def should_retry_status(self, status: int, idempotent: bool) -> bool:
+        if idempotent:
+            return status in self.retry_statuses
+        return status in self.unprocessed_statuses
+
+    def should_retry_error(self, error: BaseException, idempotent: bool) -> bool:
+        import aiohttp
+
+        if idempotent:
+            return isinstance(
+                error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+            )
+        # the connection was never established, so the request was never sent
+        return isinstance(error, aiohttp.ClientConnectorError)
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next attempt.
+
+        :param attempt: the 1-based number of the attempt that just failed
+        :param retry_after: the delay asked by the server, which takes precedence
+        :return: the delay in seconds
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        if self.jitter:
+            # "equal jitter": keep half of the delay, randomize the other half
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+
+class RetryBudget:
+    """Limits retries to a share of the requests sent, so that an outage doesn't
+    multiply the load put on the API.
+
+    :param ratio: retries allowed per request sent
+    :param min_retries: retries always allowed, regardless of the ratio
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+
+    def record_request(self):
+        self.requests += 1
+
+    def acquire(self) -> bool:
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+# shared by all clients of the process, bulk operations create one client per resource
+_default_retry_budget = RetryBudget()
+
+
+@dataclass
+class PollPolicy:
+    """Adaptive intervals used while waiting for a resource to reach a phase.
+
+    Polling starts fast and backs off geometrically while the phase doesn't change,
+    up to `max_interval`, or `slow_max_interval` for phases known to last long.
+    """
+
+    initial_interval: float = 1.0
+    factor: float = 1.5
+    max_interval: float = 10.0
+    slow_max_interval: float = 30.0
+    slow_phases: FrozenSet[str] = frozenset({Phase.Pending})
+    timeout: float = POLL_TIMEOUT
+
+
+class Poller:
+    """Paces status polls following a :class:`PollPolicy`, against a wall-clock deadline.
+
+    :param policy: the poll policy, defaults to :class:`PollPolicy`
+    """
+
+    def __init__(self, policy: Optional[PollPolicy] = None):
+        self.policy = policy or PollPolicy()
+        self._start = time.monotonic()
+        self._interval = self.policy.initial_interval
+        self._phase = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def expired(self) -> bool:
+        return self.elapsed >= self.policy.timeout
+
+    def next_interval(
+        self, phase: Optional[str] = None, retry_after: Optional[float] = None
+    ) -> float:
+        """Compute the delay before the next poll and advance the backoff.
+
+        :param phase: the phase seen at the last poll, a new phase resets the backoff
+        :param retry_after: the delay asked by the server, which takes precedence
+        :return: the delay in seconds, never past the deadline
+        """
+        if phase != self._phase:
+            self._phase = phase
+            self._interval = self.policy.initial_interval
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = self._interval
+            cap = (
+                self.policy.slow_max_interval
+                if phase in self.policy.slow_phases
+                else self.policy.max_interval
+            )
+            self._interval = min(self._interval * self.policy.factor, cap)
+        return max(0.0, min(delay, self.policy.timeout - self.elapsed))
+
+    async def wait(
+        self, phase: Optional[str] = None, retry_after: Optional[float] = None
+    ):
+        await asyncio.sleep(self.next_interval(phase, retry_after))
+
+
+class ResponseError(RuntimeError):
+    """Raised instead of exiting on an unexpected response, by clients created with
+    `exit_on_error=False`.
+
+    :param status: the status of the response
+    :param json_response: the decoded JSON body, None if not JSON
+    """
+
+    def __init__(self, status: int, json_response: Any):
+        super().__init__(f'got {status} from server: {json_response}')
+        self.status = status
+        self.json_response = json_response
+
+
+async def _read_json(response: 'aiohttp.ClientResponse') -> Any:
+    try:
+        return await response.json(content_type=None)
+    except (json.JSONDecodeError, ValueError):
+        return None
+
+
+class JCloudClient:
+    """Sends JCloud API requests over the shared session, retrying transient failures.
+
+    :param auth_header: the authorization header sent with every request
+    :param retry_policy: backoff and retry rules, defaults to :class:`RetryPolicy`
+    :param retry_budget: retry budget, defaults to the one shared by the process
+    :param exit_on_error: whether an unexpected response shows an error and exits,
+        else :class:`ResponseError` is raised and nothing is shown
+    """
+
+    def __init__(
+        self,
+        auth_header: Dict[str, str],
+        retry_policy: Optional[RetryPolicy] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        exit_on_error: bool = True,
+    ):
+        self.auth_header = auth_header
+        self.exit_on_error = exit_on_error
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.retry_budget = retry_budget or _default_retry_budget
+        # `Retry-After` of the last response, a hint for status polling
+        self.retry_after: Optional[float] = None
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        kwargs_factory: Optional[Callable[[], Awaitable[Dict]]] = None,
+        **kwargs,
+    ) -> Tuple['aiohttp.ClientResponse', Any]:
+        """Send a request, retrying on transient errors as allowed by the retry policy.
+
+        :param method: the HTTP verb
+        :param url: the request URL
+        :param idempotent: whether the request may be repeated safely, defaults to the
+            HTTP semantics of `method`
+        :param kwargs_factory: coroutine function returning extra request kwargs, called
+            for every attempt as multipart bodies can only be sent once
+        :param kwargs: extra kwargs passed to :meth:`aiohttp.ClientSession.request`
+        :return: the last response and its decoded JSON body, None if not JSON
+        """
+        import aiohttp
+
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        policy = self.retry_policy
+        self.retry_budget.record_request()
+
+        for attempt in range(1, policy.max_attempts + 1):
+            last_attempt = attempt == policy.max_attempts
+            request_kwargs = dict(kwargs)
+            if kwargs_factory is not None:
+                request_kwargs.update(await kwargs_factory())
+            try:
+                async with get_aiohttp_session() as session:
+                    async with session.request(
+                        method, url, headers=self.auth_header, **request_kwargs
+                    ) as response:
+                        json_response = await _read_json(response)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if (
+                    last_attempt
+                    or not policy.should_retry_error(e, idempotent)
+                    or not self.retry_budget.acquire()
+                ):
+                    raise
+                reason, retry_after = repr(e), None
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if (
+                    last_attempt
+                    or not policy.should_retry_status(response.status, idempotent)
+                    or not self.retry_budget.acquire()
+                ):
+                    self.retry_after = retry_after
+                    return response, json_response
+                reason = f'got {response.status}'
+
+            delay = policy.backoff(attempt, retry_after)
+            logger.debug(
+                f'{method} {url} {reason} at attempt {attempt}, will retry in {delay:.1f}s...'
+            )
+            await asyncio.sleep(delay)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        expected_status: int = HTTPStatus.OK,
+        **kwargs,
+    ) -> Any:
+        """Send a request and exit with a readable error if the final status is unexpected.
+
+        :param method: the HTTP verb
+        :param url: the request URL
+        :param expected_status: the status of a successful response
+        :param kwargs: extra kwargs passed to :meth:`send`
+        :return: the decoded JSON body, None if not JSON
+        """
+        response, json_response = await self.send(method, url, **kwargs)
+        if response.status != expected_status:
+            if not self.exit_on_error:
+                raise ResponseError(response.status, json_response)
+            _exit_if_response_error(
+                response,
+                expected_status=expected_status,
+                json_response=json_response if json_response is not None else {},
+            )
+        return json_response
+
+    async def iter_pages(
+        self,
+        url: str,
+        key: str,
+        params: Optional[Dict] = None,
+        page_size: int = LIST_PAGE_SIZE,
+        concurrency: int = LIST_CONCURRENCY,
+    ) -> AsyncIterator[List[Dict]]:
+        """Fetch the items of a list endpoint page by page, in order.
+
+        Pages are asked with `limit` and `offset`. When the first page tells the
+        `total`, the next ones are fetched `concurrency` at a time, else one after the
+        other until a short page. An API returning more than `page_size` items, or
+        the same page again, isn't paginating, and its first answer is the only page.
+
+        :param url: the request URL
+        :param key: the key of the items in the responses, e.g. `flows`
+        :param params: the query parameters, sent with every page
+        :param page_size: the items asked per page
+        :param concurrency: the maximum number of pages fetched at once
+        :yield: the items of every page
+        """
+
+        async def _fetch(offset: int) -> Tuple[List[Dict], Dict]:
+            _params = {**(params or {}), 'limit': page_size, 'offset': offset}
+            response = await self.request('GET', url, params=_params) or {}
+            return response.get(key) or [], response
+
+        items, response = await _fetch(0)
+        yield items
+        if len(items) != page_size:
+            return
+        first_id = items[0].get('id')
+
+        total = response.get('total')
+        if isinstance(total, int):
+            offsets = iter(range(page_size, total, page_size))
+            pending = deque(
+                asyncio.ensure_future(_fetch(offset))
+                for _, offset in zip(range(max(1, concurrency)), offsets)
+            )
+            try:
+                while pending:
+                    items, _ = await pending.popleft()
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        pending.append(asyncio.ensure_future(_fetch(offset)))
+                    if not items or items[0].get('id') == first_id:
+                        return
+                    yield items
+            finally:
+                for task in pending:
+                    task.cancel()
+            return
+
+        offset = page_size
+        while True:
+            items, _ = await _fetch(offset)
+            if not items or items[0].get('id') == first_id:
+                return
+            yield items
+            if len(items) < page_size:
+                return
+            offset += page_size
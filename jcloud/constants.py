@@ -8,6 +8,25 @@ FLOWS_API = os.path.join(JCLOUD_API, 'flows')
 DEPLOYMENTS_API = os.path.join(JCLOUD_API, 'deployments')
 JOBS_API = os.path.join(JCLOUD_API, 'jobs')
 SECRETS_API = os.path.join(JCLOUD_API, 'secrets')
+HTTP_POOL_LIMIT = int(os.getenv('JCLOUD_HTTP_POOL_LIMIT', 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('JCLOUD_HTTP_POOL_LIMIT_PER_HOST', 20))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('JCLOUD_HTTP_KEEPALIVE_TIMEOUT', 30))
+RETRY_MAX_ATTEMPTS = int(os.getenv('JCLOUD_RETRY_MAX_ATTEMPTS', 4))
+RETRY_BACKOFF_BASE = float(os.getenv('JCLOUD_RETRY_BACKOFF_BASE', 1))
+RETRY_BACKOFF_MAX = float(os.getenv('JCLOUD_RETRY_BACKOFF_MAX', 30))
+POLL_TIMEOUT = float(os.getenv('JCLOUD_POLL_TIMEOUT', 1800))
+BULK_CONCURRENCY = int(os.getenv('JCLOUD_BULK_CONCURRENCY', 10))
+LIST_PAGE_SIZE = int(os.getenv('JCLOUD_LIST_PAGE_SIZE', 100))
+LIST_CONCURRENCY = int(os.getenv('JCLOUD_LIST_CONCURRENCY', 4))
+PUSH_CONCURRENCY = int(os.getenv('JCLOUD_PUSH_CONCURRENCY', 3))
+LOGS_FOLLOW_INTERVAL = float(os.getenv('JCLOUD_LOGS_FOLLOW_INTERVAL', 2))
+LOGS_HIGHLIGHT_MAX_LINES = int(os.getenv('JCLOUD_LOGS_HIGHLIGHT_MAX_LINES', 1000))
+SPEC_CACHE_TTL = float(os.getenv('JCLOUD_SPEC_CACHE_TTL', 7 * 24 * 60 * 60))
+VERSION_CHECK_TTL = float(os.getenv('JCLOUD_VERSION_CHECK_TTL', 24 * 60 * 60))
+VERSION_CHECK_RETRY_TTL = float(os.getenv('JCLOUD_VERSION_CHECK_RETRY_TTL', 10 * 60))
+VERSION_CHECK_JOIN_TIMEOUT = float(os.getenv('JCLOUD_VERSION_CHECK_JOIN_TIMEOUT', 0.5))
+INVENTORY_TTL = float(os.getenv('JCLOUD_INVENTORY_TTL', 300))
+CACHE_DIR = Path(os.getenv('JCLOUD_CACHE_DIR', Path.home() / '.cache' / 'jcloud'))
 DASHBOARD_FLOW_URL_MARKDOWN = "[https://cloud.jina.ai/](https://cloud.jina.ai/user/flows?action=detail&id={flow_id}&tab=logs)"
 DASHBOARD_FLOW_URL_LINK = "[link=https://cloud.jina.ai/user/flows?action=detail&id={flow_id}&tab=logs]https://cloud.jina.ai/[/link]"
 DASHBOARD_DEPLOYMENT_URL_MARKDOWN = "[https://cloud.jina.ai/](https://cloud.jina.ai/user/deployments?action=detail&id={deployment_id}&tab=logs)"
@@ -1,17 +1,17 @@
 import asyncio
-import json
+import io
 import yaml
 import os
 from contextlib import suppress
 from dataclasses import dataclass
+from functools import lru_cache
 from http import HTTPStatus
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import aiohttp
-from hubble.utils.auth import Auth
 from rich import print
 
+from .client import JCloudClient, Poller, PollPolicy, RetryPolicy
 from .constants import (
     DEPLOYMENTS_API,
     CustomAction,
@@ -22,7 +22,6 @@ from .constants import (
     DASHBOARD_DEPLOYMENT_URL_LINK,
 )
 from .helper import (
-    get_aiohttp_session,
     get_endpoints_from_response,
     get_logger,
     get_or_reuse_loop,
@@ -34,24 +33,33 @@ from .helper import (
     load_deployment_data,
     exit_error,
     _exit_if_response_error,
+    close_aiohttp_session,
+    with_shared_session,
 )
 
 logger = get_logger()
 
-pbar, pb_task = get_pbar(
-    '', total=2, disable='JCLOUD_NO_PROGRESSBAR' in os.environ
-)  # progress bar for deployment
+
+@lru_cache()
+def _get_pbar():
+    """The progress bar of deployments, built on first use, as importing
+    `rich.progress` slows down the startup of every command."""
+    return get_pbar('', total=2, disable='JCLOUD_NO_PROGRESSBAR' in os.environ)
 
 
 @dataclass
 class CloudDeployment:
     path: Optional[str] = None
     deployment_id: Optional[str] = None
+    retry_policy: Optional[RetryPolicy] = None
+    poll_policy: Optional[PollPolicy] = None
     # by default deployment will be available at the end of an operation
     # it will be modified accordingly, if not available
     deployment_status = 'available'
 
     def __post_init__(self):
+        from hubble.utils.auth import Auth
+
         token = Auth.get_auth_token()
         if not token:
             exit_error(
@@ -59,6 +67,9 @@ class CloudDeployment:
             )
         else:
             self.auth_header = {'Authorization': token}
+            self._client = JCloudClient(self.auth_header, self.retry_policy)
+        # spec of the ongoing operation, see `_get_spec`
+        self._spec: Optional[bytes] = None
 
         if self.path is not None and not Path(self.path).exists():
             exit_error(f'The path {self.path} specified doesn\'t exist.')
@@ -71,32 +82,47 @@ class CloudDeployment:
     def _loop(self):
         return get_or_reuse_loop()
 
-    async def _get_post_params(self, from_validate: Optional[bool] = False):
+    async def _get_spec(self, from_validate: Optional[bool] = False) -> Optional[bytes]:
+        """Get the spec sent to the API, loading the Deployment at most once.
+
+        The spec is kept until the operation is over, shared by validation,
+        submission and their retries.
+        """
         # TODO (Subbu) Normalization
         # from jcloud.normalize import deployment_normalize
 
-        params, _post_kwargs = {}, {}
-        _data = aiohttp.FormData()
-        _deployment_path = Path(self.path)
+        if self._spec is not None:
+            return self._spec
 
+        _deployment_path = Path(self.path)
         if _deployment_path.is_dir():
             _deployment_path = _deployment_path / 'deployment.yml'
 
         validate_yaml_exists(_deployment_path)
-        if not normalized(_deployment_path):
+        _deployment_dict = load_deployment_data(
+            _deployment_path, get_filename_envs(_deployment_path.parent)
+        )
+        if not normalized(_deployment_dict):
             pass
             # TODO (Subbu) Normalization
             # _deployment_path = deployment_normalize(
             #     _deployment_path, output_path=_deployment_path if from_validate else None
             # )
-            # _data.add_field(name='spec', value=open(_deployment_path))
+            # with open(_deployment_path, 'rb') as f:
+            #     self._spec = f.read()
         else:
-            _deployment_dict = load_deployment_data(
-                _deployment_path, get_filename_envs(_deployment_path.parent)
-            )
-            _data.add_field(
-                name='spec', value=yaml.dump(_deployment_dict, sort_keys=False).encode()
-            )
+            self._spec = yaml.dump(_deployment_dict, sort_keys=False).encode()
+        return self._spec
+
+    async def _get_post_params(self, from_validate: Optional[bool] = False):
+        import aiohttp
+
+        params, _post_kwargs = {}, {}
+        # a FormData can only be sent once, so it is rebuilt from the kept spec
+        _data = aiohttp.FormData()
+        _spec = await self._get_spec(from_validate)
+        if _spec is not None:
+            _data.add_field(name='spec', value=io.BytesIO(_spec))
 
         if _data._fields:
             _post_kwargs['data'] = _data
@@ -104,24 +130,17 @@ class CloudDeployment:
         return _post_kwargs
 
     async def validate(self):
-        try:
-            async with get_aiohttp_session() as session:
-                async with session.post(
-                    url=DEPLOYMENTS_API + '/validate',
-                    headers=self.auth_header,
-                    **await self._get_post_params(from_validate=True),
-                ) as response:
-                    json_response = await response.json()
-                    response.raise_for_status()
-                    return json_response
-        except aiohttp.ClientResponseError:
-            _exit_if_response_error(
-                response,
-                expected_status=HTTPStatus.OK,
-                json_response=json_response,
-            )
+        # validation has no side effect, so it can be retried like a GET
+        return await self._client.request(
+            'POST',
+            DEPLOYMENTS_API + '/validate',
+            expected_status=HTTPStatus.OK,
+            idempotent=True,
+            kwargs_factory=lambda: self._get_post_params(from_validate=True),
+        )
 
     async def _deploy(self):
+        self._spec = None
         _validate_resposne = await self.validate()
         if len(_validate_resposne['errors']) == 0:
             logger.info(
@@ -132,83 +151,38 @@ class CloudDeployment:
             exit_error(
                 f'Found {len(_validate_resposne["errors"])} error(s) in Deployment config.\n{errors}'
             )
-        for i in range(2):
-            try:
-                async with get_aiohttp_session() as session:
-                    async with session.post(
-                        url=DEPLOYMENTS_API,
-                        headers=self.auth_header,
-                        **await self._get_post_params(),
-                    ) as response:
-                        json_response = await response.json()
-                        response.raise_for_status()
-                        self.deployment_id: str = json_response['id']
-                        logger.info(
-                            f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold]'
-                        )
-                        return json_response
-            except aiohttp.ClientConnectionError as e:
-                if i == 0:
-                    logger.debug(
-                        'POST /deployments at 1st attempt failed, will retry in 2s...'
-                    )
-                    await asyncio.sleep(2)
-                else:
-                    logger.debug('POST /deployments retry failed too...')
-                    raise e
-            except aiohttp.ClientResponseError as e:
-                if e.status == HTTPStatus.SERVICE_UNAVAILABLE and i == 0:
-                    logger.debug(
-                        'POST /deployments at 1st attempt failed, will retry in 2s...'
-                    )
-                    await asyncio.sleep(2)
-                else:
-                    _exit_if_response_error(
-                        response,
-                        expected_status=HTTPStatus.CREATED,
-                        json_response=json_response,
-                    )
+        json_response = await self._client.request(
+            'POST',
+            DEPLOYMENTS_API,
+            expected_status=HTTPStatus.CREATED,
+            kwargs_factory=self._get_post_params,
+        )
+        self.deployment_id: str = json_response['id']
+        logger.info(
+            f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold]'
+        )
+        return json_response
 
     async def update(self):
         async def _update():
-            for i in range(2):
-                try:
-                    async with get_aiohttp_session() as session:
-                        api_url = DEPLOYMENTS_API + "/" + self.deployment_id
-                        post_params = await self._get_post_params()
-
-                        async with session.put(
-                            url=api_url,
-                            headers=self.auth_header,
-                            **post_params,
-                        ) as response:
-                            json_response = await response.json()
-                            _exit_if_response_error(
-                                response,
-                                expected_status=HTTPStatus.ACCEPTED,
-                                json_response=json_response,
-                            )
-
-                            if self.deployment_id is not json_response['id']:
-                                # TODO: is this validation needed?
-                                pass
-
-                            logger.info(
-                                f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold] to get updated'
-                            )
-                            return json_response
-                except aiohttp.ClientConnectionError as e:
-                    if i == 0:
-                        logger.debug(
-                            f'PUT /deployments/{self.deployment_id} at 1st attempt failed, will retry in 2s...'
-                        )
-                        await asyncio.sleep(2)
-                    else:
-                        logger.debug(
-                            f'PUT /deployments/{self.deployment_id} retry failed too...'
-                        )
-                        raise e
+            self._spec = None
+            json_response = await self._client.request(
+                'PUT',
+                DEPLOYMENTS_API + "/" + self.deployment_id,
+                expected_status=HTTPStatus.ACCEPTED,
+                kwargs_factory=self._get_post_params,
+            )
 
+            if self.deployment_id is not json_response['id']:
+                # TODO: is this validation needed?
+                pass
+
+            logger.info(
+                f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold] to get updated'
+            )
+            return json_response
+
+        pbar, pb_task = _get_pbar()
         with pbar:
             desired_phase = Phase.Serving
             title = f'Updating {Path(self.path).resolve()}'
@@ -254,39 +228,16 @@ class CloudDeployment:
             return
 
         async def _custom_action(api_url):
-            for i in range(2):
-                try:
-                    async with get_aiohttp_session() as session:
-                        post_params = dict()
-
-                        async with session.put(
-                            url=api_url,
-                            headers=self.auth_header,
-                            **post_params,
-                        ) as response:
-                            json_response = await response.json()
-                            _exit_if_response_error(
-                                response,
-                                expected_status=HTTPStatus.ACCEPTED,
-                                json_response=json_response,
-                            )
-
-                            logger.info(
-                                f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold]'
-                            )
-                            return json_response
-                except aiohttp.ClientConnectionError as e:
-                    if i == 0:
-                        logger.debug(
-                            f'PUT /deployments/{self.deployment_id} at 1st attempt failed, will retry in 2s...'
-                        )
-                        await asyncio.sleep(2)
-                    else:
-                        logger.debug(
-                            f'PUT /deployments/{self.deployment_id} retry failed too...'
-                        )
-                        raise e
+            # actions aren't idempotent, a retried restart could restart twice
+            json_response = await self._client.request(
+                'PUT', api_url, expected_status=HTTPStatus.ACCEPTED, idempotent=False
+            )
+            logger.info(
+                f'Successfully submitted deployment with ID [bold][blue]{self.deployment_id}[/blue][/bold]'
+            )
+            return json_response
 
+        pbar, pb_task = _get_pbar()
         with pbar:
             desired_phase = Phase.Serving
             intermediate_phases = [
@@ -388,73 +339,95 @@ class CloudDeployment:
 
     @property
     async def status(self) -> Dict:
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{DEPLOYMENTS_API}/{self.deployment_id}', headers=self.auth_header
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return await response.json()
+        return await self._client.request(
+            'GET', f'{DEPLOYMENTS_API}/{self.deployment_id}'
+        )
+
+    async def logs(
+        self, tail: Optional[int] = None, since: Optional[float] = None
+    ) -> Dict:
+        from .logs import logs_params
 
-    async def logs(self) -> Dict:
         _url = f'{DEPLOYMENTS_API}/{self.deployment_id}'
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{_url}/logs', headers=self.auth_header
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return json_response['logs']
+        json_response = await self._client.request(
+            'GET', f'{_url}/logs', params=logs_params(tail, since)
+        )
+        return json_response['logs']
+
+    async def iter_pages(
+        self,
+        phase: Optional[str] = None,
+        name: Optional[str] = None,
+        labels: Dict[str, str] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """Iterate over the pages of the Deployments of the user, as they are fetched.
+
+        :param phase: comma separated phases to list, `All` or None for all
+        :param name: the name of the Deployments to list
+        :param labels: `&` separated `key=value` labels of the Deployments to list
+        :yield: the Deployments of every page
+        """
+        _params = {}
+        if phase is not None and phase != 'All':
+            _params.update({'phase': phase})
+        if name is not None:
+            _params.update({'name': name})
+        if labels is not None:
+            _params.update({'labels': labels})
+        async for _page in self._client.iter_pages(
+            DEPLOYMENTS_API, 'deployments', params=_params
+        ):
+            yield _page
+
+    async def iter_all(
+        self,
+        phase: Optional[str] = None,
+        name: Optional[str] = None,
+        labels: Dict[str, str] = None,
+    ) -> AsyncIterator[Dict]:
+        """Iterate over the Deployments of the user, as their pages are fetched.
+
+        :param phase: comma separated phases to list, `All` or None for all
+        :param name: the name of the Deployments to list
+        :param labels: `&` separated `key=value` labels of the Deployments to list
+        :yield: every Deployment
+        """
+        async for _page in self.iter_pages(phase, name, labels):
+            for _resource in _page:
+                yield _resource
 
     async def list_all(
         self,
         phase: Optional[str] = None,
         name: Optional[str] = None,
         labels: Dict[str, str] = None,
+        quiet: bool = False,
     ) -> Dict:
-        async with get_aiohttp_session() as session:
-            _args = dict(url=DEPLOYMENTS_API, headers=self.auth_header)
-            _args['params'] = {}
-
-            if phase is not None and phase != 'All':
-                _args['params'].update({'phase': phase})
-            if name is not None:
-                _args['params'].update({'name': name})
-            if labels is not None:
-                _args['params'].update({'labels': labels})
-            async with session.get(**_args) as response:
-                _results = await response.json()
-                if not _results:
-                    print(
-                        f'\nYou don\'t have any Deployments deployed with status [green]{phase}[/green]. '
-                        f'Please pass a different [i]--status[/i] or use [i]jc deploy[/i] to deploy a new Deployment'
-                    )
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=_results,
-                )
-                return _results
+        _results = {
+            'deployments': [
+                _resource async for _resource in self.iter_all(phase, name, labels)
+            ]
+        }
+        if not _results['deployments'] and not quiet:
+            print(
+                f'\nYou don\'t have any Deployments deployed with status [green]{phase}[/green]. '
+                f'Please pass a different [i]--status[/i] or use [i]jc deploy[/i] to deploy a new Deployment'
+            )
+        return _results
 
     async def _fetch_until(
         self,
         intermediate: List[Phase],
         desired: Phase = Phase.Serving,
     ) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
-        _wait_seconds = 0
+        pbar, pb_task = _get_pbar()
+        _poller = Poller(self.poll_policy)
         _last_phase = None
-        while _wait_seconds < 1800:
+        while not _poller.expired:
             _json_response = await self.status
             if _json_response is None or 'status' not in _json_response:
                 # intermittently no response is sent, retry then!
+                await _poller.wait(retry_after=self._client.retry_after)
                 continue
             _current_phase = get_phase_from_response(_json_response)
 
@@ -481,34 +454,30 @@ class CloudDeployment:
                     description=_current_phase.value.title(),
                     advance=1,
                 )
-            else:
-                await asyncio.sleep(5)
-                _wait_seconds += 5
+            await _poller.wait(_current_phase, retry_after=self._client.retry_after)
 
         exit_error(
-            f'Couldn\'t reach status {desired} after waiting for 30mins. Exiting.'
+            f'Couldn\'t reach status {desired} after waiting for '
+            f'{_poller.policy.timeout / 60:g}mins. Exiting.'
         )
 
     async def _terminate(self):
-        async with get_aiohttp_session() as session:
-            async with session.delete(
-                url=f'{DEPLOYMENTS_API}/{self.deployment_id}',
-                headers=self.auth_header,
-            ) as response:
-                try:
-                    json_response = await response.json()
-                except json.decoder.JSONDecodeError:
-                    exit_error(
-                        f'Can\'t find [b]{self.deployment_id}[/b], check the ID or the deployment may be removed already.'
-                    )
-
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
+        response, json_response = await self._client.send(
+            'DELETE', f'{DEPLOYMENTS_API}/{self.deployment_id}'
+        )
+        if json_response is None:
+            exit_error(
+                f'Can\'t find [b]{self.deployment_id}[/b], check the ID or the deployment may be removed already.'
+            )
+
+        _exit_if_response_error(
+            response,
+            expected_status=HTTPStatus.OK,
+            json_response=json_response,
+        )
 
     async def __aenter__(self):
+        pbar, pb_task = _get_pbar()
         with pbar:
             pbar.start_task(pb_task)
             pbar.update(
@@ -536,6 +505,7 @@ class CloudDeployment:
         return self
 
     async def __aexit__(self, *args, **kwargs):
+        pbar, pb_task = _get_pbar()
         with pbar:
             pbar.start_task(pb_task)
             pbar.update(
@@ -551,6 +521,7 @@ class CloudDeployment:
             )
             pbar.update(pb_task, description='Finishing', advance=1)
             await CloudDeployment._cancel_pending()
+        await close_aiohttp_session()
 
     @staticmethod
     async def _cancel_pending():
@@ -560,10 +531,18 @@ class CloudDeployment:
                 await task
 
     def __enter__(self):
-        return self._loop.run_until_complete(self.__aenter__())
+        # one loop and one shared session for the whole context, closed by `__exit__`
+        self._context_loop = self._loop
+        try:
+            return self._context_loop.run_until_complete(self.__aenter__())
+        except BaseException:
+            self._context_loop.run_until_complete(close_aiohttp_session())
+            raise
 
     def __exit__(self, *args, **kwargs):
-        self._loop.run_until_complete(self.__aexit__(*args, **kwargs))
+        self._context_loop.run_until_complete(
+            with_shared_session(self.__aexit__(*args, **kwargs))
+        )
 
     def __rich_console__(self, console, options):
         from rich import box
@@ -589,13 +568,14 @@ class CloudDeployment:
 
 
 async def _terminate_deployment_simplified(
-    deployment_id: str, phase: Optional[str] = None
+    deployment_id: str, phase: Optional[str] = None, watcher=None
 ):
     """Terminate a Deployment given deployment_id.
 
     This is a simplified version of CloudDeployment.__aexit__, i.e.,
     without reporting the details of the termination process using the progress bar.
-    It's supposed to be used in the multi-deployment removal context.
+    It's supposed to be used in the multi-deployment removal context, where a shared
+    `watcher.StatusWatcher` batches the status polls of all the deployments removed.
     """
 
     deployment = CloudDeployment(deployment_id=deployment_id)
@@ -603,10 +583,15 @@ async def _terminate_deployment_simplified(
     _intermediate_phases = [Phase.Serving]
     if phase is not None:
         _intermediate_phases.append(phase)
-    await deployment._fetch_until(
-        intermediate=_intermediate_phases,
-        desired=Phase.Deleted,
-    )
+    if watcher is not None:
+        await watcher.wait_for(
+            deployment_id, intermediate=_intermediate_phases, desired=Phase.Deleted
+        )
+    else:
+        await deployment._fetch_until(
+            intermediate=_intermediate_phases,
+            desired=Phase.Deleted,
+        )
 
     # This needs to be returned so in asyncio.as_completed, it can be printed.
     return deployment_id
@@ -1,10 +1,11 @@
 import os
 import re
-import string
 import warnings
 
 from types import SimpleNamespace
-from typing import Dict, Any, Union, Dict, Optional
+from typing import Dict, Any, List, Set, Tuple, Union, Dict, Optional
+
+import yaml
 
 
 class EnvironmentVariables:
@@ -86,8 +87,261 @@ def parse_arg(v: str) -> Optional[Union[bool, int, str, list, float]]:
     return v
 
 
-class ContextVarTemplate(string.Template):
-    delimiter = '$$'  # variables that should be substituted with values from the context are internally denoted with '$$'
+# all the substitutable templates, matched in one pass:
+# '${{ ENV.var }}', '${{ CONTEXT.var }}', '${{ var }}', '$var' and '${var}'
+_template_regex = re.compile(
+    r'\${{\s(?:(?P<env>ENV\.|env\.)|CONTEXT\.|context\.)?(?P<name>[a-zA-Z0-9_]*)\s}}'
+    r'|\$(?P<var>\w+)'
+    r'|\${(?P<braced>[^}]*)}'
+)
+
+
+def _substitute(v: str, context: Optional[Dict]) -> Any:
+    # substitute templates with actual values either from context or env variables:
+    #
+    # 1)    ${{ var }}, ${{ context.var }}, ${{ CONTEXT.var }} are read from the context,
+    #       and from the env variables if missing from the context, like JAML does
+    # 2)    ${{ ENV.var }}, ${{ env.var }}, $var and ${var} are read from the env
+    #       variables
+    #
+    # unknown variables are left as is, and the result is parsed to python objects
+    def _repl(match) -> str:
+        name = match.group('name')
+        if name is not None:
+            if match.group('env') is not None:
+                return os.environ.get(name, f'${name}')
+            if context and name in context:
+                return os.path.expandvars(str(context[name]))
+            return '$' + os.environ.get(name, f'${name}')
+        var = match.group('var')
+        if var is None:
+            var = match.group('braced')
+        warnings.warn(
+            'Specifying environment variables via the syntax `$var` is deprecated.'
+            'Use `${{ ENV.var }}` instead.',
+            category=DeprecationWarning,
+        )
+        return os.environ.get(var, match.group(0))
+
+    return parse_arg(_template_regex.sub(_repl, v))
+
+
+def referenced_env_vars(text: str, context: Optional[Dict] = None) -> Set[str]:
+    """Find the environment variables substituting `text` may read.
+
+    Substituted values are substituted again, so the variables referred to by the
+    values of the context and of the variables found are included as well.
+
+    :param text: the YAML document, or any string to substitute
+    :param context: the context substituted along with the environment
+    :return: the names of the environment variables
+    """
+    names = set()
+    pending = [text, *(str(v) for v in (context or {}).values())]
+    while pending:
+        found = []
+        value = pending.pop()
+        for match in _template_regex.finditer(value):
+            # `${{ var }}` falls back to the environment when missing from the context
+            for group in ('name', 'var', 'braced'):
+                if match.group(group) is not None:
+                    found.append(match.group(group))
+                    break
+        for match in yaml_ref_regex.finditer(value):
+            base, tokens = _parse_reference(match.group(1))
+            if base == 'ENV' and tokens:
+                found.append(str(tokens[0]))
+        for name in found:
+            if name not in names:
+                names.add(name)
+                if name in os.environ:
+                    pending.append(os.environ[name])
+    return names
+
+
+def _substitute_values(
+    node: Union[Dict, list],
+    context: Optional[Dict],
+    rounds: int,
+    path: Tuple = (),
+    sites: Optional[List['_ReferenceSite']] = None,
+) -> List['_ReferenceSite']:
+    """Substitute all the string values of `node` in place.
+
+    :param rounds: maximum number of substitutions of a value, as substituted values
+        may contain templates themselves
+    :param path: the path of `node` in the document
+    :param sites: the reference sites found so far
+    :return: the values which are internal references to resolve
+    """
+    if sites is None:
+        sites = []
+    items = list(node.items()) if isinstance(node, dict) else enumerate(list(node))
+    for k, v in items:
+        if isinstance(v, (dict, list)):
+            _substitute_values(v, context, rounds, path + (k,), sites)
+        elif isinstance(v, str):
+            if '$' not in v:
+                # no template, skip the regexes
+                node[k] = parse_arg(v)
+                continue
+            for _ in range(rounds):
+                substituted = _substitute(v, context)
+                if substituted == v or not isinstance(substituted, str):
+                    break
+                v = substituted
+            node[k] = v = substituted
+            if isinstance(v, str) and yaml_ref_regex.search(v):
+                sites.append(_ReferenceSite(node, k, path + (k,)))
+    return sites
+
+
+class YAMLReferenceCycleError(ValueError):
+    """Raised when internal references of a YAML document refer to each other."""
+
+
+class _ReferenceSite:
+    """A value holding internal references, e.g. '${{root.executors[0].name}}'."""
+
+    __slots__ = ('node', 'key', 'path')
+
+    def __init__(self, node: Union[Dict, list], key: Any, path: Tuple):
+        self.node = node
+        self.key = key
+        self.path = path
+
+
+_reference_token_regex = re.compile(r'\.(\w+)|\[([^\]]+)\]')
+
+
+def _parse_reference(expr: str) -> Tuple[str, List[Any]]:
+    """Split a reference into its base and its path, like the python formatter does:
+    'root.executors[0].name' gives ('root', ['executors', 0, 'name'])."""
+    match = re.match(r'\w*', expr)
+    base, rest = match.group(0), expr[match.end() :]
+    tokens = []
+    for match in _reference_token_regex.finditer(rest):
+        attr, index = match.groups()
+        if attr is not None:
+            tokens.append(attr)
+        else:
+            tokens.append(int(index) if index.isdigit() else index)
+    return base, tokens
+
+
+def _format_path(path: Tuple) -> str:
+    return 'root' + ''.join(f'[{k}]' if isinstance(k, int) else f'.{k}' for k in path)
+
+
+def _lookup(value: Any, tokens: List[Any]) -> Any:
+    for token in tokens:
+        try:
+            value = value[token]
+        except (KeyError, IndexError, TypeError) as ex:
+            raise AttributeError(
+                'variable replacement is failed, please check your YAML file.'
+            ) from ex
+    return value
+
+
+def _target_path(site: _ReferenceSite, expr: str) -> Optional[Tuple]:
+    base, tokens = _parse_reference(expr)
+    if base == 'root':
+        return tuple(tokens)
+    if base == 'this':
+        return site.path[:-1] + tuple(tokens)
+    return None
+
+
+def _resolve_site(site: _ReferenceSite, root: Dict) -> Any:
+    # internal references are of the form ${{path}} where path is a yaml path like
+    # root.executors[0].name, "root" being the document and "this" the current node
+    def repl_fn(matchobj):
+        base, tokens = _parse_reference(matchobj.group(1))
+        if base == 'root':
+            value = _lookup(root, tokens)
+        elif base == 'this':
+            value = _lookup(site.node, tokens)
+        elif base == 'ENV':
+            value = _lookup(os.environ, tokens)
+        else:
+            return matchobj.group(0)
+        return format(value)
+
+    return parse_arg(yaml_ref_regex.sub(repl_fn, site.node[site.key]))
+
+
+def _resolution_order(sites: List[_ReferenceSite]) -> List[_ReferenceSite]:
+    """Sort the reference sites so that every site comes after the sites it refers to.
+
+    A site depends on the sites inside the node it refers to, and on the site the
+    path of the node goes through, if any.
+
+    :raises YAMLReferenceCycleError: if some sites refer to each other
+    """
+    # prefix tree of the site paths, a node is [site, children]
+    tree = [None, {}]
+    for site in sites:
+        node = tree
+        for k in site.path:
+            node = node[1].setdefault(k, [None, {}])
+        node[0] = site
+
+    def _dependencies(site: _ReferenceSite) -> List[_ReferenceSite]:
+        deps = []
+        for match in yaml_ref_regex.finditer(site.node[site.key]):
+            path = _target_path(site, match.group(1))
+            if path is None:
+                continue
+            node = tree
+            for k in path:
+                node = node[1].get(k)
+                if node is None:
+                    break
+                if node[0] is not None:
+                    deps.append(node[0])
+            else:
+                stack = list(node[1].values())
+                while stack:
+                    child = stack.pop()
+                    if child[0] is not None:
+                        deps.append(child[0])
+                    stack.extend(child[1].values())
+        return deps
+
+    order, done, visiting = [], set(), {}
+    for start in sites:
+        if id(start) in done:
+            continue
+        # iterative depth-first search, deep chains must not hit the recursion limit
+        stack = [(start, iter(_dependencies(start)))]
+        visiting[id(start)] = 0
+        while stack:
+            site, deps = stack[-1]
+            for dep in deps:
+                if id(dep) in done:
+                    continue
+                if id(dep) in visiting:
+                    cycle = [s for s, _ in stack[visiting[id(dep)] :]] + [dep]
+                    raise YAMLReferenceCycleError(
+                        'circular reference in YAML: '
+                        + ' -> '.join(_format_path(s.path) for s in cycle)
+                    )
+                visiting[id(dep)] = len(stack)
+                stack.append((dep, iter(_dependencies(dep))))
+                break
+            else:
+                stack.pop()
+                del visiting[id(site)]
+                done.add(id(site))
+                order.append(site)
+    return order
+
+
+def _resolve_references(root: Dict, sites: List[_ReferenceSite]):
+    """Resolve the internal references of the document in place, every value once."""
+    for site in _resolution_order(sites):
+        site.node[site.key] = _resolve_site(site, root)
 
 
 def expand_dict(
@@ -98,171 +352,88 @@ def expand_dict(
 ) -> Dict[str, Any]:
     """
     Expand variables from YAML file.
+
+    Values are substituted in a single pass, values without any `$` are only parsed.
+    Internal references are then resolved in dependency order, so every reference
+    is evaluated once, whatever the depth of the chains of references.
+
     :param d: yaml file loaded as python dict
     :param context: context replacement variables in a dict, the value of the dict is the replacement.
     :param resolve_cycle_ref: resolve internal reference if True.
-    :param resolve_passes: number of rounds to resolve internal reference.
+    :param resolve_passes: number of times substituted values are substituted again,
+        as they may contain templates themselves.
     :return: expanded dict.
+    :raises YAMLReferenceCycleError: if internal references refer to each other
     """
+    if isinstance(context, SimpleNamespace):
+        context = vars(context)
+
+    # first do var replacement, JAML substitutes values again in every resolve pass
+    rounds = 1 + resolve_passes if resolve_cycle_ref else 1
+    sites = _substitute_values(d, context, rounds)
 
-    expand_map = SimpleNamespace()
-    env_map = SimpleNamespace()
-
-    def _scan(sub_d, p):
-        if isinstance(sub_d, dict):
-            for k, v in sub_d.items():
-                if isinstance(v, dict):
-                    p.__dict__[k] = SimpleNamespace()
-                    _scan(v, p.__dict__[k])
-                elif isinstance(v, list):
-                    p.__dict__[k] = list()
-                    _scan(v, p.__dict__[k])
-                else:
-                    p.__dict__[k] = v
-        elif isinstance(sub_d, list):
-            for idx, v in enumerate(sub_d):
-                if isinstance(v, dict):
-                    p.append(SimpleNamespace())
-                    _scan(v, p[idx])
-                elif isinstance(v, list):
-                    p.append(list())
-                    _scan(v, p[idx])
-                else:
-                    p.append(v)
-
-    def _replace(sub_d, p, resolve_ref=False):
-
-        if isinstance(sub_d, dict):
-            for k, v in sub_d.items():
-                if isinstance(v, (dict, list)):
-                    _replace(v, p.__dict__[k], resolve_ref)
-                else:
-                    if isinstance(v, str):
-                        if resolve_ref and yaml_ref_regex.findall(v):
-                            sub_d[k] = _resolve_yaml_reference(v, p)
-                        else:
-                            sub_d[k] = _sub(v)
-        elif isinstance(sub_d, list):
-            for idx, v in enumerate(sub_d):
-                if isinstance(v, (dict, list)):
-                    _replace(v, p[idx], resolve_ref)
-                else:
-                    if isinstance(v, str):
-                        if resolve_ref and yaml_ref_regex.findall(v):
-                            sub_d[idx] = _resolve_yaml_reference(v, p)
-                        else:
-                            sub_d[idx] = _sub(v)
-
-    def _var_to_substitutable(v, exp=context_var_regex):
-        def repl_fn(matchobj):
-            return '$$' + matchobj.group(0)[4:-3]
-
-        return re.sub(exp, repl_fn, v)
-
-    def _to_env_var_synatx(v):
-        v = _var_to_substitutable(v, new_env_var_regex)
-
-        def repl_fn(matchobj):
-            match_str = matchobj.group(0)
-            match_str = match_str.replace('ENV.', '')
-            match_str = match_str.replace('env.', '')
-            return match_str[1:]
-
-        return re.sub(r'\$\$[a-zA-Z0-9_.]*', repl_fn, v)
-
-    def _to_normal_context_var(v):
-        def repl_fn(matchobj):
-            match_str = matchobj.group(0)
-            match_str = match_str.replace('CONTEXT.', '')
-            match_str = match_str.replace('context.', '')
-            return match_str
-
-        return re.sub(context_dot_regex, repl_fn, v)
-
-    def _sub(v):
-
-        # substitute template with actual value either from context or env variable
-        # v could contain template of the form
-        #
-        # 1)    ${{ var }},${{ context.var }},${{ CONTEXT.var }} when need to be parsed with the context dict
-        # or
-        # 2 )   ${{ ENV.var }},${{ env.var }},$var ( deprecated) when need to be parsed with env
-        #
-        #
-        # internally env var (1) and context var (2) are treated differently, both of them are cast to a unique and
-        # normalize template format and then are parsed
-        # 1) context variables placeholder are cast to $$var then we use the ContextVarTemplate to parse the context
-        # variables
-        # 2) env variables placeholder are cast to $var then we leverage the os.path.expandvars to replace by
-        # environment variables.
-
-        if env_var_deprecated_regex.findall(v) and not env_var_regex.findall(
-            v
-        ):  # catch expressions of form '$var'
-            warnings.warn(
-                'Specifying environment variables via the syntax `$var` is deprecated.'
-                'Use `${{ ENV.var }}` instead.',
-                category=DeprecationWarning,
-            )
-        if new_env_var_regex.findall(v):  # handle expressions of form '${{ ENV.var}}',
-            v = _to_env_var_synatx(v)
-        if context_dot_regex.findall(v):
-            v = _to_normal_context_var(v)
-        if context_var_regex.findall(v):  # handle expressions of form '${{ var }}'
-            v = _var_to_substitutable(v)
-            if context:
-                v = ContextVarTemplate(v).safe_substitute(
-                    context
-                )  # use vars provided in context
-        v = os.path.expandvars(
-            v
-        )  # gets env var and parses to python objects if neededd
-        return parse_arg(v)
-
-    def _resolve_yaml_reference(v, p):
-
-        org_v = v
-        # internal references are of the form ${{path}} where path is a yaml path like root.executors[0].name
-
-        def repl_fn(matchobj):
-            match_str = matchobj.group(0)
-            match_str_origin = match_str
-
-            match_str = re.sub(
-                yaml_ref_regex, '{\\1}', match_str
-            )  # from ${{var}} to {var} to leverage python formatter
-
-            try:
-                # "root" context is now the global namespace
-                # "this" context is now the current node namespace
-                match_str = match_str.format(root=expand_map, this=p, ENV=env_map)
-            except AttributeError as ex:
-                raise AttributeError(
-                    'variable replacement is failed, please check your YAML file.'
-                ) from ex
-            except KeyError:
-                return match_str_origin
-
-            return match_str
-
-        v = re.sub(yaml_ref_regex, repl_fn, v)
-
-        return parse_arg(v)
-
-    _scan(d, expand_map)
-    _scan(dict(os.environ), env_map)
-
-    # first do var replacement
-    _replace(d, expand_map)
-
-    # do `resolve_passes` rounds of scan-replace to resolve internal references
-    for _ in range(resolve_passes):
-        # rebuild expand_map
-        expand_map = SimpleNamespace()
-        _scan(d, expand_map)
-
-        # resolve internal reference
-        if resolve_cycle_ref:
-            _replace(d, expand_map, resolve_ref=True)
+    # resolve the internal references, which may refer to each other
+    if resolve_cycle_ref and sites:
+        _resolve_references(d, sites)
 
     return d
+
+
+class JAMLLoader(yaml.FullLoader):
+    """A YAML loader compatible with the one of JAML, without importing jina.
+
+    Like JAML, `on`/`off` are not parsed as booleans, and a tagged mapping such as
+    `!Flow` is read as a mapping with the corresponding `jtype`.
+    """
+
+    def construct_mapping(self, node, deep=False):
+        if isinstance(node, yaml.MappingNode):
+            self.flatten_mapping(node)
+        mapping = {}
+        for key_node, value_node in node.value:
+            key = self.construct_object(key_node, deep=True)
+            if isinstance(key, list):
+                key = tuple(key)
+            mapping[key] = self.construct_object(value_node, deep=deep)
+        return mapping
+
+
+def _construct_tagged(loader: JAMLLoader, tag_suffix: str, node):
+    if isinstance(node, yaml.MappingNode):
+        return {'jtype': tag_suffix, **loader.construct_mapping(node, deep=True)}
+    if isinstance(node, yaml.SequenceNode):
+        return loader.construct_sequence(node, deep=True)
+    return loader.construct_scalar(node)
+
+
+JAMLLoader.add_multi_constructor('!', _construct_tagged)
+# like JAML, remove the `on|On|ON` and `off|Off|OFF` boolean resolvers
+JAMLLoader.yaml_implicit_resolvers = {
+    k: v for k, v in JAMLLoader.yaml_implicit_resolvers.items() if k not in ('o', 'O')
+}
+
+
+def load_yaml(
+    stream, substitute: bool = False, context: Optional[Dict[str, Any]] = None
+):
+    """Parse a YAML document like `JAML.load` does.
+
+    :param stream: the YAML string or stream
+    :param substitute: substitute environment, internal reference and context variables
+    :param context: context replacement variables in a dict
+    :return: the Python object
+    """
+    r = yaml.load(stream, Loader=JAMLLoader)
+    if substitute:
+        r = expand_dict(r, context)
+    return r
+
+
+def dump_yaml(data, stream=None):
+    """Serialize a Python object into YAML like `JAML.dump` does.
+
+    :param data: the data to serialize
+    :param stream: the output stream, the YAML is returned if None
+    :return: the YAML if `stream` is None
+    """
+    return yaml.dump(data, stream=stream, default_flow_style=False, sort_keys=False)
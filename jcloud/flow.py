@@ -1,20 +1,21 @@
 import asyncio
-import json
+import io
 import yaml
 import os
 from contextlib import suppress
 from dataclasses import dataclass
+from functools import lru_cache
 from http import HTTPStatus
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import aiohttp
-from hubble.utils.auth import Auth
 from rich import print
 
+from .client import JCloudClient, Poller, PollPolicy, RetryPolicy
 from .constants import (
     FLOWS_API,
     JOBS_API,
+    PUSH_CONCURRENCY,
     SECRETS_API,
     CustomAction,
     Phase,
@@ -24,7 +25,6 @@ from .constants import (
     DASHBOARD_FLOW_URL_LINK,
 )
 from .helper import (
-    get_aiohttp_session,
     get_endpoints_from_response,
     get_logger,
     get_or_reuse_loop,
@@ -32,17 +32,23 @@ from .helper import (
     normalized,
     update_flow_yml_and_write_to_file,
     get_filename_envs,
+    get_flow_path,
     validate_yaml_exists,
     load_flow_data,
     exit_error,
     _exit_if_response_error,
+    close_aiohttp_session,
+    with_shared_session,
 )
 
 logger = get_logger()
 
-pbar, pb_task = get_pbar(
-    '', total=2, disable='JCLOUD_NO_PROGRESSBAR' in os.environ
-)  # progress bar for deployment
+
+@lru_cache()
+def _get_pbar():
+    """The progress bar of Flow operations, built on first use to keep
+    `rich.progress` out of the startup of `jc`."""
+    return get_pbar('', total=2, disable='JCLOUD_NO_PROGRESSBAR' in os.environ)
 
 
 def get_resource_url(resource: str) -> str:
@@ -55,11 +61,17 @@ def get_resource_url(resource: str) -> str:
 class CloudFlow:
     path: Optional[str] = None
     flow_id: Optional[str] = None
+    retry_policy: Optional[RetryPolicy] = None
+    poll_policy: Optional[PollPolicy] = None
+    # maximum number of local executors pushed to Hubble at once while normalizing
+    push_concurrency: int = PUSH_CONCURRENCY
     # by default flow will be available at the end of an operation
     # it will be modified accordingly, if not available
     flow_status = 'available'
 
     def __post_init__(self):
+        from hubble.utils.auth import Auth
+
         token = Auth.get_auth_token()
         if not token:
             exit_error(
@@ -67,6 +79,10 @@ class CloudFlow:
             )
         else:
             self.auth_header = {'Authorization': token}
+            self._client = JCloudClient(self.auth_header, self.retry_policy)
+        # Flow YAML and spec of the ongoing operation, see `flow_dict` and `_get_spec`
+        self._flow_dict: Optional[Dict] = None
+        self._spec: Optional[bytes] = None
 
         if self.path is not None and not Path(self.path).exists():
             exit_error(f'The path {self.path} specified doesn\'t exist.')
@@ -79,29 +95,57 @@ class CloudFlow:
     def _loop(self):
         return get_or_reuse_loop()
 
-    async def _get_post_params(self, from_validate: Optional[bool] = False):
-        from jcloud.normalize import flow_normalize
+    @property
+    def flow_dict(self) -> Dict:
+        """The Flow YAML, parsed and substituted once per operation.
+
+        It is shared by the checks run before deploying, normalization and the spec
+        sent to the API.
+        """
+        if self._flow_dict is None:
+            _flow_path = get_flow_path(self.path)
+            validate_yaml_exists(_flow_path)
+            self._flow_dict = load_flow_data(
+                _flow_path, get_filename_envs(_flow_path.parent)
+            )
+        return self._flow_dict
 
-        params, _post_kwargs = {}, {}
-        _data = aiohttp.FormData()
-        _flow_path = Path(self.path)
+    async def _get_spec(self, from_validate: Optional[bool] = False) -> bytes:
+        """Get the spec sent to the API, normalizing the Flow at most once.
 
-        if _flow_path.is_dir():
-            _flow_path = _flow_path / 'flow.yml'
+        Normalizing pushes the local executors to Hubble, so the spec is kept until
+        the operation is over, shared by validation, submission and their retries.
+        """
+        from jcloud.normalize import flow_normalize
+
+        if self._spec is not None:
+            return self._spec
 
-        validate_yaml_exists(_flow_path)
-        if not normalized(_flow_path):
-            _flow_path = flow_normalize(
-                _flow_path, output_path=_flow_path if from_validate else None
+        if not normalized(self.flow_dict):
+            _flow_path = get_flow_path(self.path)
+            _normed_path = flow_normalize(
+                _flow_path,
+                output_path=_flow_path if from_validate else None,
+                push_concurrency=self.push_concurrency,
+                flow_dict=self.flow_dict,
             )
-            _data.add_field(name='spec', value=open(_flow_path))
+            with open(_normed_path, 'rb') as f:
+                self._spec = f.read()
         else:
-            _flow_dict = load_flow_data(
-                _flow_path, get_filename_envs(_flow_path.parent)
-            )
-            _data.add_field(
-                name='spec', value=yaml.dump(_flow_dict, sort_keys=False).encode()
-            )
+            self._spec = yaml.dump(self.flow_dict, sort_keys=False).encode()
+        # the YAML may be edited before the next operation, which loads it again
+        self._flow_dict = None
+        return self._spec
+
+    async def _get_post_params(self, from_validate: Optional[bool] = False):
+        import aiohttp
+
+        params, _post_kwargs = {}, {}
+        # a FormData can only be sent once, so it is rebuilt from the kept spec
+        _data = aiohttp.FormData()
+        _data.add_field(
+            name='spec', value=io.BytesIO(await self._get_spec(from_validate))
+        )
 
         if _data._fields:
             _post_kwargs['data'] = _data
@@ -109,24 +153,17 @@ class CloudFlow:
         return _post_kwargs
 
     async def validate(self):
-        try:
-            async with get_aiohttp_session() as session:
-                async with session.post(
-                    url=FLOWS_API + '/validate',
-                    headers=self.auth_header,
-                    **await self._get_post_params(from_validate=True),
-                ) as response:
-                    json_response = await response.json()
-                    response.raise_for_status()
-                    return json_response
-        except aiohttp.ClientResponseError:
-            _exit_if_response_error(
-                response,
-                expected_status=HTTPStatus.OK,
-                json_response=json_response,
-            )
+        # validation has no side effect, so it can be retried like a GET
+        return await self._client.request(
+            'POST',
+            FLOWS_API + '/validate',
+            expected_status=HTTPStatus.OK,
+            idempotent=True,
+            kwargs_factory=lambda: self._get_post_params(from_validate=True),
+        )
 
     async def _deploy(self):
+        self._spec = None
         _validate_resposne = await self.validate()
         if len(_validate_resposne['errors']) == 0:
             logger.info(
@@ -137,81 +174,38 @@ class CloudFlow:
             exit_error(
                 f'Found {len(_validate_resposne["errors"])} error(s) in Flow config.\n{errors}'
             )
-        for i in range(2):
-            try:
-                async with get_aiohttp_session() as session:
-                    async with session.post(
-                        url=FLOWS_API,
-                        headers=self.auth_header,
-                        **await self._get_post_params(),
-                    ) as response:
-                        json_response = await response.json()
-                        response.raise_for_status()
-                        self.flow_id: str = json_response['id']
-                        logger.info(
-                            f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold]'
-                        )
-                        return json_response
-            except aiohttp.ClientConnectionError as e:
-                if i == 0:
-                    logger.debug(
-                        'POST /flows at 1st attempt failed, will retry in 2s...'
-                    )
-                    await asyncio.sleep(2)
-                else:
-                    logger.debug('POST /flows retry failed too...')
-                    raise e
-            except aiohttp.ClientResponseError as e:
-                if e.status == HTTPStatus.SERVICE_UNAVAILABLE and i == 0:
-                    logger.debug(
-                        'POST /flows at 1st attempt failed, will retry in 2s...'
-                    )
-                    await asyncio.sleep(2)
-                else:
-                    _exit_if_response_error(
-                        response,
-                        expected_status=HTTPStatus.CREATED,
-                        json_response=json_response,
-                    )
+        json_response = await self._client.request(
+            'POST',
+            FLOWS_API,
+            expected_status=HTTPStatus.CREATED,
+            kwargs_factory=self._get_post_params,
+        )
+        self.flow_id: str = json_response['id']
+        logger.info(
+            f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold]'
+        )
+        return json_response
 
     async def update(self):
         async def _update():
-            for i in range(2):
-                try:
-                    async with get_aiohttp_session() as session:
-                        api_url = FLOWS_API + "/" + self.flow_id
-                        post_params = await self._get_post_params()
-
-                        async with session.put(
-                            url=api_url,
-                            headers=self.auth_header,
-                            **post_params,
-                        ) as response:
-                            json_response = await response.json()
-                            _exit_if_response_error(
-                                response,
-                                expected_status=HTTPStatus.ACCEPTED,
-                                json_response=json_response,
-                            )
-
-                            if self.flow_id is not json_response['id']:
-                                # TODO: is this validation needed?
-                                pass
-
-                            logger.info(
-                                f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold] to get updated'
-                            )
-                            return json_response
-                except aiohttp.ClientConnectionError as e:
-                    if i == 0:
-                        logger.debug(
-                            f'PUT /flows/{self.flow_id} at 1st attempt failed, will retry in 2s...'
-                        )
-                        await asyncio.sleep(2)
-                    else:
-                        logger.debug(f'PUT /flows/{self.flow_id} retry failed too...')
-                        raise e
+            self._spec = None
+            json_response = await self._client.request(
+                'PUT',
+                FLOWS_API + "/" + self.flow_id,
+                expected_status=HTTPStatus.ACCEPTED,
+                kwargs_factory=self._get_post_params,
+            )
+
+            if self.flow_id is not json_response['id']:
+                # TODO: is this validation needed?
+                pass
+
+            logger.info(
+                f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold] to get updated'
+            )
+            return json_response
 
+        pbar, pb_task = _get_pbar()
         with pbar:
             desired_phase = Phase.Serving
             title = f'Updating {Path(self.path).resolve()}'
@@ -255,37 +249,16 @@ class CloudFlow:
             return
 
         async def _custom_action(api_url):
-            for i in range(2):
-                try:
-                    async with get_aiohttp_session() as session:
-                        post_params = dict()
-
-                        async with session.put(
-                            url=api_url,
-                            headers=self.auth_header,
-                            **post_params,
-                        ) as response:
-                            json_response = await response.json()
-                            _exit_if_response_error(
-                                response,
-                                expected_status=HTTPStatus.ACCEPTED,
-                                json_response=json_response,
-                            )
-
-                            logger.info(
-                                f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold]'
-                            )
-                            return json_response
-                except aiohttp.ClientConnectionError as e:
-                    if i == 0:
-                        logger.debug(
-                            f'PUT /flows/{self.flow_id} at 1st attempt failed, will retry in 2s...'
-                        )
-                        await asyncio.sleep(2)
-                    else:
-                        logger.debug(f'PUT /flows/{self.flow_id} retry failed too...')
-                        raise e
+            # actions aren't idempotent, a retried restart could restart twice
+            json_response = await self._client.request(
+                'PUT', api_url, expected_status=HTTPStatus.ACCEPTED, idempotent=False
+            )
+            logger.info(
+                f'Successfully submitted flow with ID [bold][blue]{self.flow_id}[/blue][/bold]'
+            )
+            return json_response
 
+        pbar, pb_task = _get_pbar()
         with pbar:
             desired_phase = Phase.Serving
             intermediate_phases = [
@@ -389,49 +362,85 @@ class CloudFlow:
 
     @property
     async def status(self) -> Dict:
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{FLOWS_API}/{self.flow_id}', headers=self.auth_header
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return await response.json()
+        return await self._client.request('GET', f'{FLOWS_API}/{self.flow_id}')
+
+    async def logs(
+        self,
+        executor_name: Optional[str] = None,
+        tail: Optional[int] = None,
+        since: Optional[float] = None,
+    ) -> Dict:
+        """Get the logs of the gateway or of an executor, per pod.
+
+        :param executor_name: the executor, None for the gateway
+        :param tail: ask for this number of lines from the end only
+        :param since: ask for the lines of the last `since` seconds only
+        :return: the logs per pod
+        """
+        from .logs import logs_params
 
-    async def logs(self, executor_name: Optional[str] = None) -> Dict:
         _base_url = f'{FLOWS_API}/{self.flow_id}'
         if executor_name:
             _url = f'{_base_url}/executors/{executor_name}'
         else:
             _url = f'{_base_url}/gateway'
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{_url}/logs', headers=self.auth_header
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return json_response['logs']
-
-    async def job_logs(self, job_name: str) -> str:
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{JOBS_API}/{self.flow_id}/{job_name}/logs',
-                headers=self.auth_header,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return json_response['logs']
+        json_response = await self._client.request(
+            'GET', f'{_url}/logs', params=logs_params(tail, since)
+        )
+        return json_response['logs']
+
+    async def iter_all_logs(
+        self, tail: Optional[int] = None, since: Optional[float] = None
+    ) -> AsyncIterator[Tuple[Optional[str], Dict]]:
+        """Fetch the logs of the gateway and of every executor concurrently, and yield
+        them as soon as they are fetched.
+
+        :param tail: ask for this number of lines from the end only
+        :param since: ask for the lines of the last `since` seconds only
+        :yield: the executor, None for the gateway, and its logs per pod
+        """
+        _spec = ((await self.status) or {}).get('spec') or {}
+        _executors = [e['name'] for e in _spec.get('executors', []) if 'name' in e]
+
+        async def _fetch(executor_name: Optional[str]):
+            return executor_name, await self.logs(executor_name, tail=tail, since=since)
+
+        _tasks = [asyncio.ensure_future(_fetch(name)) for name in [None, *_executors]]
+        try:
+            for _next_done in asyncio.as_completed(_tasks):
+                yield await _next_done
+        finally:
+            for _task in _tasks:
+                _task.cancel()
+
+    async def all_logs(
+        self, tail: Optional[int] = None, since: Optional[float] = None
+    ) -> Dict:
+        """Get the logs of the gateway and of every executor, fetched concurrently.
+
+        :param tail: ask for this number of lines from the end only
+        :param since: ask for the lines of the last `since` seconds only
+        :return: the logs per pod
+        """
+        _logs = {}
+        async for _, _pod_logs in self.iter_all_logs(tail, since):
+            _logs.update(_pod_logs or {})
+        return _logs
+
+    async def job_logs(
+        self,
+        job_name: str,
+        tail: Optional[int] = None,
+        since: Optional[float] = None,
+    ) -> str:
+        from .logs import logs_params
+
+        json_response = await self._client.request(
+            'GET',
+            f'{JOBS_API}/{self.flow_id}/{job_name}/logs',
+            params=logs_params(tail, since),
+        )
+        return json_response['logs']
 
     async def create_job(
         self,
@@ -451,19 +460,9 @@ class CloudFlow:
             'flowid': self.flow_id,
             'secrets': secrets,
         }
-        async with get_aiohttp_session() as session:
-            async with session.post(
-                url=JOBS_API,
-                headers=self.auth_header,
-                json=json_object,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.CREATED,
-                    json_response=json_response,
-                )
-                return json_response
+        return await self._client.request(
+            'POST', JOBS_API, expected_status=HTTPStatus.CREATED, json=json_object
+        )
 
     async def create_secret(
         self,
@@ -477,18 +476,9 @@ class CloudFlow:
             'data': env_secret_data,
         }
         logger.info(f'Creating Secret {secret_name} for flow {self.flow_id}')
-        async with get_aiohttp_session() as session:
-            async with session.post(
-                url=SECRETS_API,
-                headers=self.auth_header,
-                json=json_object,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.CREATED,
-                    json_response=json_response,
-                )
+        json_response = await self._client.request(
+            'POST', SECRETS_API, expected_status=HTTPStatus.CREATED, json=json_object
+        )
         logger.info(f'Secret {secret_name} created for flow {self.flow_id}')
         if update:
             if not self.path:
@@ -514,18 +504,12 @@ class CloudFlow:
             'data': secret_data,
         }
         logger.info(f'Updating Secret {secret_name} for flow {self.flow_id}')
-        async with get_aiohttp_session() as session:
-            async with session.post(
-                url=f'{SECRETS_API}/{self.flow_id}/{secret_name}',
-                headers=self.auth_header,
-                json=json_object,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.CREATED,
-                    json_response=json_response,
-                )
+        json_response = await self._client.request(
+            'POST',
+            f'{SECRETS_API}/{self.flow_id}/{secret_name}',
+            expected_status=HTTPStatus.CREATED,
+            json=json_object,
+        )
         logger.info(f'Secret {secret_name} Updated for flow {self.flow_id}')
         if update:
             if not self.path:
@@ -546,94 +530,94 @@ class CloudFlow:
 
     async def get_resource(self, resource: str, resource_name: str) -> Dict:
         url = get_resource_url(resource)
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{url}/{self.flow_id}/{resource_name}',
-                headers=self.auth_header,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                return json_response
+        return await self._client.request(
+            'GET', f'{url}/{self.flow_id}/{resource_name}'
+        )
 
     async def list_resources(self, resource: str) -> List:
         url = get_resource_url(resource)
-        async with get_aiohttp_session() as session:
-            async with session.get(
-                url=f'{url}/{self.flow_id}',
-                headers=self.auth_header,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
-                key = (
-                    f'{Resources.Job}s'
-                    if Resources.Job in resource
-                    else f'{Resources.Secret}s'
-                )
-                return json_response[key]
+        json_response = await self._client.request('GET', f'{url}/{self.flow_id}')
+        key = (
+            f'{Resources.Job}s' if Resources.Job in resource else f'{Resources.Secret}s'
+        )
+        return json_response[key]
 
     async def delete_resource(self, resource: str, resource_name: str):
         url = get_resource_url(resource)
-        async with get_aiohttp_session() as session:
-            async with session.delete(
-                url=f'{url}/{self.flow_id}/{resource_name}',
-                headers=self.auth_header,
-            ) as response:
-                json_response = await response.json()
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
+        await self._client.request('DELETE', f'{url}/{self.flow_id}/{resource_name}')
+
+    async def iter_pages(
+        self,
+        phase: Optional[str] = None,
+        name: Optional[str] = None,
+        labels: Dict[str, str] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """Iterate over the pages of the Flows of the user, as they are fetched.
+
+        :param phase: comma separated phases to list, `All` or None for all
+        :param name: the name of the Flows to list
+        :param labels: `&` separated `key=value` labels of the Flows to list
+        :yield: the Flows of every page
+        """
+        _params = {}
+        if phase is not None and phase != 'All':
+            _params.update({'phase': phase})
+        if name is not None:
+            _params.update({'name': name})
+        if labels is not None:
+            _params.update({'labels': labels})
+        async for _page in self._client.iter_pages(FLOWS_API, 'flows', params=_params):
+            yield _page
+
+    async def iter_all(
+        self,
+        phase: Optional[str] = None,
+        name: Optional[str] = None,
+        labels: Dict[str, str] = None,
+    ) -> AsyncIterator[Dict]:
+        """Iterate over the Flows of the user, as their pages are fetched.
+
+        :param phase: comma separated phases to list, `All` or None for all
+        :param name: the name of the Flows to list
+        :param labels: `&` separated `key=value` labels of the Flows to list
+        :yield: every Flow
+        """
+        async for _page in self.iter_pages(phase, name, labels):
+            for _resource in _page:
+                yield _resource
 
     async def list_all(
         self,
         phase: Optional[str] = None,
         name: Optional[str] = None,
         labels: Dict[str, str] = None,
+        quiet: bool = False,
     ) -> Dict:
-        async with get_aiohttp_session() as session:
-            _args = dict(url=FLOWS_API, headers=self.auth_header)
-            _args['params'] = {}
-
-            if phase is not None and phase != 'All':
-                _args['params'].update({'phase': phase})
-            if name is not None:
-                _args['params'].update({'name': name})
-            if labels is not None:
-                _args['params'].update({'labels': labels})
-            async with session.get(**_args) as response:
-                _results = await response.json()
-                if not _results:
-                    print(
-                        f'\nYou don\'t have any Flows deployed with status [green]{phase}[/green]. '
-                        f'Please pass a different [i]--status[/i] or use [i]jc deploy[/i] to deploy a new Flow'
-                    )
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=_results,
-                )
-                return _results
+        _results = {
+            'flows': [
+                _resource async for _resource in self.iter_all(phase, name, labels)
+            ]
+        }
+        if not _results['flows'] and not quiet:
+            print(
+                f'\nYou don\'t have any Flows deployed with status [green]{phase}[/green]. '
+                f'Please pass a different [i]--status[/i] or use [i]jc deploy[/i] to deploy a new Flow'
+            )
+        return _results
 
     async def _fetch_until(
         self,
         intermediate: List[Phase],
         desired: Phase = Phase.Serving,
     ) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
-        _wait_seconds = 0
+        pbar, pb_task = _get_pbar()
+        _poller = Poller(self.poll_policy)
         _last_phase = None
-        while _wait_seconds < 1800:
+        while not _poller.expired:
             _json_response = await self.status
             if _json_response is None or 'status' not in _json_response:
                 # intermittently no response is sent, retry then!
+                await _poller.wait(retry_after=self._client.retry_after)
                 continue
             _current_phase = get_phase_from_response(_json_response)
 
@@ -658,34 +642,30 @@ class CloudFlow:
                     description=_current_phase.value.title(),
                     advance=1,
                 )
-            else:
-                await asyncio.sleep(5)
-                _wait_seconds += 5
+            await _poller.wait(_current_phase, retry_after=self._client.retry_after)
 
         exit_error(
-            f'Couldn\'t reach status {desired} after waiting for 30mins. Exiting.'
+            f'Couldn\'t reach status {desired} after waiting for '
+            f'{_poller.policy.timeout / 60:g}mins. Exiting.'
         )
 
     async def _terminate(self):
-        async with get_aiohttp_session() as session:
-            async with session.delete(
-                url=f'{FLOWS_API}/{self.flow_id}',
-                headers=self.auth_header,
-            ) as response:
-                try:
-                    json_response = await response.json()
-                except json.decoder.JSONDecodeError:
-                    exit_error(
-                        f'Can\'t find [b]{self.flow_id}[/b], check the ID or the flow may be removed already.'
-                    )
+        response, json_response = await self._client.send(
+            'DELETE', f'{FLOWS_API}/{self.flow_id}'
+        )
+        if json_response is None:
+            exit_error(
+                f'Can\'t find [b]{self.flow_id}[/b], check the ID or the flow may be removed already.'
+            )
 
-                _exit_if_response_error(
-                    response,
-                    expected_status=HTTPStatus.OK,
-                    json_response=json_response,
-                )
+        _exit_if_response_error(
+            response,
+            expected_status=HTTPStatus.OK,
+            json_response=json_response,
+        )
 
     async def __aenter__(self):
+        pbar, pb_task = _get_pbar()
         with pbar:
             pbar.start_task(pb_task)
             pbar.update(
@@ -711,6 +691,7 @@ class CloudFlow:
         return self
 
     async def __aexit__(self, *args, **kwargs):
+        pbar, pb_task = _get_pbar()
         with pbar:
             pbar.start_task(pb_task)
             pbar.update(
@@ -726,6 +707,7 @@ class CloudFlow:
             )
             pbar.update(pb_task, description='Finishing', advance=1)
             await CloudFlow._cancel_pending()
+        await close_aiohttp_session()
 
     @staticmethod
     async def _cancel_pending():
@@ -735,10 +717,18 @@ class CloudFlow:
                 await task
 
     def __enter__(self):
-        return self._loop.run_until_complete(self.__aenter__())
+        # one loop and one shared session for the whole context, closed by `__exit__`
+        self._context_loop = self._loop
+        try:
+            return self._context_loop.run_until_complete(self.__aenter__())
+        except BaseException:
+            self._context_loop.run_until_complete(close_aiohttp_session())
+            raise
 
     def __exit__(self, *args, **kwargs):
-        self._loop.run_until_complete(self.__aexit__(*args, **kwargs))
+        self._context_loop.run_until_complete(
+            with_shared_session(self.__aexit__(*args, **kwargs))
+        )
 
     def __rich_console__(self, console, options):
         from rich import box
@@ -763,12 +753,15 @@ class CloudFlow:
         )
 
 
-async def _terminate_flow_simplified(flow_id: str, phase: Optional[str] = None):
+async def _terminate_flow_simplified(
+    flow_id: str, phase: Optional[str] = None, watcher=None
+):
     """Terminate a Flow given flow_id.
 
     This is a simplified version of CloudFlow.__aexit__, i.e.,
     without reporting the details of the termination process using the progress bar.
-    It's supposed to be used in the multi-flow removal context.
+    It's supposed to be used in the multi-flow removal context, where a shared
+    `watcher.StatusWatcher` batches the status polls of all the flows removed.
     """
 
     flow = CloudFlow(flow_id=flow_id)
@@ -776,10 +769,15 @@ async def _terminate_flow_simplified(flow_id: str, phase: Optional[str] = None):
     _intermediate_phases = [Phase.Serving]
     if phase is not None:
         _intermediate_phases.append(phase)
-    await flow._fetch_until(
-        intermediate=_intermediate_phases,
-        desired=Phase.Deleted,
-    )
+    if watcher is not None:
+        await watcher.wait_for(
+            flow_id, intermediate=_intermediate_phases, desired=Phase.Deleted
+        )
+    else:
+        await flow._fetch_until(
+            intermediate=_intermediate_phases,
+            desired=Phase.Deleted,
+        )
 
     # This needs to be returned so in asyncio.as_completed, it can be printed.
     return flow_id
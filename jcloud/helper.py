@@ -1,78 +1,154 @@
 import asyncio
+import copy
+import hashlib
 import json
 import logging
 import os
 import sys
 import threading
+import time
 import warnings
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
 from dotenv import dotenv_values
 
-from .constants import CONSTANTS
+from .env_helper import dump_yaml, expand_dict, load_yaml, referenced_env_vars
+
+from .constants import (
+    CONSTANTS,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    SPEC_CACHE_TTL,
+)
 
-import aiohttp
-import pkg_resources
 import yaml
 from dateutil import tz
-from hubble.executor.helper import is_valid_docker_uri, is_valid_sandbox_uri
-from packaging.version import Version
 from rich import print
 from rich.align import Align
 from rich.highlighter import ReprHighlighter
 from rich.table import Table
-from rich.panel import Panel
 
 from http import HTTPStatus
 
+if TYPE_CHECKING:
+    import aiohttp
+
 __windows__ = sys.platform == 'win32'
 
+SPEC_CACHE_SIZE = 32
+SPEC_CACHE_FILE = 'specs.json'
+VERSION_CACHE_FILE = 'versions.json'
+
+
+def _fetch_latest_version(package: str) -> str:
+    from urllib.request import Request, urlopen
+
+    from packaging.version import Version
 
-def _version_check(package: str = None, github_repo: str = None):
+    req = Request(
+        f'https://pypi.python.org/pypi/{package}/json',
+        headers={'User-Agent': 'Mozilla/5.0'},
+    )
+    with urlopen(
+        req, timeout=1
+    ) as resp:  # 'with' is important to close the resource after use
+        j = json.load(resp)
+        releases = j.get('releases', {})
+        return str(sorted(Version(v) for v in releases.keys() if '.dev' not in v)[-1])
+
+
+def _version_check(package: str, cache):
     try:
-        if not package:
-            package = vars(sys.modules[__name__])['__package__']
-        if not github_repo:
-            github_repo = package
-
-        cur_ver = Version(pkg_resources.get_distribution(package).version)
-        req = Request(
-            f'https://pypi.python.org/pypi/{package}/json',
-            headers={'User-Agent': 'Mozilla/5.0'},
-        )
-        with urlopen(
-            req, timeout=1
-        ) as resp:  # 'with' is important to close the resource after use
-            j = json.load(resp)
-            releases = j.get('releases', {})
-            latest_release_ver = list(
-                sorted(Version(v) for v in releases.keys() if '.dev' not in v)
-            )[-1]
-            if cur_ver < latest_release_ver:
-                print(
-                    Panel(
-                        f'You are using [b]{package} {cur_ver}[/b], but [bold green]{latest_release_ver}[/] is available. '
-                        f'You may upgrade it via [b]pip install -U {package}[/b]. [link=https://github.com/jina-ai/{github_repo}/releases]Read Changelog here[/link].',
-                        title=':new: New version available!',
-                        width=50,
-                    )
-                )
+        latest_release_ver = _fetch_latest_version(package)
     except Exception:
-        # no network, too slow, PyPi is down
-        pass
+        # no network, too slow, PyPi is down, don't retry before the TTL either
+        latest_release_ver = None
+    cache.set(package, {'latest': latest_release_ver})
 
 
 def is_latest_version(package: str = None, github_repo: str = None) -> None:
     """Check if there is a latest version from Pypi, set env `NO_VERSION_CHECK` to disable it.
 
+    The latest version is cached for `JCLOUD_VERSION_CHECK_TTL` seconds. Once expired,
+    it is fetched again in a daemon thread, the notice is then shown by the next
+    command. At exit, the command waits at most `JCLOUD_VERSION_CHECK_JOIN_TIMEOUT`
+    seconds for the check, a check that didn't complete is retried after
+    `JCLOUD_VERSION_CHECK_RETRY_TTL` seconds.
+
     :param package: package name if none auto-detected
     :param github_repo: repo name that contains CHANGELOG if none then the same as package name
     """
+    import atexit
+
+    from .cache import JSONCache
+    from .constants import (
+        VERSION_CHECK_JOIN_TIMEOUT,
+        VERSION_CHECK_RETRY_TTL,
+        VERSION_CHECK_TTL,
+    )
+
+    if not package:
+        package = vars(sys.modules[__name__])['__package__']
+    if not github_repo:
+        github_repo = package
+
+    cache = JSONCache(VERSION_CACHE_FILE)
+    cached = cache.get(package, max_age=VERSION_CHECK_TTL)
+    if (
+        cached is not None
+        and cached.get('pending')
+        and cache.get(package, max_age=VERSION_CHECK_RETRY_TTL) is None
+    ):
+        # the check was killed along with its command, retry it sooner
+        cached = None
+    if cached is None:
+        # this placeholder keeps the next commands from checking at the same time
+        stale = cache.get(package) or {}
+        cache.set(package, {'latest': stale.get('latest'), 'pending': True})
+        thread = threading.Thread(
+            target=_version_check, args=(package, cache), daemon=True
+        )
+        thread.start()
+        # give the check a moment to complete before a short command exits
+        atexit.register(thread.join, VERSION_CHECK_JOIN_TIMEOUT)
+        return
 
-    threading.Thread(target=_version_check, args=(package, github_repo)).start()
+    try:
+        from packaging.version import Version
+        from rich.console import Console
+        from rich.panel import Panel
+
+        cur_ver = Version(_installed_version(package))
+        latest_release_ver = cached.get('latest')
+        if latest_release_ver and cur_ver < Version(latest_release_ver):
+            # on stderr, not to mix up with the output of the command
+            Console(stderr=True).print(
+                Panel(
+                    f'You are using [b]{package} {cur_ver}[/b], but [bold green]{latest_release_ver}[/] is available. '
+                    f'You may upgrade it via [b]pip install -U {package}[/b]. [link=https://github.com/jina-ai/{github_repo}/releases]Read Changelog here[/link].',
+                    title=':new: New version available!',
+                    width=50,
+                )
+            )
+    except Exception:
+        # not installed, or a broken cache
+        pass
 
 
 def get_logger(name='jcloud'):
@@ -169,13 +245,23 @@ def is_valid_serverless_uri(uses):
         return False
 
 
-def normalized(path: Union[str, Path]):
+def normalized(path: Union[str, Path, Dict]):
+    """Check if all the executors of a Flow are already on Hubble or docker images.
+
+    :param path: the path to the Flow YAML, or the Flow already loaded
+    :return: whether the Flow is normalized
+    """
+    from hubble.executor.helper import is_valid_docker_uri, is_valid_sandbox_uri
+
     _normalized = True
 
-    if isinstance(path, str):
-        path = Path(path)
-    with open(path) as f:
-        _flow_dict = yaml.safe_load(f.read())
+    if isinstance(path, dict):
+        _flow_dict = path
+    else:
+        if isinstance(path, str):
+            path = Path(path)
+        with open(path) as f:
+            _flow_dict = yaml.safe_load(f.read())
 
     if 'executors' in _flow_dict:
         for executor in _flow_dict['executors']:
@@ -193,9 +279,17 @@ def normalized(path: Union[str, Path]):
     return _normalized
 
 
+class JCloudExit(SystemExit):
+    """Raised by :func:`exit_error`, keeping the message already shown to the user."""
+
+    def __init__(self, message: str):
+        super().__init__(1)
+        self.message = message
+
+
 def exit_error(text: str, color: Optional[str] = 'red'):
     print(f'[{color}]{text}[/{color}]')
-    exit(1)
+    raise JCloudExit(text)
 
 
 class CustomHighlighter(ReprHighlighter):
@@ -301,12 +395,78 @@ def get_dict_list_key_path(collection, keys):
     return col
 
 
-def get_aiohttp_session() -> aiohttp.ClientSession:
+_aiohttp_sessions: Dict[asyncio.AbstractEventLoop, 'aiohttp.ClientSession'] = {}
+
+
+def _new_aiohttp_session() -> 'aiohttp.ClientSession':
+    import aiohttp
+
     return aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=False, limit=5, force_close=True),
+        connector=aiohttp.TCPConnector(
+            ssl=False,
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        ),
     )
 
 
+@asynccontextmanager
+async def get_aiohttp_session() -> AsyncIterator['aiohttp.ClientSession']:
+    """Yield the keep-alive session shared by all API calls on the running event loop.
+
+    The session is created lazily and is *not* closed when the context exits, so
+    consecutive requests reuse warm connections. Call :func:`close_aiohttp_session`
+    (or run the coroutine through :func:`with_shared_session`) once done.
+    """
+    loop = asyncio.get_running_loop()
+    session = _aiohttp_sessions.get(loop)
+    if session is None or session.closed:
+        session = _new_aiohttp_session()
+        _aiohttp_sessions[loop] = session
+    yield session
+
+
+async def close_aiohttp_session():
+    """Close the shared session of the running event loop, if any."""
+    session = _aiohttp_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def with_shared_session(coro: Awaitable):
+    """Await `coro` and close the shared session afterwards.
+
+    :param coro: the coroutine to run, e.g. a CLI command or an SDK context step
+    :return: the result of `coro`
+    """
+    try:
+        return await coro
+    finally:
+        await close_aiohttp_session()
+
+
+def run_sync(coro: Awaitable) -> Any:
+    """Run `coro` to completion from synchronous code, on the shared session.
+
+    Synchronous helpers such as the normalizer may be called from within a running
+    event loop, e.g. while deploying, in which case `coro` runs on its own loop in a
+    worker thread.
+
+    :param coro: the coroutine to run
+    :return: the result of `coro`
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(with_shared_session(coro))
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=1) as tpe:
+        return tpe.submit(asyncio.run, with_shared_session(coro)).result()
+
+
 def load_envs(envfile: Union[str, Path]) -> Dict:
     if isinstance(envfile, str):
         envfile = Path(envfile)
@@ -367,20 +527,124 @@ def get_filename_envs(workspace: Path) -> Dict:
     return load_envs(workspace / CONSTANTS.DEFAULT_ENV_FILENAME)
 
 
-def load_flow_data(path: Union[str, Path], envs: Optional[Dict] = None) -> Dict:
-    from jina.jaml import JAML
+def get_flow_path(path: Union[str, Path]) -> Path:
+    """Get the path to the Flow YAML, given the file or its project directory."""
+    path = Path(path)
+    if path.is_dir():
+        path = path / CONSTANTS.DEFAULT_FLOW_FILENAME
+    return path
+
 
+def load_flow_data(path: Union[str, Path], envs: Optional[Dict] = None) -> Dict:
     if isinstance(path, str):
         path = Path(path)
 
     get_logger().debug(f'Loading Flow YAML {path.name} ...')
+    return _load_spec(path, envs, 'Flow', stringify_flow_labels)
+
+
+# parsed Flow and Deployment YAMLs, see `_load_spec`
+_spec_cache: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+_spec_cache_lock = threading.Lock()
+
+
+def _hash_json(value: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    with open(path) as f:
+        return hashlib.sha256(f.read().encode()).hexdigest()
+
+
+def _installed_version(package: str) -> Optional[str]:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # python 3.7
+        from importlib_metadata import PackageNotFoundError, version
+
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def _load_spec(
+    path: Path, envs: Optional[Dict], jtype: str, stringify_labels: Callable
+) -> Dict:
+    """Parse a Flow or Deployment YAML, going through the spec caches.
+
+    Parsed YAMLs are kept in an in-process LRU cache keyed by the path, mtime and
+    size of the file, the `.env` context and the environment variables the file
+    refers to. If `JCLOUD_SPEC_DISK_CACHE` is set, the parsed documents are also kept
+    on disk, keyed by the content of the file, so that repeated invocations skip
+    parsing. They are stored before substitution, so no value of the environment is
+    ever written to the disk.
+
+    :param path: the path to the YAML
+    :param envs: the context substituted in the YAML
+    :param jtype: the expected `jtype`, `Flow` or `Deployment`
+    :param stringify_labels: turns the labels of the parsed YAML into strings
+    :return: a copy of the parsed YAML, free to be modified by the caller
+    """
+    from .cache import JSONCache
+
+    stat = path.stat()
+    file_key = (jtype, str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    context = _hash_json(envs or {})
+    with _spec_cache_lock:
+        entry = _spec_cache.get(file_key)
+        if entry is not None:
+            _spec_cache.move_to_end(file_key)
+    if (
+        entry is not None
+        and entry['context'] == context
+        and all(os.environ.get(k) == v for k, v in entry['environ'].items())
+        and (not entry['racy'] or entry['digest'] == _hash_file(path))
+    ):
+        return copy.deepcopy(entry['data'])
+
+    cached_at = time.time()
     with open(path) as f:
-        flow_dict = JAML.load(f, substitute=True, context=envs)
-        if 'jtype' not in flow_dict or flow_dict['jtype'] != 'Flow':
-            raise ValueError(f'The file `{path}` is not a valid Flow YAML')
-        flow_dict = check_and_set_jcloud_versions(flow_dict)
-        flow_dict = stringify_flow_labels(flow_dict)
-        return flow_dict
+        content = f.read()
+    environ = {
+        name: os.environ.get(name)
+        for name in sorted(referenced_env_vars(content, envs))
+    }
+
+    data, disk_cache, disk_key = None, None, None
+    if 'JCLOUD_SPEC_DISK_CACHE' in os.environ:
+        disk_cache = JSONCache(SPEC_CACHE_FILE, max_age=SPEC_CACHE_TTL)
+        disk_key = hashlib.sha256(content.encode()).hexdigest()
+        data = disk_cache.get(disk_key, max_age=SPEC_CACHE_TTL)
+
+    if data is None:
+        data = load_yaml(content)
+        # only what survives JSON as is can be read back from the disk
+        if disk_cache is not None and json.loads(json.dumps(data, default=str)) == data:
+            disk_cache.set(disk_key, data)
+
+    data = expand_dict(data, envs)
+    if 'jtype' not in data or data['jtype'] != jtype:
+        raise ValueError(f'The file `{path}` is not a valid {jtype} YAML')
+    data = check_and_set_jcloud_versions(data)
+    data = stringify_labels(data)
+
+    with _spec_cache_lock:
+        _spec_cache[file_key] = {
+            'context': context,
+            'environ': environ,
+            'data': data,
+            'digest': hashlib.sha256(content.encode()).hexdigest(),
+            # the file may be written again within the resolution of its mtime, such
+            # entries are only trusted once their content is checked
+            'racy': cached_at - stat.st_mtime < 2,
+        }
+        while len(_spec_cache) > SPEC_CACHE_SIZE:
+            _spec_cache.popitem(last=False)
+    return copy.deepcopy(data)
 
 
 def update_flow_yml_and_write_to_file(
@@ -388,8 +652,6 @@ def update_flow_yml_and_write_to_file(
     secret_name: str,
     secret_data: Dict,
 ):
-    from jina.jaml import JAML
-
     validate_yaml_exists(flow_path)
     _flow_dict = load_flow_data(flow_path, get_filename_envs(flow_path.parent))
 
@@ -407,17 +669,15 @@ def update_flow_yml_and_write_to_file(
             _flow_dict['with']['env_from_secret'] = secret_yaml
         else:
             _flow_dict['with']['env_from_secret'].update(secret_yaml)
-    JAML.dump(_flow_dict, stream=open(flow_with_secret_path, 'w'))
+    dump_yaml(_flow_dict, stream=open(flow_with_secret_path, 'w'))
     return flow_with_secret_path
 
 
-def exit_if_flow_defines_secret(flow_path):
-    if isinstance(flow_path, str):
-        flow_path = Path(flow_path)
-    if flow_path.is_dir():
-        flow_path = flow_path / 'flow.yml'
-
-    flow_dict = load_flow_data(flow_path)
+def exit_if_flow_defines_secret(flow_path: Union[str, Path, Dict]):
+    if isinstance(flow_path, dict):
+        flow_dict = flow_path
+    else:
+        flow_dict = load_flow_data(get_flow_path(flow_path))
     env_from_secret = flow_dict.get('with', {}).get('env_from_secret', None)
     if env_from_secret:
         exit_error(
@@ -465,22 +725,24 @@ def stringify_flow_labels(flow_dict: Dict) -> Dict:
 
 
 def check_and_set_jcloud_versions(res_dict: Dict) -> Dict:
-    import docarray
-    import jina
-
-    global_jcloud = res_dict.get('jcloud', None)
-    if not global_jcloud:
-        res_dict['jcloud'] = {
-            'docarray': docarray.__version__,
-            'version': jina.__version__,
-        }
-        return res_dict
-    docarray_version = global_jcloud.get('docarray', None)
-    if not docarray_version:
-        res_dict['jcloud'].update({'docarray': docarray.__version__})
-    jina_version = global_jcloud.get('version', None)
-    if not jina_version:
-        res_dict['jcloud'].update({'version': jina.__version__})
+    # read from the package metadata, importing jina and docarray takes seconds
+    versions = {
+        'docarray': _installed_version('docarray'),
+        'version': _installed_version('jina'),
+    }
+    res_dict['jcloud'] = res_dict.get('jcloud', None) or {}
+    for key, version in versions.items():
+        if res_dict['jcloud'].get(key, None):
+            continue
+        if version is None:
+            package = 'jina' if key == 'version' else key
+            get_logger().warning(
+                f'Could not determine the version of {package}, as it is not '
+                f'installed. `jcloud.{key}` is left unset, set it in the YAML or '
+                f'install {package} with `pip install {package}`'
+            )
+            continue
+        res_dict['jcloud'][key] = version
     return res_dict
 
 
@@ -494,19 +756,11 @@ def stringify_deployment_labels(deployment_dict: Dict) -> Dict:
 
 
 def load_deployment_data(path: Union[str, Path], envs: Optional[Dict] = None) -> Dict:
-    from jina.jaml import JAML
-
     if isinstance(path, str):
         path = Path(path)
 
     get_logger().debug(f'Loading Deployment YAML {path.name} ...')
-    with open(path) as f:
-        deployment_dict = JAML.load(f, substitute=True, context=envs)
-        if 'jtype' not in deployment_dict or deployment_dict['jtype'] != 'Deployment':
-            raise ValueError(f'The file `{path}` is not a valid Deployment YAML')
-        deployment_dict = check_and_set_jcloud_versions(deployment_dict)
-        deployment_dict = stringify_deployment_labels(deployment_dict)
-        return deployment_dict
+    return _load_spec(path, envs, 'Deployment', stringify_deployment_labels)
 
 
 def update_deployment_yml_and_write_to_file(
@@ -514,8 +768,6 @@ def update_deployment_yml_and_write_to_file(
     secret_name: str,
     secret_data: Dict,
 ):
-    from jina.jaml import JAML
-
     validate_yaml_exists(deployment_path)
     _deployment_dict = load_deployment_data(
         deployment_path, get_filename_envs(deployment_path.parent)
@@ -537,12 +789,12 @@ def update_deployment_yml_and_write_to_file(
             _deployment_dict['with']['env_from_secret'] = secret_yaml
         else:
             _deployment_dict['with']['env_from_secret'].update(secret_yaml)
-    JAML.dump(_deployment_dict, stream=open(deployment_with_secret_path, 'w'))
+    dump_yaml(_deployment_dict, stream=open(deployment_with_secret_path, 'w'))
     return deployment_with_secret_path
 
 
 def _exit_if_response_error(
-    response: aiohttp.ClientResponse, expected_status, json_response
+    response: 'aiohttp.ClientResponse', expected_status, json_response
 ):
     if response.status != expected_status:
         if response.status == HTTPStatus.UNAUTHORIZED:
@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .constants import CACHE_DIR
+
+INVENTORY_FILE = 'inventory.db'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS resources (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT,
+    phase TEXT,
+    endpoints TEXT,
+    cph TEXT,
+    ctime TEXT,
+    utime TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS resources_phase ON resources (kind, phase);
+CREATE INDEX IF NOT EXISTS resources_name ON resources (kind, name);
+CREATE INDEX IF NOT EXISTS resources_ctime ON resources (kind, ctime);
+CREATE TABLE IF NOT EXISTS labels (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (kind, id, key)
+);
+CREATE INDEX IF NOT EXISTS labels_key_value ON labels (kind, key, value);
+CREATE TABLE IF NOT EXISTS syncs (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+'''
+
+
+def _labels_of(resource: Dict) -> Dict[str, str]:
+    return (resource.get('spec') or {}).get('jcloud', {}).get('labels') or {}
+
+
+def parse_labels(labels: Optional[str]) -> Dict[str, str]:
+    """Parse labels passed as a comma separated list of `key=value`.
+
+    :param labels: the labels, as passed to `--labels`
+    :return: the labels as a dict
+    """
+    if not labels:
+        return {}
+    return dict(
+        label.split('=', 1) if '=' in label else (label, '')
+        for label in labels.split(',')
+        if label
+    )
+
+
+class Inventory:
+    """A local index of the Flows and Deployments of the user, kept in SQLite.
+
+    Records are indexed on phase, name, labels and creation time, so listing and
+    filtering doesn't need the API. A refresh only rewrites the records whose
+    `utime` changed, and drops the ones not returned by the API anymore.
+
+    :param path: the database file, defaults to `inventory.db` in the cache directory
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path or Path(CACHE_DIR) / INVENTORY_FILE)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def synced_at(self, kind: str) -> Optional[float]:
+        """When the records of `kind` were last refreshed.
+
+        :param kind: `flow` or `deployment`
+        :return: the POSIX timestamp of the last refresh, None if never refreshed
+        """
+        row = self._db.execute(
+            'SELECT synced_at FROM syncs WHERE kind = ?', (kind,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def is_stale(self, kind: str, max_age: float) -> bool:
+        synced_at = self.synced_at(kind)
+        return synced_at is None or time.time() - synced_at > max_age
+
+    def refresh(self, kind: str, resources: Iterable[Dict]) -> int:
+        """Store all the resources of `kind`, as returned by the API.
+
+        :param kind: `flow` or `deployment`
+        :param resources: every resource of `kind`, whatever its phase
+        :return: the number of records added, updated or removed
+        """
+        from .helper import (
+            get_cph_from_response,
+            get_phase_from_response,
+            get_str_endpoints_from_response,
+        )
+
+        stored = dict(
+            self._db.execute('SELECT id, utime FROM resources WHERE kind = ?', (kind,))
+        )
+        changed = 0
+        with self._db:
+            for resource in resources:
+                _id = resource['id']
+                utime = resource.get('utime')
+                if _id in stored and stored.pop(_id) == utime and utime is not None:
+                    continue
+                self._db.execute(
+                    'INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        kind,
+                        _id,
+                        resource.get('name'),
+                        get_phase_from_response(resource),
+                        get_str_endpoints_from_response(resource),
+                        get_cph_from_response(resource),
+                        resource.get('ctime'),
+                        utime,
+                        json.dumps(resource, default=str),
+                    ),
+                )
+                self._db.execute(
+                    'DELETE FROM labels WHERE kind = ? AND id = ?', (kind, _id)
+                )
+                self._db.executemany(
+                    'INSERT INTO labels VALUES (?, ?, ?, ?)',
+                    [(kind, _id, k, str(v)) for k, v in _labels_of(resource).items()],
+                )
+                changed += 1
+            for _id in stored:
+                self._db.execute(
+                    'DELETE FROM resources WHERE kind = ? AND id = ?', (kind, _id)
+                )
+                self._db.execute(
+                    'DELETE FROM labels WHERE kind = ? AND id = ?', (kind, _id)
+                )
+            self._db.execute(
+                'INSERT OR REPLACE INTO syncs VALUES (?, ?)', (kind, time.time())
+            )
+        return changed + len(stored)
+
+    def query(
+        self,
+        kind: str,
+        phases: Optional[List[str]] = None,
+        name: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> List[Dict]:
+        """Get the stored resources of `kind` matching all the filters, oldest first.
+
+        :param kind: `flow` or `deployment`
+        :param phases: the phases to keep, None for all
+        :param name: the name to match
+        :param labels: labels the resources must all have
+        :return: the resources, as returned by the API
+        """
+        sql = 'SELECT data FROM resources WHERE kind = ?'
+        params = [kind]
+        if phases:
+            sql += f' AND phase IN ({", ".join("?" * len(phases))})'
+            params.extend(phases)
+        if name:
+            sql += ' AND name = ?'
+            params.append(name)
+        for key, value in (labels or {}).items():
+            sql += (
+                ' AND id IN (SELECT id FROM labels'
+                ' WHERE kind = ? AND key = ? AND value = ?)'
+            )
+            params.extend([kind, key, value])
+        sql += ' ORDER BY ctime'
+        return [json.loads(data) for data, in self._db.execute(sql, params)]
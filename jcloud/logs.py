@@ -0,0 +1,392 @@
+import asyncio
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Pattern,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from .constants import CACHE_DIR, LOGS_FOLLOW_INTERVAL
+
+# lines of the previous fetch matched against the next one, enough to tell repeated
+# lines apart
+FOLLOW_OVERLAP = 20
+# extra seconds of logs fetched on sync, so that the stored ones overlap the new ones
+SYNC_MARGIN = 60
+
+
+# e.g. '2023-04-18T10:00:00.123456Z ...', as prefixed by kubernetes
+_iso_timestamp_regex = re.compile(
+    r'^\[?(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)'
+)
+# e.g. '... [04/18/23 10:00:00]', as logged by jina, in the time of the pod, UTC
+_jina_timestamp_regex = re.compile(r'\[(\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2})\]')
+
+
+def line_timestamp(line: str) -> Optional[float]:
+    """Get the time a log line was written at, from its timestamp if it has one.
+
+    :param line: the log line
+    :return: the POSIX timestamp of the line, None if it has none
+    """
+    try:
+        match = _iso_timestamp_regex.match(line)
+        if match:
+            from dateutil.parser import isoparse
+
+            return isoparse(match.group(1).replace(',', '.')).timestamp()
+        match = _jina_timestamp_regex.search(line)
+        if match:
+            return (
+                datetime.strptime(match.group(1), '%m/%d/%y %H:%M:%S')
+                .replace(tzinfo=timezone.utc)
+                .timestamp()
+            )
+    except ValueError:
+        pass
+    return None
+
+
+def limit_lines(
+    logs: str, tail: Optional[int] = None, since: Optional[float] = None
+) -> List[str]:
+    """Split logs into lines, keeping only the latest ones.
+
+    :param logs: the logs of a pod
+    :param tail: number of lines to keep from the end, None to keep them all
+    :param since: keep only the lines of the last `since` seconds. Lines without a
+        timestamp, e.g. of a traceback, go with the previous line, and are kept if
+        no line before them has one.
+    :return: the lines kept
+    """
+    if tail is not None:
+        # only split the end of the logs
+        logs = logs.rstrip('\n')
+        lines = logs.rsplit('\n', tail)[-tail:] if logs and tail > 0 else []
+    else:
+        lines = logs.splitlines()
+    if since is not None:
+        cutoff, keep = time.time() - since, True
+        kept = []
+        for line in lines:
+            timestamp = line_timestamp(line)
+            if timestamp is not None:
+                keep = timestamp >= cutoff
+            if keep:
+                kept.append(line)
+        lines = kept
+    return lines
+
+
+def logs_params(
+    tail: Optional[int] = None, since: Optional[float] = None
+) -> Dict[str, str]:
+    """Query parameters asking the API for the latest logs only. The API may ignore
+    them, :func:`limit_lines` has to be applied to the logs returned anyway.
+
+    :param tail: number of lines to return from the end
+    :param since: return only the lines of the last `since` seconds
+    :return: the query parameters
+    """
+    params = {}
+    if tail is not None:
+        params['tailLines'] = str(tail)
+    if since is not None:
+        params['sinceSeconds'] = str(math.ceil(since))
+    return params
+
+
+def merge_lines(logs: Dict[str, Iterable[str]]) -> Iterator[Tuple[str, str]]:
+    """Interleave the lines of several pods in time order, with a k-way merge on
+    their timestamps. Lines without a timestamp stay right after the previous line
+    of their pod.
+
+    :param logs: the lines per pod, each in time order
+    :return: the pod and the line, for every line
+    """
+
+    def _timed(pod: str, lines: Iterable[str]):
+        last = float('-inf')
+        for line in lines:
+            timestamp = line_timestamp(line)
+            if timestamp is not None and timestamp > last:
+                last = timestamp
+            yield last, pod, line
+
+    for _, pod, line in heapq.merge(
+        *(_timed(pod, lines) for pod, lines in logs.items()), key=lambda x: x[0]
+    ):
+        yield pod, line
+
+
+def _overlap_end(tail: List[str], lines: List[str]) -> int:
+    """Index of `lines` right after the last occurrence of `tail`, 0 if not found.
+
+    The beginning of `tail` may be missing from `lines`, when the server only keeps
+    the latest lines of a pod.
+    """
+    for end in range(len(lines), 0, -1):
+        if lines[end - 1] != tail[-1]:
+            continue
+        size = min(len(tail), end)
+        if lines[end - size : end] == tail[len(tail) - size :]:
+            return end
+    return 0
+
+
+class LogFollower:
+    """Keeps track of the lines already shown per pod, so that refetching the logs
+    of a pod only yields the lines added since the previous fetch.
+
+    :param overlap: number of trailing lines of a pod kept to find where new lines
+        start
+    :param tail: number of lines yielded by the first fetch of a pod, None for all
+    :param since: the first fetch of a pod only yields the lines of the last `since`
+        seconds
+    """
+
+    def __init__(
+        self,
+        overlap: int = FOLLOW_OVERLAP,
+        tail: Optional[int] = None,
+        since: Optional[float] = None,
+    ):
+        self.overlap = overlap
+        self.tail = tail
+        self.since = since
+        self._tails: Dict[str, List[str]] = {}
+
+    def new_lines(self, pod: str, logs: str) -> List[str]:
+        """Get the lines of `logs` not returned yet for `pod`.
+
+        :param pod: the name of the pod
+        :param logs: the logs of the pod, as returned by the API
+        :return: the new lines
+        """
+        tail = self._tails.get(pod)
+        if tail is None:
+            new = limit_lines(logs, self.tail, self.since)
+        else:
+            lines = logs.splitlines()
+            new = lines[_overlap_end(tail, lines) :]
+        # kept from all the lines, the first fetch may yield none of them
+        last_lines = limit_lines(logs, self.overlap)
+        if last_lines:
+            self._tails[pod] = last_lines
+        return new
+
+
+def write_pod_lines(
+    pod_lines: Iterable[Tuple[str, str]], stream: Optional[TextIO] = None
+):
+    """Write log lines as plain text, each prefixed by its pod.
+
+    :param pod_lines: the pod and the line, for every line
+    :param stream: the output stream, defaults to stdout
+    """
+    stream = stream or sys.stdout
+    stream.writelines(f'{pod} | {line}\n' for pod, line in pod_lines)
+    stream.flush()
+
+
+def write_lines(pod: str, lines: List[str], stream: Optional[TextIO] = None):
+    """Write log lines of a pod as plain text, prefixed by the pod."""
+    write_pod_lines(((pod, line) for line in lines), stream)
+
+
+async def follow_logs(
+    fetch: Callable[[], Awaitable[Dict[str, str]]],
+    on_lines: Callable[[str, List[str]], None] = write_lines,
+    interval: float = LOGS_FOLLOW_INTERVAL,
+    follower: Optional[LogFollower] = None,
+    merge: bool = False,
+):
+    """Fetch logs every `interval` seconds and pass on the new lines of every pod,
+    until cancelled.
+
+    :param fetch: coroutine function returning the logs per pod
+    :param on_lines: called with the pod and its new lines, after every fetch
+    :param interval: seconds between two fetches
+    :param follower: keeps track of the lines already passed on
+    :param merge: pass on the new lines of all the pods one by one, in time order
+    """
+    follower = follower or LogFollower()
+    while True:
+        new = {}
+        for pod, logs in ((await fetch()) or {}).items():
+            lines = follower.new_lines(pod, logs or '')
+            if lines:
+                new[pod] = lines
+        if merge:
+            for pod, line in merge_lines(new):
+                on_lines(pod, [line])
+        else:
+            for pod, lines in new.items():
+                on_lines(pod, lines)
+        await asyncio.sleep(interval)
+
+
+class LogStore:
+    """A local store of the logs of a Flow or a Deployment, to sync them
+    incrementally and search them without downloading them again.
+
+    Every pod has a gzip file, every sync appends its new lines to it as a new gzip
+    member, so stored data is never rewritten. An index keeps the last lines of
+    every pod, to find where new lines start, and when every scope, e.g. the
+    gateway or an executor, was last synced.
+
+    :param resource_id: the ID of the Flow or Deployment
+    :param root: the directory of the stores, defaults to `logs` in the cache
+        directory
+    """
+
+    def __init__(self, resource_id: str, root: Optional[Union[str, Path]] = None):
+        from .cache import JSONCache
+
+        self.path = Path(root or Path(CACHE_DIR) / 'logs') / resource_id
+        self._index = JSONCache('index.json', cache_dir=self.path)
+
+    def _pod_path(self, pod: str) -> Path:
+        return self.path / f'{pod}.log.gz'
+
+    def fetch_since(self, scope: str) -> Optional[float]:
+        """Seconds of logs to fetch to catch up with the logs of `scope`.
+
+        :param scope: what is synced, e.g. `gateway` or `executor/<name>`
+        :return: the seconds since the last sync, with a margin, None if never synced
+        """
+        synced = self._index.get(f'scope:{scope}')
+        if synced is None:
+            return None
+        return max(0.0, time.time() - synced['synced_at']) + SYNC_MARGIN
+
+    def sync(self, scope: str, logs: Dict[str, str], fetched_at: float) -> List[str]:
+        """Append the lines of `logs` not stored yet.
+
+        :param scope: what `logs` are of, e.g. `gateway` or `executor/<name>`
+        :param logs: the logs per pod, as returned by the API
+        :param fetched_at: when `logs` were requested
+        :return: all the pods of `scope` stored so far
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        for pod, pod_logs in logs.items():
+            lines = (pod_logs or '').splitlines()
+            stored = self._index.get(f'pod:{pod}')
+            if stored:
+                lines = lines[_overlap_end(stored['tail'], lines) :]
+            if not lines:
+                continue
+            with gzip.open(self._pod_path(pod), 'at') as f:
+                f.writelines(f'{line}\n' for line in lines)
+            tail = (stored['tail'] if stored else []) + lines[-FOLLOW_OVERLAP:]
+            self._index.set(f'pod:{pod}', {'tail': tail[-FOLLOW_OVERLAP:]})
+
+        synced = self._index.get(f'scope:{scope}') or {}
+        pods = sorted(set(synced.get('pods', [])) | set(logs))
+        self._index.set(f'scope:{scope}', {'synced_at': fetched_at, 'pods': pods})
+        return pods
+
+    def read(self, pod: str) -> Iterator[str]:
+        """Stream the stored lines of `pod`, without loading them in memory."""
+        path = self._pod_path(pod)
+        if not path.exists():
+            return
+        with gzip.open(path, 'rt') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    def grep(
+        self, pattern: Union[str, Pattern], pods: Iterable[str]
+    ) -> Iterator[Tuple[str, str]]:
+        """Search the stored lines of `pods`.
+
+        :param pattern: the regular expression searched in every line
+        :param pods: the pods searched
+        :return: the pod and the line, for every matching line, in time order
+        """
+        regex = re.compile(pattern)
+        return merge_lines(
+            {
+                pod: (line for line in self.read(pod) if regex.search(line))
+                for pod in pods
+            }
+        )
+
+
+def _log_record(executor: Optional[str], pod: str, line: str) -> Dict[str, Any]:
+    timestamp = line_timestamp(line)
+    return {
+        'pod': pod,
+        'executor': executor or 'gateway',
+        'line': line,
+        'timestamp': None
+        if timestamp is None
+        else datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+    }
+
+
+async def export_logs(
+    fetched: AsyncIterable[Tuple[Optional[str], Dict[str, str]]],
+    path: Union[str, Path],
+    tail: Optional[int] = None,
+    since: Optional[float] = None,
+) -> Dict[str, float]:
+    """Write logs to a gzip compressed JSON lines file, one record per line with the
+    pod, the executor, the line and its timestamp.
+
+    The logs of every executor are written as soon as they are fetched, and
+    compressed on the fly, so that only the logs being written are held in memory.
+
+    :param fetched: the executor, None for the gateway, and its logs per pod, e.g.
+        from :meth:`CloudFlow.iter_all_logs`
+    :param path: the file written
+    :param tail: write only this number of lines from the end of every pod
+    :param since: write only the lines of the last `since` seconds
+    :return: the number of `lines` and of `pods` written, the `bytes` written and
+        the `raw_bytes` compressed, and the `seconds` it took
+    """
+    start = time.perf_counter()
+    lines, pods, raw_bytes = 0, 0, 0
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        async for executor, pod_logs in fetched:
+            for pod, logs in (pod_logs or {}).items():
+                pods += 1
+                for line in limit_lines(logs or '', tail, since):
+                    record = json.dumps(_log_record(executor, pod, line)) + '\n'
+                    f.write(record)
+                    lines += 1
+                    raw_bytes += len(record.encode())
+    return {
+        'lines': lines,
+        'pods': pods,
+        'bytes': os.path.getsize(path),
+        'raw_bytes': raw_bytes,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def human_size(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024
+    return f'{size:.1f}{unit}' if unit != 'B' else f'{int(size)}B'
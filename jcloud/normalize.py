@@ -1,24 +1,28 @@
+import copy
 import os
 import tempfile
+import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from http import HTTPStatus
 from pathlib import Path
 from textwrap import dedent
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from hubble.executor.helper import parse_hub_uri
 
-import requests
-
-from .constants import CONSTANTS
+from .cache import JSONCache, build_cache_disabled, executor_digest
+from .constants import CONSTANTS, PUSH_CONCURRENCY
+from .env_helper import dump_yaml, load_yaml
 from .helper import (
+    _installed_version,
     get_logger,
     get_filename_envs,
+    get_pbar,
     load_flow_data,
 )
 
 GPU_DOCKERFILE = 'Dockerfile.gpu'
+BUILD_CACHE_FILE = 'builds.json'
 
 logger = get_logger()
 
@@ -64,22 +68,13 @@ def generate_manifest(executor: 'ExecutorData', id: str):
     )
 
 
-def hubble_exists(executor: 'ExecutorData', secret: Optional[str] = None) -> bool:
-    return (
-        requests.get(
-            url='https://api.hubble.jina.ai/v2/executor/getMeta',
-            params={'id': executor.name, 'secret': secret},
-        ).status_code
-        == HTTPStatus.OK
-    )
-
-
 def hubble_push(
     executor: 'ExecutorData',
     id: Optional[str] = None,
     tag: Optional[str] = 'latest',
     secret: Optional[str] = None,
     verbose: Optional[bool] = False,
+    exists: bool = False,
 ):
     from hubble.executor.hubio import HubIO
     from hubble.executor.parsers import set_hub_push_parser
@@ -109,7 +104,7 @@ def hubble_push(
     with open(manifest_file, 'w') as f:
         f.write(content)
 
-    if hubble_exists(executor, secret):
+    if exists:
         args.force_update = executor.name
 
     executor_id = HubIO(args).push().get('id')
@@ -117,15 +112,23 @@ def hubble_push(
     return executor
 
 
+def _jina_image() -> str:
+    # executors without `uses` run on the image of the installed jina
+    jina_version = _installed_version('jina')
+    if jina_version is None:
+        raise ModuleNotFoundError(
+            'jina is needed to normalize executors without `uses`, '
+            'please install it with `pip install jina`'
+        )
+    return f'jinaai/jina:{jina_version}-py38-standard'
+
+
 def inspect_executors(
     flow_dict: Dict,
     workspace: Path,
     tag: Optional[str] = None,
     secret: Optional[str] = None,
 ) -> List[ExecutorData]:
-    from jina import __version__
-    from jina.jaml import JAML
-
     executors = []
     for i, executor in enumerate(flow_dict['executors']):
         executor_name = executor.get('name', f'executor{i}')
@@ -152,14 +155,14 @@ def inspect_executors(
         except KeyError:
             data = ExecutorData(
                 name=executor_name,
-                hubble_url=f'jinaai/jina:{__version__}-py38-standard',
+                hubble_url=_jina_image(),
             )
         except ValueError:
             if isinstance(uses, str) and uses.endswith(('.yml', '.yaml')):
                 uses_path = workspace / uses
 
                 with open(uses_path) as f:
-                    yaml_dict = JAML.load(f, substitute=True, context={})
+                    yaml_dict = load_yaml(f, substitute=True, context={})
 
                 cls_name = yaml_dict.get('jtype', '')
                 src_dir = uses_path.parent
@@ -196,28 +199,101 @@ def push_executors_to_hubble(
     tag: Optional[str] = 'latest',
     secret: Optional[str] = '',
     verbose: Optional[bool] = False,
+    concurrency: int = PUSH_CONCURRENCY,
 ):
-    _executors_to_push = []
+    """Push the local executors to Hubble, `concurrency` of them at a time.
+
+    :param executors: the executors of the Flow, the ones already on Hubble are skipped
+    :param tag: the tag the executors are pushed with
+    :param secret: the secret the executors are pushed with
+    :param verbose: whether the push logs are verbose
+    :param concurrency: the maximum number of pushes in flight
+    """
+    use_cache = not build_cache_disabled()
+    build_cache = JSONCache(BUILD_CACHE_FILE)
+    _executors_to_push, _digests = [], {}
     for executor in executors:
         if executor.hubble_url:
             logger.debug(f'Skipping {executor.name} with {executor.hubble_url} ...')
             continue
+        if use_cache:
+            digest = executor_digest(executor.src_dir, executor.yaml_dict, tag, secret)
+            cached = build_cache.get(digest)
+            if cached is not None:
+                logger.info(
+                    f'Skipping unchanged {executor.src_dir}, already pushed as {cached["name"]}'
+                )
+                executor.name, executor.id = cached['name'], cached['id']
+                continue
+            _digests[id(executor)] = digest
         _executors_to_push.append(executor)
-    id = uuid.uuid4().hex[:10]
-    with ThreadPoolExecutor() as tpe:
-        for _e_list in [
-            _executors_to_push[pos : pos + 3]
-            for pos in range(0, len(_executors_to_push), 3)
-        ]:
+    if not _executors_to_push:
+        return
+
+    # a new suffix per push, the pushed names never exist on Hubble yet, so they
+    # aren't looked up
+    suffix = uuid.uuid4().hex[:10]
+    pbar, pb_task = _get_push_pbar(len(_executors_to_push))
+    logger.info(
+        f'Pushing {len(_executors_to_push)} Executor(s) to hubble, '
+        f'{concurrency} at a time...'
+    )
+    # a single queue keeps `concurrency` pushes in flight, a slow build doesn't
+    # hold back the idle workers
+    tpe = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    _futures = [
+        tpe.submit(
+            _timed_push,
+            _e,
+            suffix,
+            tag,
+            secret,
+            verbose,
+            False,
+        )
+        for _e in _executors_to_push
+    ]
+    try:
+        for done, _fut in enumerate(as_completed(_futures), start=1):
+            _e, elapsed = _fut.result()
             logger.info(
-                'Pushing following Executors to hubble '
-                f'{", ".join(map(lambda _e: str(_e.src_dir), _e_list))}...'
+                f'Pushed {_e.src_dir} as {_e.name} in {elapsed:.1f}s '
+                f'({done}/{len(_futures)})'
+            )
+            pbar.update(
+                pb_task,
+                advance=1,
+                description=f'Pushed {_e.name} in {elapsed:.1f}s',
             )
-            _futures = [
-                tpe.submit(hubble_push, _e, id, tag, secret, verbose) for _e in _e_list
-            ]
-            for _fut in as_completed(_futures):
-                _ = _fut.result()
+            if use_cache and _e.id is not None:
+                build_cache.set(_digests[id(_e)], {'name': _e.name, 'id': _e.id})
+    finally:
+        for _fut in _futures:
+            _fut.cancel()
+        tpe.shutdown()
+        pbar.stop()
+
+
+def _timed_push(executor: 'ExecutorData', *args) -> Tuple['ExecutorData', float]:
+    start = time.perf_counter()
+    executor = hubble_push(executor, *args)
+    return executor, time.perf_counter() - start
+
+
+def _get_push_pbar(total: int):
+    from rich.errors import LiveError
+
+    pbar, pb_task = get_pbar(
+        '', total=total, disable='JCLOUD_NO_PROGRESSBAR' in os.environ
+    )
+    try:
+        pbar.start()
+    except LiveError:
+        # another progress bar is shown, e.g. while deploying, the log lines suffice
+        pbar, pb_task = get_pbar('', total=total, disable=True)
+    pbar.start_task(pb_task)
+    pbar.update(pb_task, title='Pushing Executors', description='Starting')
+    return pbar, pb_task
 
 
 def update_flow_data(
@@ -245,9 +321,9 @@ def flow_normalize(
     secret: Optional[str] = '',
     verbose: Optional[bool] = False,
     output_path: Optional[Path] = None,
+    push_concurrency: int = PUSH_CONCURRENCY,
+    flow_dict: Optional[Dict] = None,
 ) -> str:
-    from jina.jaml import JAML
-
     if isinstance(path, str):
         path = Path(path)
 
@@ -257,13 +333,17 @@ def flow_normalize(
         flow_file = path.name
         path = path.parent
 
-    envs = get_filename_envs(path)
-    flow_dict = load_flow_data(
-        path / flow_file
-        if flow_file_in_path
-        else path / CONSTANTS.DEFAULT_FLOW_FILENAME,
-        envs=envs,
-    )
+    if flow_dict is None:
+        envs = get_filename_envs(path)
+        flow_dict = load_flow_data(
+            path / flow_file
+            if flow_file_in_path
+            else path / CONSTANTS.DEFAULT_FLOW_FILENAME,
+            envs=envs,
+        )
+    else:
+        # the executors are updated in place while normalizing
+        flow_dict = copy.deepcopy(flow_dict)
 
     if not 'executors' in flow_dict:
         logger.warning('`executors` not found in Flow yaml. Nothing to normalize...')
@@ -276,7 +356,7 @@ def flow_normalize(
         secret=secret,
     )
 
-    push_executors_to_hubble(executors, tag, secret, verbose)
+    push_executors_to_hubble(executors, tag, secret, verbose, push_concurrency)
 
     normed_flow = update_flow_data(flow_dict.copy(), executors)
     normed_flow_path = CONSTANTS.NORMED_FLOWS_DIR / path.name
@@ -307,7 +387,7 @@ def flow_normalize(
             delete=False,
         )
     with cm as f:
-        JAML.dump(normed_flow, stream=f)
+        dump_yaml(normed_flow, stream=f)
 
     logger.info(f'Flow is normalized: \n\n{normed_flow}')
     logger.info(f'Flow written to: {f.name}')
@@ -0,0 +1,84 @@
+import json
+import sys
+from typing import Any, Dict, Iterable, Optional, TextIO, Union
+
+OUTPUT_FORMATS = ('json', 'yaml', 'ndjson')
+
+
+def _dump_json(data: Any, stream: TextIO, indent: Optional[int] = None):
+    json.dump(data, stream, indent=indent, default=str)
+
+
+class OutputWriter:
+    """Write a list of API objects item by item, as they are fetched.
+
+    A JSON list stays a single valid JSON document, a YAML list a single YAML
+    sequence, and NDJSON has one object per line.
+
+    :param output: one of `json`, `yaml` or `ndjson`
+    :param stream: the output stream, defaults to stdout
+    """
+
+    def __init__(self, output: str, stream: Optional[TextIO] = None):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(
+                f'Unknown output format {output}, expected one of {OUTPUT_FORMATS}'
+            )
+        self.output = output
+        self.stream = stream or sys.stdout
+        self._empty = True
+
+    def write(self, item: Dict):
+        import yaml
+
+        if self.output == 'ndjson':
+            _dump_json(item, self.stream)
+            self.stream.write('\n')
+        elif self.output == 'yaml':
+            # a one item sequence per object, which concatenate into a single one
+            yaml.safe_dump(
+                [item], self.stream, default_flow_style=False, sort_keys=False
+            )
+        else:
+            self.stream.write('[\n' if self._empty else ',\n')
+            _dump_json(item, self.stream)
+        self._empty = False
+        self.stream.flush()
+
+    def close(self):
+        if self.output == 'json':
+            self.stream.write('[]\n' if self._empty else '\n]\n')
+        elif self.output == 'yaml' and self._empty:
+            self.stream.write('[]\n')
+
+
+def write_output(
+    data: Union[Dict, Iterable[Dict]],
+    output: str,
+    stream: Optional[TextIO] = None,
+):
+    """Write API objects to `stream` in a machine-readable format, without rich.
+
+    Lists are written item by item as they are iterated, so a generator of objects
+    is never held in memory, see :class:`OutputWriter`.
+
+    :param data: a single object, or an iterable of objects
+    :param output: one of `json`, `yaml` or `ndjson`
+    :param stream: the output stream, defaults to stdout
+    """
+    writer = OutputWriter(output, stream)
+    if isinstance(data, dict):
+        import yaml
+
+        if output == 'yaml':
+            yaml.safe_dump(
+                data, writer.stream, default_flow_style=False, sort_keys=False
+            )
+        else:
+            _dump_json(data, writer.stream, indent=2 if output == 'json' else None)
+            writer.stream.write('\n')
+        return
+
+    for item in data:
+        writer.write(item)
+    writer.close()
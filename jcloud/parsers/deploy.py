@@ -1,5 +1,5 @@
 from .helper import _chf
-from ..constants import Resources
+from ..constants import PUSH_CONCURRENCY, Resources
 
 
 def set_deploy_parser(subparser, parser_prog):
@@ -22,6 +22,13 @@ def set_flow_deploy_parser(subparser):
         help='The local path to a Jina flow project.',
     )
 
+    deploy_parser.add_argument(
+        '--push-concurrency',
+        type=int,
+        default=PUSH_CONCURRENCY,
+        help='The maximum number of local Executors pushed to Hubble at once.',
+    )
+
 
 def set_deployment_deploy_parser(subparser):
     deploy_parser = subparser.add_parser(
@@ -1,4 +1,4 @@
-from .helper import _chf
+from .helper import _chf, _set_output_args
 
 
 def set_get_resource_parser(subparser, resource):
@@ -19,3 +19,4 @@ def set_get_resource_parser(subparser, resource):
         type=str,
         help='The string ID of the Flow.',
     )
+    _set_output_args(get_parser)
@@ -298,3 +298,17 @@ class _ColoredHelpFormatter(argparse.ArgumentDefaultsHelpFormatter):
 
 
 _chf = _ColoredHelpFormatter
+
+
+def _set_output_args(parser):
+    from ..output import OUTPUT_FORMATS
+
+    parser.add_argument(
+        '--output',
+        '-o',
+        type=str,
+        choices=OUTPUT_FORMATS,
+        default=None,
+        help='Print the raw API objects in a machine-readable format instead of tables. '
+        '`ndjson` prints one JSON object per line.',
+    )
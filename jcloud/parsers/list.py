@@ -1,4 +1,4 @@
-from .helper import _chf
+from .helper import _chf, _set_output_args
 from ..constants import Phase, Resources
 
 
@@ -26,6 +26,7 @@ def set_list_resource_parser(subparser, parser_prog):
             formatter_class=_chf,
         )
         _set_list_resource_parser(list_parser)
+    _set_output_args(list_parser)
 
 
 def _set_list_flow_parser(list_parser):
@@ -50,6 +51,13 @@ def _set_list_flow_parser(list_parser):
         help='Pass the labels with which to filter flows. Format is comma separated list of `key=value`.',
     )
 
+    list_parser.add_argument(
+        '--cached',
+        action='store_true',
+        default=False,
+        help='List flows from the local inventory, refreshed from the API only once it is older than `JCLOUD_INVENTORY_TTL` seconds.',
+    )
+
 
 def _set_list_deployment_parser(list_parser):
     list_parser.add_argument(
@@ -73,6 +81,13 @@ def _set_list_deployment_parser(list_parser):
         help='Pass the labels with which to filter deployments. Format is comma separated list of `key=value`.',
     )
 
+    list_parser.add_argument(
+        '--cached',
+        action='store_true',
+        default=False,
+        help='List deployments from the local inventory, refreshed from the API only once it is older than `JCLOUD_INVENTORY_TTL` seconds.',
+    )
+
 
 def _set_list_resource_parser(list_parser):
     list_parser.add_argument(
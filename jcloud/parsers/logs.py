@@ -1,4 +1,7 @@
-from .helper import _chf
+import argparse
+import re
+
+from .helper import _chf, _set_output_args
 from ..constants import Resources
 
 
@@ -25,6 +28,71 @@ def set_logs_resource_parser(subparser, parser_prog):
             formatter_class=_chf,
         )
         _set_logs_job_parser(logs_parser)
+    _set_follow_args(logs_parser)
+    _set_limit_args(logs_parser)
+    _set_grep_args(logs_parser)
+    _set_output_args(logs_parser)
+
+
+def _set_grep_args(logs_parser):
+    logs_parser.add_argument(
+        '--grep',
+        type=str,
+        default=None,
+        metavar='PATTERN',
+        help='Print the lines matching the regular expression PATTERN. The logs are '
+        'kept in a local store, and only the new ones are fetched on every search.',
+    )
+
+
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def _duration(value: str) -> float:
+    """Parse a duration such as `90s`, `10m` or `1h30m` into seconds."""
+    parts = re.findall(r'(\d+(?:\.\d+)?)([smhd])', value)
+    if not parts or ''.join(n + u for n, u in parts) != value:
+        raise argparse.ArgumentTypeError(
+            f'invalid duration {value!r}, expected e.g. 90s, 10m or 1h30m'
+        )
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            f'invalid line count {value!r}, expected a non-negative integer'
+        )
+    return number
+
+
+def _set_limit_args(logs_parser):
+    logs_parser.add_argument(
+        '--tail',
+        type=_non_negative_int,
+        default=None,
+        help='Show only the last N lines of every pod.',
+    )
+    logs_parser.add_argument(
+        '--since',
+        type=_duration,
+        default=None,
+        help='Show only the lines written in the last DURATION, e.g. 90s, 10m or 1h30m.',
+    )
+
+
+def _set_follow_args(logs_parser):
+    logs_parser.add_argument(
+        '--follow',
+        '-f',
+        action='store_true',
+        default=False,
+        help='Keep printing new log lines as they arrive, until interrupted.',
+    )
 
 
 def _set_logs_flow_parser(logs_parser):
@@ -48,6 +116,20 @@ def _set_logs_flow_parser(logs_parser):
         required=False,
         help='Get logs for executor.',
     )
+    group.add_argument(
+        '--all',
+        action='store_true',
+        required=False,
+        help='Get logs for the gateway and all the executors, interleaved in time order.',
+    )
+    group.add_argument(
+        '--export',
+        type=str,
+        required=False,
+        metavar='PATH',
+        help='Export the logs of the gateway and all the executors to PATH, as gzip '
+        'compressed JSON lines, e.g. `logs.jsonl.gz`.',
+    )
 
 
 def _set_logs_job_parser(logs_parser):
@@ -1,6 +1,6 @@
 from pathlib import Path
 from .helper import _chf
-from ..constants import Resources
+from ..constants import PUSH_CONCURRENCY, Resources
 
 
 def set_normalize_parser(subparser, parser_prog):
@@ -27,6 +27,12 @@ def set_flow_normalize_parser(subparser):
         type=Path,
         help='The output path to the normalized Jina Flow yml file.',
     )
+    normalize_parser.add_argument(
+        '--push-concurrency',
+        type=int,
+        default=PUSH_CONCURRENCY,
+        help='The maximum number of local Executors pushed to Hubble at once.',
+    )
     normalize_parser.add_argument(
         '-v',
         '--verbose',
@@ -1,5 +1,7 @@
+import argparse
+
 from .helper import _chf
-from ..constants import Phase, Resources
+from ..constants import BULK_CONCURRENCY, Phase, Resources
 
 
 def set_remove_resource_parser(subparser, parser_prog):
@@ -44,6 +46,8 @@ def _set_remove_flow_parser(remove_parser):
         'or string \'all\' for deleting ALL SERVING flows.',
     )
 
+    _set_bulk_removal_args(remove_parser, 'flows')
+
 
 def _set_remove_deployment_parser(remove_parser):
     remove_parser.add_argument(
@@ -61,6 +65,40 @@ def _set_remove_deployment_parser(remove_parser):
         'or string \'all\' for deleting ALL SERVING deployments.',
     )
 
+    _set_bulk_removal_args(remove_parser, 'deployments')
+
+
+def _summary_path(value: str) -> str:
+    # stdout is taken by the progress and the removal messages
+    if value == '-':
+        raise argparse.ArgumentTypeError(
+            'the summary can only be written to a file, not to stdout'
+        )
+    return value
+
+
+def _set_bulk_removal_args(remove_parser, res_key):
+    remove_parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=BULK_CONCURRENCY,
+        help=f'The maximum number of {res_key} removed at once.',
+    )
+
+    remove_parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        help=f'The maximum number of seconds to wait for the removal of each of the {res_key}.',
+    )
+
+    remove_parser.add_argument(
+        '--summary-file',
+        type=_summary_path,
+        default=None,
+        help='Write a JSON summary of removed and failed resources to this file.',
+    )
+
 
 def _set_remove_resource_parser(remove_parser, resource):
     remove_parser.add_argument(
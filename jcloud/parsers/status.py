@@ -1,5 +1,5 @@
-from .helper import _chf
-from ..constants import Resources
+from .helper import _chf, _set_output_args
+from ..constants import BULK_CONCURRENCY, Resources
 
 
 def set_status_parser(subparser, parser_prog):
@@ -12,14 +12,22 @@ def set_status_parser(subparser, parser_prog):
 def set_flow_status_parser(subparser):
     status_parser = subparser.add_parser(
         'status',
-        help='Get the status of a Flow.',
+        help='Get the status of Flow(s).',
         formatter_class=_chf,
     )
 
     status_parser.add_argument(
-        'flow',
+        'flows',
+        nargs='*',
+        metavar='flow',
+        help='The string ID of a flow, or a list of space separated string IDs.',
+    )
+
+    status_parser.add_argument(
+        '--labels',
         type=str,
-        help='The string ID of a flow.',
+        default=None,
+        help='Get the status of the flows with these labels. Format is comma separated list of `key=value`.',
     )
 
     status_parser.add_argument(
@@ -29,18 +37,34 @@ def set_flow_status_parser(subparser):
         help='Pass if you want to see the full details of the Flow.',
     )
 
+    status_parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=BULK_CONCURRENCY,
+        help='The maximum number of flows fetched at once.',
+    )
+    _set_output_args(status_parser)
+
 
 def set_deployment_status_parser(subparser):
     status_parser = subparser.add_parser(
         'status',
-        help='Get the status of a Deployment.',
+        help='Get the status of Deployment(s).',
         formatter_class=_chf,
     )
 
     status_parser.add_argument(
-        'deployment',
+        'deployments',
+        nargs='*',
+        metavar='deployment',
+        help='The string ID of a deployment, or a list of space separated string IDs.',
+    )
+
+    status_parser.add_argument(
+        '--labels',
         type=str,
-        help='The string ID of a deployment.',
+        default=None,
+        help='Get the status of the deployments with these labels. Format is comma separated list of `key=value`.',
     )
 
     status_parser.add_argument(
@@ -49,3 +73,11 @@ def set_deployment_status_parser(subparser):
         default=False,
         help='Pass if you want to see the full details of the Deployment.',
     )
+
+    status_parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=BULK_CONCURRENCY,
+        help='The maximum number of deployments fetched at once.',
+    )
+    _set_output_args(status_parser)
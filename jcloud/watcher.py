@@ -0,0 +1,191 @@
+import asyncio
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional
+
+from .client import Poller, PollPolicy
+from .constants import DEPLOYMENTS_API, FLOWS_API, Phase, Resources
+from .deployment import CloudDeployment
+from .flow import CloudFlow
+from .helper import get_logger
+
+logger = get_logger()
+
+
+class UnexpectedPhaseError(RuntimeError):
+    pass
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    intermediate: List[str]
+    desired: str
+    # monotonic time the waiter gives up at, counted from its own `wait_for`
+    deadline: float
+
+
+class StatusWatcher:
+    """Waits on the phase of many Flows or Deployments at once.
+
+    All waiters share one polling loop. Every tick lists the resources in the phases
+    being waited on with a single request, and only resources that left those phases
+    are fetched individually, to settle their final phase. N waiters thus cost O(1)
+    requests per poll interval instead of N.
+
+    :param jc_cli: the kind of resources watched
+    :param poll_policy: pace of the shared polling loop, defaults to :class:`PollPolicy`
+    """
+
+    def __init__(
+        self,
+        jc_cli: Resources = Resources.Flow,
+        poll_policy: Optional[PollPolicy] = None,
+    ):
+        self.jc_cli = jc_cli
+        self.poll_policy = poll_policy or PollPolicy()
+        self._waiters: Dict[str, _Waiter] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._resource = None
+
+    def _get_resource(self):
+        # built on the first poll, then reused by every tick and fetch
+        if self._resource is None:
+            if Resources.Deployment in self.jc_cli:
+                self._resource = CloudDeployment()
+            else:
+                self._resource = CloudFlow()
+            # failed polls are handled here, they must not print an error and exit
+            self._resource._client.exit_on_error = False
+        return self._resource
+
+    async def wait_for(
+        self,
+        resource_id: str,
+        intermediate: List[Phase],
+        desired: Phase = Phase.Serving,
+    ) -> Dict:
+        """Wait until a resource reaches the `desired` phase.
+
+        :param resource_id: the ID of the Flow or Deployment
+        :param intermediate: the phases the resource may go through meanwhile
+        :param desired: the phase to wait for
+        :return: the status response of the resource once in the `desired` phase
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[resource_id] = _Waiter(
+            future,
+            list(intermediate),
+            desired,
+            deadline=time.monotonic() + self.poll_policy.timeout,
+        )
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        try:
+            return await future
+        finally:
+            self._waiters.pop(resource_id, None)
+
+    def close(self):
+        """Stop polling, waiters still pending are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+        for waiter in self._waiters.values():
+            waiter.future.cancel()
+
+    async def _list_phases(self, phases: List[str]) -> Optional[Dict[str, Dict]]:
+        key = 'deployments' if Resources.Deployment in self.jc_cli else 'flows'
+        try:
+            _result = await self._get_resource().list_all(
+                phase=','.join(phases), quiet=True
+            )
+        except Exception as e:
+            logger.debug(f'Listing {key} failed, falling back to single fetches: {e}')
+            return None
+        return {res['id']: res for res in (_result or {}).get(key, [])}
+
+    async def _fetch(self, resource_id: str, waiter: _Waiter) -> Optional[Dict]:
+        api = DEPLOYMENTS_API if Resources.Deployment in self.jc_cli else FLOWS_API
+        try:
+            return await self._get_resource()._client.request(
+                'GET', f'{api}/{resource_id}'
+            )
+        except Exception as e:
+            if not waiter.future.done():
+                waiter.future.set_exception(
+                    RuntimeError(f'Failed fetching status of {resource_id}: {e}')
+                )
+
+    async def _run(self):
+        try:
+            await self._poll()
+        except Exception as e:
+            for waiter in list(self._waiters.values()):
+                if not waiter.future.done():
+                    waiter.future.set_exception(e)
+
+    def _expire(self, waiters: Dict[str, _Waiter]):
+        now = time.monotonic()
+        for resource_id, waiter in waiters.items():
+            if not waiter.future.done() and now >= waiter.deadline:
+                waiter.future.set_exception(
+                    asyncio.TimeoutError(
+                        f'{self.jc_cli} {resource_id} didn\'t reach phase {waiter.desired} '
+                        f'after waiting for {self.poll_policy.timeout / 60:g}mins'
+                    )
+                )
+
+    async def _poll(self):
+        # waiters keep joining while others are done, every waiter has its own
+        # deadline, so the shared loop only paces the polls
+        poller = Poller(replace(self.poll_policy, timeout=math.inf))
+        while True:
+            self._expire(self._waiters)
+            waiters = {
+                resource_id: waiter
+                for resource_id, waiter in self._waiters.items()
+                if not waiter.future.done()
+            }
+            if not waiters:
+                return
+            phases = sorted({p for w in waiters.values() for p in w.intermediate})
+            # the API can't filter on an empty phase, such resources are fetched singly
+            listable = all(p not in ('', 'All') for p in phases)
+            listed = await self._list_phases(phases) if listable else None
+
+            unlisted = [
+                resource_id
+                for resource_id in waiters
+                if listed is None or resource_id not in listed
+            ]
+            fetched = await asyncio.gather(
+                *(
+                    self._fetch(resource_id, waiters[resource_id])
+                    for resource_id in unlisted
+                )
+            )
+            responses = dict(listed or {})
+            responses.update(zip(unlisted, fetched))
+
+            for resource_id, waiter in waiters.items():
+                response = responses.get(resource_id)
+                if waiter.future.done() or not response or 'status' not in response:
+                    continue
+                phase = response['status'].get('phase')
+                if phase == waiter.desired:
+                    waiter.future.set_result(response)
+                elif phase not in waiter.intermediate:
+                    waiter.future.set_exception(
+                        UnexpectedPhaseError(
+                            f'Unexpected phase: {phase} reached for {self.jc_cli} {resource_id}'
+                        )
+                    )
+            pending = [w.deadline for w in waiters.values() if not w.future.done()]
+            if pending:
+                await asyncio.sleep(
+                    max(
+                        0.0,
+                        min(poller.next_interval(), min(pending) - time.monotonic()),
+                    )
+                )
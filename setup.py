@@ -43,6 +43,7 @@ setup(
         'aiohttp>=3.8.0',
         'jina-hubble-sdk>=0.26.10',
         'packaging',
+        'importlib-metadata; python_version < "3.8"',
         'pyyaml',
         'python-dotenv',
         'python-dateutil',
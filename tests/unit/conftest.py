@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture
+def auth_token(monkeypatch):
+    """Lets tests build a real `CloudFlow` or `CloudDeployment` without a login."""
+    monkeypatch.setattr(
+        'hubble.utils.auth.Auth.get_auth_token', staticmethod(lambda: 'token')
+    )
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from jcloud.bulk import BulkResult, run_bulk
+from jcloud.helper import exit_error
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_caps_concurrency():
+    in_flight, peak = 0, 0
+
+    async def fn(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    result = await run_bulk([f'flow-{i}' for i in range(10)], fn, concurrency=3)
+    assert peak == 3
+    assert sorted(result.succeeded) == sorted(f'flow-{i}' for i in range(10))
+    assert not result.failed
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_records_failures():
+    done = []
+
+    async def fn(item):
+        if item == 'exits':
+            exit_error('[red]Failed removing exits[/red]')
+        if item == 'raises':
+            raise RuntimeError('boom')
+        if item == 'hangs':
+            await asyncio.sleep(10)
+
+    result = await run_bulk(
+        ['ok', 'exits', 'raises', 'hangs'],
+        fn,
+        timeout=0.05,
+        on_done=lambda item, reason: done.append(item),
+    )
+    assert result.succeeded == ['ok']
+    assert result.failed == {
+        'exits': 'Failed removing exits',
+        'raises': 'boom',
+        'hangs': 'timed out after 0.05s',
+    }
+    assert sorted(done) == ['exits', 'hangs', 'ok', 'raises']
+
+
+@pytest.mark.asyncio
+async def test_run_bulk_leaves_other_tasks_alone():
+    other = asyncio.ensure_future(asyncio.sleep(10))
+
+    async def fn(item):
+        raise RuntimeError(item)
+
+    await run_bulk(['a', 'b'], fn)
+    assert not other.cancelled()
+    other.cancel()
+
+
+def test_bulk_result_summary(tmp_path):
+    result = BulkResult(succeeded=['a'], failed={'b': 'boom'})
+    path = tmp_path / 'summary.json'
+    result.dump(str(path))
+    assert json.loads(path.read_text()) == {
+        'total': 2,
+        'succeeded': ['a'],
+        'failed': [{'id': 'b', 'reason': 'boom'}],
+    }
@@ -0,0 +1,203 @@
+from http import HTTPStatus
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from jcloud.client import (
+    JCloudClient,
+    Poller,
+    PollPolicy,
+    RetryBudget,
+    RetryPolicy,
+    parse_retry_after,
+)
+from jcloud.constants import Phase
+from jcloud.helper import close_aiohttp_session
+
+
+@pytest.fixture
+def no_wait_policy():
+    return RetryPolicy(max_attempts=3, backoff_base=0, jitter=False)
+
+
+async def _serve(statuses, headers=None):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.method)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return web.json_response(
+            {'attempt': len(calls)}, status=status, headers=headers or {}
+        )
+
+    app = web.Application()
+    app.router.add_route('*', '/flows', handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, calls
+
+
+@pytest.mark.asyncio
+async def test_idempotent_request_retries_transient_status(no_wait_policy):
+    server, calls = await _serve([HTTPStatus.BAD_GATEWAY, HTTPStatus.OK])
+    client = JCloudClient({}, no_wait_policy, RetryBudget())
+    try:
+        assert await client.request('GET', str(server.make_url('/flows'))) == {
+            'attempt': 2
+        }
+        assert calls == ['GET', 'GET']
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_request_retries_only_unprocessed(no_wait_policy):
+    server, calls = await _serve([HTTPStatus.BAD_GATEWAY, HTTPStatus.CREATED])
+    client = JCloudClient({}, no_wait_policy, RetryBudget())
+    try:
+        response, _ = await client.send('POST', str(server.make_url('/flows')))
+        assert response.status == HTTPStatus.BAD_GATEWAY
+        assert calls == ['POST']
+
+        server_503, calls_503 = await _serve(
+            [HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.CREATED]
+        )
+        response, _ = await client.send('POST', str(server_503.make_url('/flows')))
+        assert response.status == HTTPStatus.CREATED
+        assert calls_503 == ['POST', 'POST']
+        await server_503.close()
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_stops_at_max_attempts(no_wait_policy):
+    server, calls = await _serve([HTTPStatus.SERVICE_UNAVAILABLE])
+    client = JCloudClient({}, no_wait_policy, RetryBudget())
+    try:
+        response, _ = await client.send('GET', str(server.make_url('/flows')))
+        assert response.status == HTTPStatus.SERVICE_UNAVAILABLE
+        assert len(calls) == no_wait_policy.max_attempts
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_is_shared(no_wait_policy):
+    server, calls = await _serve([HTTPStatus.SERVICE_UNAVAILABLE])
+    budget = RetryBudget(ratio=0, min_retries=1)
+    client = JCloudClient({}, no_wait_policy, budget)
+    try:
+        await client.send('GET', str(server.make_url('/flows')))
+        await client.send('GET', str(server.make_url('/flows')))
+        # one retry for the first request, none left for the second one
+        assert len(calls) == 3
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+async def _serve_pages(flows, total=True, paginated=True):
+    offsets = []
+
+    async def handler(request):
+        offset, limit = int(request.query['offset']), int(request.query['limit'])
+        offsets.append(offset)
+        page = flows[offset : offset + limit] if paginated else flows
+        return web.json_response(
+            {'flows': page, **({'total': len(flows)} if total else {})}
+        )
+
+    app = web.Application()
+    app.router.add_route('GET', '/flows', handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, offsets
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'count, total, paginated, expected_offsets',
+    [
+        (7, True, True, [0, 2, 4, 6]),
+        (7, False, True, [0, 2, 4, 6]),
+        (7, True, False, [0]),
+        # the API ignores offsets, and sends the same page again
+        (2, False, False, [0, 2]),
+    ],
+)
+async def test_iter_pages(count, total, paginated, expected_offsets):
+    flows = [{'id': f'flow-{i}'} for i in range(count)]
+    server, offsets = await _serve_pages(flows, total=total, paginated=paginated)
+    client = JCloudClient({}, retry_budget=RetryBudget())
+    try:
+        pages = [
+            page
+            async for page in client.iter_pages(
+                str(server.make_url('/flows')), 'flows', page_size=2, concurrency=2
+            )
+        ]
+        assert [flow for page in pages for flow in page] == flows
+        assert sorted(offsets) == expected_offsets
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_request_is_sent_once_without_retries():
+    server, calls = await _serve([HTTPStatus.BAD_GATEWAY])
+    client = JCloudClient({}, RetryPolicy(max_attempts=0), RetryBudget())
+    try:
+        response, _ = await client.send('GET', str(server.make_url('/flows')))
+        assert response.status == HTTPStatus.BAD_GATEWAY
+        assert calls == ['GET']
+    finally:
+        await close_aiohttp_session()
+        await server.close()
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_base=1, backoff_max=10, jitter=False)
+    assert [policy.backoff(i) for i in range(1, 6)] == [1, 2, 4, 8, 10]
+    assert policy.backoff(1, retry_after=3) == 3
+    assert policy.backoff(1, retry_after=100) == 10
+
+    jittered = RetryPolicy(backoff_base=1, backoff_max=10)
+    assert all(2 <= jittered.backoff(3) <= 4 for _ in range(20))
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    (
+        (None, None),
+        ('', None),
+        ('5', 5),
+        ('-1', 0),
+        ('Wed, 21 Oct 2015 07:28:00 GMT', 0),
+        ('soon', None),
+    ),
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_poller_backs_off_and_resets_on_phase_change():
+    poller = Poller(
+        PollPolicy(initial_interval=1, factor=2, max_interval=4, slow_max_interval=8)
+    )
+    assert [poller.next_interval(Phase.Starting) for _ in range(4)] == [1, 2, 4, 4]
+    assert [poller.next_interval(Phase.Pending) for _ in range(5)] == [1, 2, 4, 8, 8]
+    assert poller.next_interval(Phase.Pending, retry_after=3) == 3
+    assert poller.next_interval(Phase.Starting) == 1
+
+
+def test_poller_never_sleeps_past_deadline():
+    poller = Poller(PollPolicy(initial_interval=5, timeout=0.5))
+    assert poller.next_interval() <= 0.5
+    assert not Poller(PollPolicy(timeout=60)).expired
+    assert Poller(PollPolicy(timeout=0)).expired
@@ -1,5 +1,5 @@
 import os
-from unittest.mock import Mock, call, patch
+from unittest.mock import ANY, Mock, call, patch
 
 from jcloud.api import (
     remove,
@@ -100,16 +100,19 @@ def test_deployment_remove_by_phase(
     args.jc_cli = 'deployment'
     args.phase = 'Serving'
     args.deployments = ['deployment_1', 'workable-shrew-f1bdd8f74b']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_deployment_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_deployment_simplified.assert_has_calls(
         [
-            call('deployment_1', 'Serving'),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('firm-condor-77f454eac2', args.phase),
-            call('somename-1234567890', args.phase),
+            call('deployment_1', 'Serving', watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ],
         any_order=True,
     )
@@ -125,12 +128,18 @@ def test_deployment_remove_selected_multi(
     args.jc_cli = 'deployment'
     args.phase = None
     args.deployments = ['deployment_1', 'deployment_2']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_deployment_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_deployment_simplified.assert_has_calls(
-        [call('deployment_1', args.phase), call('deployment_2', args.phase)]
+        [
+            call('deployment_1', args.phase, watcher=ANY),
+            call('deployment_2', args.phase, watcher=ANY),
+        ]
     )
 
 
@@ -144,6 +153,9 @@ def test_deployment_remove_all(
     args.jc_cli = 'deployment'
     args.phase = None
     args.deployments = ['all']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_deployment_simplified.side_effect = mock_terminate
 
@@ -151,9 +163,9 @@ def test_deployment_remove_all(
 
     mock_terminate_deployment_simplified.assert_has_calls(
         [
-            call('firm-condor-77f454eac2', args.phase),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('somename-1234567890', args.phase),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ]
     )
 
@@ -168,15 +180,18 @@ def test_deployment_non_interative(
     args.jc_cli = 'deployment'
     args.phase = None
     args.deployments = ['all']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_deployment_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_deployment_simplified.assert_has_calls(
         [
-            call('firm-condor-77f454eac2', args.phase),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('somename-1234567890', args.phase),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ]
     )
 
@@ -287,6 +302,11 @@ def test_deployment_logs(mock_clouddeployment):
     args.jc_cli = 'deployment'
     args.deployment = 'deployment'
     args.gateway = True
+    args.follow = False
+    args.grep = None
+    args.tail = None
+    args.since = None
+    args.output = None
 
     m = Mock()
     m.logs = Mock(side_effect=mock_logs)
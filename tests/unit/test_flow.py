@@ -86,3 +86,143 @@ async def test_post_params_local_project_dir(monkeypatch, dirname):
     _post_params = await flow._get_post_params()
     assert 'data' in _post_params
     assert 'params' in _post_params
+
+
+@pytest.mark.usefixtures('auth_token')
+@pytest.mark.asyncio
+async def test_fetch_until_waits_between_polls(monkeypatch):
+    from jcloud.client import PollPolicy
+    from jcloud.constants import Phase
+
+    responses = iter(
+        [
+            {},
+            {'status': {'phase': 'Pending'}},
+            {'status': {'phase': 'Starting'}},
+            {'status': {'phase': 'Serving', 'endpoints': {'gateway': 'grpcs://x'}}},
+        ]
+    )
+    sleeps = []
+
+    async def _status(self):
+        return next(responses)
+
+    async def _sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(CloudFlow, 'status', property(_status))
+    monkeypatch.setattr('asyncio.sleep', _sleep)
+    flow = CloudFlow(flow_id='jcloud-1234', poll_policy=PollPolicy(timeout=60))
+    endpoints, _ = await flow._fetch_until(
+        intermediate=[Phase.Empty, Phase.Pending, Phase.Starting]
+    )
+    assert endpoints == {'gateway': 'grpcs://x'}
+    # the response without status doesn't busy-loop against the API
+    assert len(sleeps) == 3
+
+
+@pytest.mark.usefixtures('auth_token')
+@pytest.mark.asyncio
+async def test_deploy_normalizes_once(monkeypatch):
+    normalize_calls = []
+
+    def _normalize(*args, **kwargs):
+        normalize_calls.append(args)
+        return func()
+
+    async def _request(method, url, kwargs_factory=None, **kwargs):
+        # a retried request rebuilds its params
+        for _ in range(2):
+            assert (await kwargs_factory())['data']._fields[0][0]['name'] == 'spec'
+        return {'errors': []} if url.endswith('/validate') else {'id': 'jcloud-1234'}
+
+    monkeypatch.setattr('jcloud.normalize.flow_normalize', _normalize)
+    flow = CloudFlow(
+        path=os.path.join(
+            cur_dir, '..', 'integration', 'flow', 'projects', 'simple', 'flow.yml'
+        )
+    )
+    monkeypatch.setattr(flow._client, 'request', _request)
+    await flow._deploy()
+    assert len(normalize_calls) == 1
+
+
+@pytest.mark.usefixtures('auth_token')
+@pytest.mark.asyncio
+async def test_deploy_loads_flow_once(monkeypatch):
+    from jcloud.helper import exit_if_flow_defines_secret, load_flow_data
+
+    loads = []
+
+    def _load_flow_data(*args, **kwargs):
+        loads.append(args)
+        return load_flow_data(*args, **kwargs)
+
+    async def _request(method, url, kwargs_factory=None, **kwargs):
+        assert (await kwargs_factory())['data']._fields[0][0]['name'] == 'spec'
+        return {'errors': []} if url.endswith('/validate') else {'id': 'jcloud-1234'}
+
+    monkeypatch.setattr('jcloud.flow.load_flow_data', _load_flow_data)
+    flow = CloudFlow(
+        path=os.path.join(
+            cur_dir, '..', 'integration', 'flow', 'basic', 'flows', 'http-flow.yml'
+        )
+    )
+    monkeypatch.setattr(flow._client, 'request', _request)
+    exit_if_flow_defines_secret(flow.flow_dict)
+    await flow._deploy()
+    assert len(loads) == 1
+
+
+@pytest.mark.usefixtures('auth_token')
+@pytest.mark.asyncio
+async def test_all_logs_fetches_concurrently(monkeypatch):
+    import asyncio
+
+    in_flight, peak = 0, 0
+
+    async def _status(self):
+        return {'spec': {'executors': [{'name': 'e1'}, {'name': 'e2'}]}}
+
+    async def _logs(self, executor_name=None, tail=None, since=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return {f'{executor_name or "gateway"}-pod': f'tail={tail}'}
+
+    monkeypatch.setattr(CloudFlow, 'status', property(_status))
+    monkeypatch.setattr(CloudFlow, 'logs', _logs)
+    logs = await CloudFlow(flow_id='jcloud-1234').all_logs(tail=5)
+    assert logs == {
+        'gateway-pod': 'tail=5',
+        'e1-pod': 'tail=5',
+        'e2-pod': 'tail=5',
+    }
+    assert peak == 3
+
+
+@pytest.mark.usefixtures('auth_token')
+def test_sdk_context_keeps_one_session(monkeypatch):
+    from jcloud.helper import get_aiohttp_session
+
+    sessions = []
+
+    async def _current_session():
+        async with get_aiohttp_session() as session:
+            sessions.append(session)
+
+    async def _aenter(self):
+        await _current_session()
+        return self
+
+    async def _aexit(self, *args, **kwargs):
+        await _current_session()
+
+    monkeypatch.setattr(CloudFlow, '__aenter__', _aenter)
+    monkeypatch.setattr(CloudFlow, '__aexit__', _aexit)
+    with CloudFlow(flow_id='jcloud-1234'):
+        assert not sessions[0].closed
+    assert sessions[0] is sessions[1]
+    assert sessions[0].closed
@@ -1,5 +1,7 @@
 import os
-from unittest.mock import Mock, call, patch
+from unittest.mock import ANY, Mock, call, patch
+
+import pytest
 
 from jcloud.api import (
     remove,
@@ -13,6 +15,7 @@ from jcloud.api import (
     list,
     create,
     get,
+    status,
 )
 
 
@@ -125,16 +128,19 @@ def test_flow_remove_by_phase(
     args.jc_cli = 'flow'
     args.phase = 'Serving'
     args.flows = ['flow_1', 'workable-shrew-f1bdd8f74b']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_flow_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_flow_simplified.assert_has_calls(
         [
-            call('flow_1', 'Serving'),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('firm-condor-77f454eac2', args.phase),
-            call('somename-1234567890', args.phase),
+            call('flow_1', 'Serving', watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ],
         any_order=True,
     )
@@ -150,12 +156,18 @@ def test_flow_remove_selected_multi(
     args.jc_cli = 'flow'
     args.phase = None
     args.flows = ['flow_1', 'flow_2']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_flow_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_flow_simplified.assert_has_calls(
-        [call('flow_1', args.phase), call('flow_2', args.phase)]
+        [
+            call('flow_1', args.phase, watcher=ANY),
+            call('flow_2', args.phase, watcher=ANY),
+        ]
     )
 
 
@@ -167,6 +179,9 @@ def test_flow_remove_all(mock_list_by_phase, mock_terminate_flow_simplified, moc
     args.jc_cli = 'flow'
     args.phase = None
     args.flows = ['all']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_flow_simplified.side_effect = mock_terminate
 
@@ -174,9 +189,9 @@ def test_flow_remove_all(mock_list_by_phase, mock_terminate_flow_simplified, moc
 
     mock_terminate_flow_simplified.assert_has_calls(
         [
-            call('firm-condor-77f454eac2', args.phase),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('somename-1234567890', args.phase),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ]
     )
 
@@ -189,15 +204,18 @@ def test_flow_non_interative(mock_list_by_phase, mock_terminate_flow_simplified)
     args.jc_cli = 'flow'
     args.phase = None
     args.flows = ['all']
+    args.concurrency = 10
+    args.timeout = None
+    args.summary_file = None
     mock_list_by_phase.side_effect = mock_list
     mock_terminate_flow_simplified.side_effect = mock_terminate
 
     remove(args)
     mock_terminate_flow_simplified.assert_has_calls(
         [
-            call('firm-condor-77f454eac2', args.phase),
-            call('workable-shrew-f1bdd8f74b', args.phase),
-            call('somename-1234567890', args.phase),
+            call('firm-condor-77f454eac2', args.phase, watcher=ANY),
+            call('workable-shrew-f1bdd8f74b', args.phase, watcher=ANY),
+            call('somename-1234567890', args.phase, watcher=ANY),
         ]
     )
 
@@ -307,6 +325,13 @@ def test_flow_logs(mock_cloudflow):
     args.jc_cli = 'flow'
     args.flow = 'flow'
     args.gateway = True
+    args.all = False
+    args.export = None
+    args.follow = False
+    args.grep = None
+    args.tail = None
+    args.since = None
+    args.output = None
 
     m = Mock()
     m.logs = Mock(side_effect=mock_logs)
@@ -329,6 +354,11 @@ def test_job_logs(mock_cloudflow):
     args.jc_cli = 'job'
     args.flow = 'flow'
     args.name = 'test-job'
+    args.follow = False
+    args.grep = None
+    args.tail = None
+    args.since = None
+    args.output = None
 
     m = Mock()
     m.job_logs = Mock(side_effect=mock_job_logs)
@@ -371,6 +401,7 @@ def test_job_secret_list(mock_cloudflow):
     args.jc_cli = 'secret'
     args.subcommand = 'list'
     args.flow = 'flow'
+    args.output = None
 
     m = Mock()
     m.list_resources = Mock(side_effect=mock_list_secrets)
@@ -455,6 +486,7 @@ def test_get_resource(mock_cloudflow):
     args.flow = 'flow'
     args.jc_cli = 'secret'
     args.name = 'test-secret'
+    args.output = None
 
     m = Mock()
     m.get_resource = Mock(side_effect=mock_get_resource)
@@ -488,3 +520,168 @@ def test_update_secret(mock_cloudflow):
     mock_cloudflow.return_value.update_secret.assert_has_calls(
         [call('test-secret', 'secret-value', True)]
     )
+
+
+@patch('jcloud.api.CloudFlow')
+def test_flow_list_output(mock_cloudflow, capsys):
+    import json
+
+    args = Mock()
+    args.jc_cli = 'flow'
+    args.phase = None
+    args.name = None
+    args.labels = None
+    args.output = 'ndjson'
+    args.cached = False
+
+    async def mock_iter_pages(*args, **kwargs):
+        flows = (await mock_list())['flows']
+        yield flows[:2]
+        yield flows[2:]
+
+    m = Mock()
+    m.iter_pages = Mock(side_effect=mock_iter_pages)
+    mock_cloudflow.return_value = m
+
+    list(args)
+
+    m.iter_pages.assert_called_once_with(phase=ANY, name=None, labels=None)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [
+        'firm-condor-77f454eac2',
+        'workable-shrew-f1bdd8f74b',
+        'somename-1234567890',
+    ]
+
+
+@patch('jcloud.api.CloudFlow')
+def test_flow_logs_streams_large_logs(mock_cloudflow, capsys, monkeypatch):
+    args = Mock()
+    args.jc_cli = 'flow'
+    args.flow = 'flow'
+    args.gateway = True
+    args.all = False
+    args.export = None
+    args.follow = False
+    args.grep = None
+    args.output = None
+    args.tail = 3
+    args.since = None
+
+    async def _large_logs(*args, **kwargs):
+        return {'pod_1': '\n'.join(f'line {i}' for i in range(5000))}
+
+    m = Mock()
+    m.logs = Mock(side_effect=_large_logs)
+    mock_cloudflow.return_value = m
+    monkeypatch.setattr('jcloud.constants.LOGS_HIGHLIGHT_MAX_LINES', 2)
+
+    logs(args)
+
+    m.logs.assert_called_once_with(tail=3)
+    assert capsys.readouterr().out.splitlines()[-3:] == [
+        'pod_1 | line 4997',
+        'pod_1 | line 4998',
+        'pod_1 | line 4999',
+    ]
+
+
+@patch('jcloud.api.CloudFlow')
+def test_flow_logs_grep(mock_cloudflow, capsys, monkeypatch, tmp_path):
+    args = Mock()
+    args.jc_cli = 'flow'
+    args.flow = 'flow'
+    args.gateway = False
+    args.all = False
+    args.export = None
+    args.executor = 'executor0'
+    args.follow = False
+    args.output = None
+    args.tail = None
+    args.since = None
+    args.grep = 'ERROR'
+
+    fetched = iter(
+        [
+            {'executor0-pod': 'INFO start\nERROR first\n'},
+            {'executor0-pod': 'ERROR first\nINFO ok\nERROR second\n'},
+        ]
+    )
+
+    async def _logs(*args, **kwargs):
+        return next(fetched)
+
+    m = Mock()
+    m.logs = Mock(side_effect=_logs)
+    mock_cloudflow.return_value = m
+    monkeypatch.setattr('jcloud.logs.CACHE_DIR', tmp_path)
+
+    logs(args)
+    assert capsys.readouterr().out.splitlines() == ['executor0-pod | ERROR first']
+    m.logs.assert_called_with('executor0')
+
+    logs(args)
+    assert capsys.readouterr().out.splitlines() == [
+        'executor0-pod | ERROR first',
+        'executor0-pod | ERROR second',
+    ]
+    # the second search only asked for the logs since the first one
+    assert m.logs.call_args[1]['since'] > 0
+
+
+@patch('jcloud.api.CloudFlow')
+def test_flow_list_cached(mock_cloudflow, capsys, monkeypatch, tmp_path):
+    import json
+
+    monkeypatch.setattr('jcloud.inventory.CACHE_DIR', tmp_path)
+    args = Mock()
+    args.jc_cli = 'flow'
+    args.phase = 'All'
+    args.name = None
+    args.labels = None
+    args.output = 'ndjson'
+    args.cached = True
+
+    m = Mock()
+    m.list_all = Mock(side_effect=mock_list)
+    mock_cloudflow.return_value = m
+
+    list(args)
+    list(args)
+
+    # the inventory was refreshed once, then answered locally
+    m.list_all.assert_called_once_with(phase='All', quiet=True)
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 6
+    assert (tmp_path / 'inventory.db').exists()
+
+
+@patch('jcloud.api.CloudFlow')
+def test_flow_status_multi(mock_cloudflow, capsys):
+    import json
+
+    args = Mock()
+    args.jc_cli = 'flow'
+    args.flows = ['flow-1', 'flow-2', 'missing']
+    args.labels = None
+    args.concurrency = 2
+    args.output = 'ndjson'
+
+    async def _status(flow_id):
+        if flow_id == 'missing':
+            raise RuntimeError('not found')
+        return {'id': flow_id, 'status': {'phase': 'Serving'}}
+
+    mock_cloudflow.side_effect = lambda flow_id: Mock(status=_status(flow_id))
+
+    with pytest.raises(SystemExit):
+        status(args)
+
+    captured = capsys.readouterr()
+    # stdout only has the records, the failure is reported on stderr
+    records = {r['id']: r for r in map(json.loads, captured.out.splitlines())}
+    assert len(records) == 3
+    assert 'Failed fetching the status of 1 of 3 flows' in captured.err
+    assert records['flow-1']['status'] == {'phase': 'Serving'}
+    assert records['flow-2']['status'] == {'phase': 'Serving'}
+    assert records['missing'] == {'id': 'missing', 'error': 'not found'}
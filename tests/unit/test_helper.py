@@ -1,7 +1,10 @@
+import asyncio
 import os
 
 import pytest
 import tempfile
+import time
+import warnings
 
 from pathlib import Path
 
@@ -11,6 +14,9 @@ from jcloud.helper import (
     JCloudLabelsError,
     update_flow_yml_and_write_to_file,
     check_and_set_jcloud_versions,
+    get_aiohttp_session,
+    close_aiohttp_session,
+    with_shared_session,
 )
 from jcloud.env_helper import EnvironmentVariables
 
@@ -92,16 +98,124 @@ def test_not_normalized(filename, envs):
     ),
 )
 def test_check_and_set_jcloud_versions(flow, flow_dict):
-    import docarray
-    import jina
+    from importlib.metadata import version
+
+    docarray_version = version('docarray')
+    jina_version = version('jina')
 
     flow_dict = check_and_set_jcloud_versions(flow_dict)
     if flow == 'flow-one':
-        assert flow_dict['jcloud']['docarray'] == docarray.__version__
-        assert flow_dict['jcloud']['version'] == jina.__version__
+        assert flow_dict['jcloud']['docarray'] == docarray_version
+        assert flow_dict['jcloud']['version'] == jina_version
     else:
         assert flow_dict['jcloud']['docarray'] == '0.31.0'
-        assert flow_dict['jcloud']['version'] == jina.__version__
+        assert flow_dict['jcloud']['version'] == jina_version
+
+
+def test_check_and_set_jcloud_versions_without_package(monkeypatch, caplog):
+    monkeypatch.setattr(
+        'jcloud.helper._installed_version',
+        lambda package: None if package == 'docarray' else '3.0.0',
+    )
+    assert check_and_set_jcloud_versions({'jtype': 'Flow'})['jcloud'] == {
+        'version': '3.0.0'
+    }
+    assert 'Could not determine the version of docarray' in caplog.text
+
+    caplog.clear()
+    flow_dict = {'jtype': 'Flow', 'jcloud': {'docarray': '0.31.0'}}
+    assert check_and_set_jcloud_versions(flow_dict)['jcloud'] == {
+        'docarray': '0.31.0',
+        'version': '3.0.0',
+    }
+    assert 'Could not determine' not in caplog.text
+
+
+def test_load_flow_data_without_jina(tmp_path):
+    import subprocess
+    import sys
+
+    flow_path = tmp_path / 'flow.yml'
+    flow_path.write_text(
+        'jtype: Flow\nwith:\n  port: ${{ ENV.PORT }}\nexecutors:\n  - uses: docker://E1\n'
+    )
+    code = (
+        'import sys\n'
+        'from jcloud.helper import load_flow_data\n'
+        f'assert load_flow_data({str(flow_path)!r})["with"]["port"] == 8080\n'
+        'assert "jina" not in sys.modules and "docarray" not in sys.modules\n'
+    )
+    subprocess.run(
+        [sys.executable, '-c', code],
+        check=True,
+        env={**os.environ, 'PORT': '8080'},
+    )
+
+
+def test_is_latest_version_is_cached(monkeypatch, tmp_path, capsys):
+    from jcloud import constants
+    from jcloud import helper
+
+    monkeypatch.setattr('jcloud.cache.CACHE_DIR', tmp_path)
+    fetched = []
+
+    def _fetch(package):
+        fetched.append(package)
+        return '999.0.0'
+
+    monkeypatch.setattr(helper, '_fetch_latest_version', _fetch)
+    monkeypatch.setattr(helper, '_installed_version', lambda package: '0.3.1')
+
+    threads = []
+    _start = helper.threading.Thread.start
+
+    def _record_start(thread):
+        threads.append(thread)
+        _start(thread)
+
+    monkeypatch.setattr(helper.threading.Thread, 'start', _record_start)
+    at_exit = []
+    monkeypatch.setattr('atexit.register', lambda *args: at_exit.append(args))
+
+    # the first run only refreshes the cache, waiting for it at exit only
+    helper.is_latest_version('jcloud')
+    assert len(threads) == 1 and threads[0].daemon
+    assert at_exit == [(threads[0].join, constants.VERSION_CHECK_JOIN_TIMEOUT)]
+    threads[0].join()
+    assert capsys.readouterr().err == ''
+
+    # the next runs show the notice from the cache, without any request
+    for _ in range(3):
+        helper.is_latest_version('jcloud')
+        assert '999.0.0' in capsys.readouterr().err
+    assert fetched == ['jcloud'] and len(threads) == 1
+
+
+def test_killed_version_check_is_retried_later(monkeypatch, tmp_path):
+    import json
+
+    from jcloud import constants
+    from jcloud import helper
+
+    monkeypatch.setattr('jcloud.cache.CACHE_DIR', tmp_path)
+    started = []
+    # the command exits before the daemon thread ever runs
+    monkeypatch.setattr(
+        helper.threading.Thread, 'start', lambda thread: started.append(thread)
+    )
+    monkeypatch.setattr('atexit.register', lambda *args: None)
+    for _ in range(3):
+        helper.is_latest_version('jcloud')
+    assert len(started) == 1
+    cache_file = tmp_path / helper.VERSION_CACHE_FILE
+    assert cache_file.exists()
+
+    # retried once the short retry TTL expired, not the full one
+    cached = json.loads(cache_file.read_text())
+    cached['jcloud']['cached_at'] -= constants.VERSION_CHECK_RETRY_TTL + 1
+    cache_file.write_text(json.dumps(cached))
+    helper.is_latest_version('jcloud')
+    assert len(started) == 2
 
 
 def test_failed_flow():
@@ -146,3 +260,197 @@ def test_update_flow_yml_and_write_to_file():
         'env1': {'key': 'env1', 'name': 'test'},
         'env2': {'key': 'env2', 'name': 'test'},
     }
+
+
+@pytest.mark.asyncio
+async def test_aiohttp_session_is_shared_and_closed():
+    async with get_aiohttp_session() as first:
+        pass
+    async with get_aiohttp_session() as second:
+        assert second is first
+        assert not second.closed
+
+    await close_aiohttp_session()
+    assert first.closed
+
+    async with get_aiohttp_session() as third:
+        assert third is not first
+    await with_shared_session(asyncio.sleep(0))
+    assert third.closed
+
+
+@pytest.mark.asyncio
+async def test_run_sync_within_running_loop():
+    from jcloud.helper import run_sync
+
+    async def _answer():
+        await asyncio.sleep(0)
+        return 42
+
+    assert run_sync(_answer()) == 42
+
+
+def test_load_flow_data_is_cached(monkeypatch, tmp_path):
+    from jcloud.helper import load_yaml
+
+    parses = []
+
+    def _counting_load(*args, **kwargs):
+        parses.append(args)
+        return load_yaml(*args, **kwargs)
+
+    monkeypatch.setattr('jcloud.helper.load_yaml', _counting_load)
+    monkeypatch.setenv('E1_USES', 'jinahub+docker://E1')
+    flow_path = tmp_path / 'flow.yml'
+    flow_path.write_text(
+        'jtype: Flow\nexecutors:\n  - name: E1\n    uses: ${{ ENV.E1_USES }}\n'
+    )
+
+    flow_dict = load_flow_data(flow_path)
+    flow_dict['executors'][0]['uses'] = 'modified by the caller'
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == 'jinahub+docker://E1'
+    assert len(parses) == 1
+
+    # the substituted environment and context are part of the key
+    monkeypatch.setenv('E1_USES', 'jinahub+docker://E2')
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == 'jinahub+docker://E2'
+    load_flow_data(flow_path, {'SOME': 'context'})
+    assert len(parses) == 3
+
+    mtime = time.time_ns()
+    flow_path.write_text(
+        'jtype: Flow\nexecutors:\n  - name: E1\n    uses: docker://E3\n'
+    )
+    os.utime(flow_path, ns=(mtime, mtime))
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == 'docker://E3'
+    assert len(parses) == 4
+
+    # rewritten within the resolution of the mtime, with the same size
+    flow_path.write_text(
+        'jtype: Flow\nexecutors:\n  - name: E1\n    uses: docker://E4\n'
+    )
+    os.utime(flow_path, ns=(mtime, mtime))
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == 'docker://E4'
+
+
+def test_load_flow_data_disk_cache(monkeypatch, tmp_path):
+    from jcloud import helper
+
+    parses = []
+    _load = helper.load_yaml
+
+    def _counting_load(*args, **kwargs):
+        parses.append(args)
+        return _load(*args, **kwargs)
+
+    monkeypatch.setattr('jcloud.helper.load_yaml', _counting_load)
+    monkeypatch.setattr('jcloud.cache.CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setenv('JCLOUD_SPEC_DISK_CACHE', '1')
+    monkeypatch.setenv('E1_SECRET', 'top-secret')
+    flow_path = tmp_path / 'flow.yml'
+    flow_path.write_text(
+        'jtype: Flow\nexecutors:\n  - name: E1\n    uses: docker://E1\n'
+        '    env:\n      SECRET: ${{ ENV.E1_SECRET }}\n'
+    )
+
+    flow_dict = load_flow_data(flow_path)
+    assert flow_dict['executors'][0]['env']['SECRET'] == 'top-secret'
+    # the document is stored before substitution
+    assert 'top-secret' not in (tmp_path / 'cache' / 'specs.json').read_text()
+    # a new invocation starts with an empty in-process cache
+    helper._spec_cache.clear()
+    assert load_flow_data(flow_path) == flow_dict
+    assert len(parses) == 1
+
+    helper._spec_cache.clear()
+    monkeypatch.setenv('E1_SECRET', 'rotated')
+    assert load_flow_data(flow_path)['executors'][0]['env']['SECRET'] == 'rotated'
+    assert len(parses) == 1
+
+
+def test_load_flow_data_cache_key_has_context_variables(monkeypatch, tmp_path):
+    monkeypatch.setenv('E1_USES', 'docker://E1')
+    flow_path = tmp_path / 'flow.yml'
+    # `${{ var }}` is read from the environment when missing from the context, with
+    # a leading `$` like JAML does
+    flow_path.write_text(
+        'jtype: Flow\nexecutors:\n  - name: E1\n    uses: ${{ E1_USES }}\n'
+    )
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == '$docker://E1'
+    monkeypatch.setenv('E1_USES', 'docker://E2')
+    assert load_flow_data(flow_path)['executors'][0]['uses'] == '$docker://E2'
+
+
+def test_expand_dict(monkeypatch):
+    from jcloud.env_helper import expand_dict
+
+    monkeypatch.setenv('PORT', '8080')
+    monkeypatch.setenv('NESTED', 'port-$PORT')
+    d = {
+        'jtype': 'Flow',
+        'with': {
+            'port': '${{ ENV.PORT }}',
+            'name': '${{ CONTEXT.name }}',
+            'nested': '${NESTED}',
+            'missing': '$MISSING',
+            'first': '${{root.executors[0].name}}',
+        },
+        'executors': [
+            {'name': 'e-${{ name }}', 'replicas': '2', 'tag': '${{this.name}}'}
+        ],
+    }
+    assert expand_dict(d, {'name': 'flow'}) == {
+        'jtype': 'Flow',
+        'with': {
+            'port': 8080,
+            'name': 'flow',
+            'nested': 'port-8080',
+            'missing': '$MISSING',
+            'first': 'e-flow',
+        },
+        'executors': [{'name': 'e-flow', 'replicas': 2, 'tag': 'e-flow'}],
+    }
+
+
+def test_expand_dict_resolves_reference_chains():
+    from jcloud.env_helper import expand_dict
+
+    d = {f'k{i}': f'${{{{root.k{i + 1}}}}}' for i in range(20)}
+    d['k20'] = '${{root.executors[0].with.port}}'
+    d['executors'] = [{'name': 'e', 'with': {'port': '${{root.base}}'}}]
+    d['base'] = '8080'
+    d = expand_dict(d)
+    assert [d[f'k{i}'] for i in range(21)] == [8080] * 21
+    assert d['executors'][0]['with']['port'] == 8080
+
+
+def test_expand_dict_detects_reference_cycles():
+    from jcloud.env_helper import YAMLReferenceCycleError, expand_dict
+
+    d = {'a': '${{root.b.c}}', 'b': {'c': '${{root.d}}'}, 'd': 'x-${{root.a}}'}
+    with pytest.raises(YAMLReferenceCycleError) as e:
+        expand_dict(d)
+    assert 'root.a -> root.b.c -> root.d -> root.a' in str(e.value)
+
+
+def test_expand_dict_warns_on_deprecated_env_syntax(monkeypatch):
+    from jcloud.env_helper import expand_dict
+
+    monkeypatch.setenv('FOO', 'foo')
+    with pytest.warns(DeprecationWarning):
+        assert expand_dict({'a': '$FOO'}) == {'a': 'foo'}
+    with pytest.warns(DeprecationWarning):
+        assert expand_dict({'a': '${FOO}'}) == {'a': 'foo'}
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert expand_dict({'a': '${{ ENV.FOO }}'}) == {'a': 'foo'}
+
+
+def test_expand_dict_substitutes_values_once(monkeypatch):
+    from jcloud.env_helper import expand_dict
+
+    monkeypatch.setenv('FOO', 'foo')
+    # quoted scalars are unquoted once, not parsed again
+    assert expand_dict({'a': '"5"'}) == {'a': '5'}
+    # env and context templates mix in a single value
+    assert expand_dict({'a': '${{ ENV.FOO }}${{ NUM }}'}, {'NUM': 7}) == {'a': 'foo7'}
@@ -0,0 +1,47 @@
+from jcloud.inventory import Inventory, parse_labels
+
+
+def _flow(_id, phase='Serving', utime='2023-04-18T10:00:00Z', **labels):
+    return {
+        'id': _id,
+        'name': _id.split('-')[0],
+        'status': {'phase': phase, 'endpoints': {'gateway': f'grpcs://{_id}'}},
+        'spec': {'jcloud': {'labels': labels}},
+        'CPH': {'total': 3},
+        'ctime': f'2023-04-18T0{len(_id) % 10}:00:00Z',
+        'utime': utime,
+    }
+
+
+def test_parse_labels():
+    assert parse_labels(None) == {}
+    assert parse_labels('team=search,env=prod') == {'team': 'search', 'env': 'prod'}
+
+
+def test_inventory_refreshes_incrementally(tmp_path):
+    path = tmp_path / 'inventory.db'
+    with Inventory(path) as inventory:
+        assert inventory.is_stale('flow', 300)
+        flows = [
+            _flow('a-1', team='search'),
+            _flow('b-22', phase='Failed', team='search'),
+            _flow('c-333', phase='Deleted', team='ads'),
+        ]
+        assert inventory.refresh('flow', flows) == 3
+        assert not inventory.is_stale('flow', 300)
+        # only updated and removed flows are written
+        flows = [flows[0], _flow('b-22', utime='2023-04-18T11:00:00Z', team='ads')]
+        assert inventory.refresh('flow', flows) == 2
+
+    with Inventory(path) as inventory:
+        assert [f['id'] for f in inventory.query('flow')] == ['a-1', 'b-22']
+        assert [f['id'] for f in inventory.query('flow', phases=['Serving'])] == [
+            'a-1',
+            'b-22',
+        ]
+        assert [f['id'] for f in inventory.query('flow', name='b')] == ['b-22']
+        assert [f['id'] for f in inventory.query('flow', labels={'team': 'ads'})] == [
+            'b-22'
+        ]
+        assert inventory.query('flow', phases=['Failed']) == []
+        assert inventory.query('deployment') == []
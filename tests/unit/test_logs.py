@@ -0,0 +1,222 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from jcloud.logs import (
+    LogFollower,
+    LogStore,
+    follow_logs,
+    limit_lines,
+    line_timestamp,
+    merge_lines,
+)
+
+
+def test_log_follower_yields_new_lines_only():
+    follower = LogFollower(overlap=3)
+    assert follower.new_lines('pod', 'a\nb\nc\n') == ['a', 'b', 'c']
+    assert follower.new_lines('pod', 'a\nb\nc\n') == []
+    assert follower.new_lines('pod', 'a\nb\nc\nd\ne\n') == ['d', 'e']
+    # the server only keeps the latest lines
+    assert follower.new_lines('pod', 'd\ne\nf\n') == ['f']
+    # repeated lines are told apart by the lines before them
+    assert follower.new_lines('pod', 'd\ne\nf\nok\nok\n') == ['ok', 'ok']
+    assert follower.new_lines('pod', 'f\nok\nok\nok\n') == ['ok']
+    # everything was rotated away
+    assert follower.new_lines('pod', 'x\ny\n') == ['x', 'y']
+    # pods are followed separately
+    assert follower.new_lines('other', 'x\n') == ['x']
+
+
+@pytest.mark.asyncio
+async def test_follow_logs():
+    fetched = [
+        {'gateway-0': 'start\n'},
+        {'gateway-0': 'start\nready\n', 'gateway-1': 'start\n'},
+        {'gateway-0': 'start\nready\n', 'gateway-1': 'start\nready\n'},
+    ]
+    received = []
+
+    async def fetch():
+        if not fetched:
+            await asyncio.sleep(10)
+        return fetched.pop(0)
+
+    task = asyncio.ensure_future(
+        follow_logs(fetch, lambda pod, lines: received.append((pod, lines)), interval=0)
+    )
+    while fetched:
+        await asyncio.sleep(0)
+    task.cancel()
+
+    assert received == [
+        ('gateway-0', ['start']),
+        ('gateway-0', ['ready']),
+        ('gateway-1', ['start']),
+        ('gateway-1', ['ready']),
+    ]
+
+
+def test_line_timestamp():
+    assert line_timestamp('2023-04-18T10:00:00.123456789Z hello') == pytest.approx(
+        datetime(2023, 4, 18, 10, 0, 0, 123456, tzinfo=timezone.utc).timestamp()
+    )
+    assert line_timestamp('INFO gateway@1 started [04/18/23 10:00:00]') == (
+        datetime(2023, 4, 18, 10, 0, 0, tzinfo=timezone.utc).timestamp()
+    )
+    assert line_timestamp('Traceback (most recent call last):') is None
+    # pods log in UTC, whatever the timezone of the client
+    now = datetime.now(timezone.utc).strftime('%m/%d/%y %H:%M:%S')
+    assert abs(line_timestamp(f'INFO ready [{now}]') - time.time()) < 5
+
+
+def test_limit_lines():
+    def _line(age, text):
+        stamp = datetime.fromtimestamp(time.time() - age, timezone.utc)
+        return f'{stamp.isoformat()} {text}'
+
+    lines = [
+        'no timestamp yet',
+        _line(7200, 'old'),
+        'old traceback',
+        _line(60, 'recent'),
+        'recent traceback',
+        _line(30, 'last'),
+    ]
+    logs = '\n'.join(lines)
+    assert limit_lines(logs, tail=2) == lines[-2:]
+    assert limit_lines(logs, tail=0) == []
+    assert [line.split(' ')[-1] for line in limit_lines(logs, since=3600)] == [
+        'yet',
+        'recent',
+        'traceback',
+        'last',
+    ]
+    assert len(limit_lines(logs, tail=3, since=45)) == 1
+
+
+def test_log_follower_limits_first_fetch():
+    follower = LogFollower(tail=1)
+    assert follower.new_lines('pod', 'a\nb\nc\n') == ['c']
+    assert follower.new_lines('pod', 'a\nb\nc\nd\ne\n') == ['d', 'e']
+
+
+def test_merge_lines():
+    logs = {
+        'gateway': [
+            '2023-04-18T10:00:00Z start',
+            '2023-04-18T10:00:03Z request',
+            'traceback',
+        ],
+        'executor': [
+            'no timestamp yet',
+            '2023-04-18T10:00:01Z start',
+            '2023-04-18T10:00:02Z ready',
+            '2023-04-18T10:00:04Z done',
+        ],
+    }
+    assert [f'{pod} {line.split(" ")[-1]}' for pod, line in merge_lines(logs)] == [
+        'executor yet',
+        'gateway start',
+        'executor start',
+        'executor ready',
+        'gateway request',
+        'gateway traceback',
+        'executor done',
+    ]
+
+
+def test_log_store_syncs_incrementally(tmp_path):
+    import gzip
+
+    store = LogStore('flow-1', root=tmp_path)
+    assert store.fetch_since('gateway') is None
+
+    pods = store.sync('gateway', {'gateway-0': 'start\nready\n'}, time.time())
+    assert pods == ['gateway-0']
+    assert 0 < store.fetch_since('gateway') < 120
+    # the API returned the overlapping lines again
+    store.sync('gateway', {'gateway-0': 'ready\nrequest 1\nrequest 2\n'}, time.time())
+    pods = store.sync('gateway', {'gateway-1': 'start\n'}, time.time())
+    assert pods == ['gateway-0', 'gateway-1']
+
+    assert list(store.read('gateway-0')) == ['start', 'ready', 'request 1', 'request 2']
+    # appended, every sync is a new gzip member
+    with open(tmp_path / 'flow-1' / 'gateway-0.log.gz', 'rb') as f:
+        assert f.read().count(b'\x1f\x8b\x08') == 2
+    assert list(store.grep(r'request \d', pods)) == [
+        ('gateway-0', 'request 1'),
+        ('gateway-0', 'request 2'),
+    ]
+
+    # the store is kept across runs
+    store = LogStore('flow-1', root=tmp_path)
+    assert [line for _, line in store.grep('start', pods)] == ['start', 'start']
+
+
+@pytest.mark.asyncio
+async def test_export_logs(tmp_path):
+    import gzip
+    import json
+
+    from jcloud.logs import export_logs
+
+    async def fetched():
+        yield 'executor0', {'executor0-pod': 'start\n2023-04-18T10:00:00Z ready\n'}
+        yield None, {'gateway-pod': 'start\n'}
+
+    path = tmp_path / 'logs.jsonl.gz'
+    stats = await export_logs(fetched(), path)
+    with gzip.open(path, 'rt') as f:
+        records = [json.loads(line) for line in f]
+    assert records == [
+        {
+            'pod': 'executor0-pod',
+            'executor': 'executor0',
+            'line': 'start',
+            'timestamp': None,
+        },
+        {
+            'pod': 'executor0-pod',
+            'executor': 'executor0',
+            'line': '2023-04-18T10:00:00Z ready',
+            'timestamp': '2023-04-18T10:00:00+00:00',
+        },
+        {
+            'pod': 'gateway-pod',
+            'executor': 'gateway',
+            'line': 'start',
+            'timestamp': None,
+        },
+    ]
+    assert stats['lines'] == 3 and stats['pods'] == 2
+    assert stats['bytes'] == path.stat().st_size
+    assert stats['raw_bytes'] > 0
+
+
+def test_merge_lines_mixes_timestamp_formats(monkeypatch):
+    # a client ahead of UTC must not shift the jina lines
+    monkeypatch.setenv('TZ', 'Asia/Tokyo')
+    time.tzset()
+    try:
+        logs = {
+            'gateway': [
+                '2023-04-18T10:00:00Z start',
+                '2023-04-18T10:00:02Z request',
+            ],
+            'executor': [
+                'INFO executor started [04/18/23 10:00:01]',
+                'INFO executor done [04/18/23 10:00:03]',
+            ],
+        }
+        assert [pod for pod, _ in merge_lines(logs)] == [
+            'gateway',
+            'executor',
+            'gateway',
+            'executor',
+        ]
+    finally:
+        monkeypatch.undo()
+        time.tzset()
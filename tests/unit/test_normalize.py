@@ -113,3 +113,91 @@ def test_flow_normalize_with_output_path(
         assert os.path.isfile(fn)
         if output_path is not None and output_path.suffix == '.yml':
             assert os.path.isfile(output_path)
+
+
+@pytest.fixture
+def offline_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr('jcloud.cache.CACHE_DIR', tmp_path / 'cache')
+
+
+def test_push_executors_skips_unchanged(monkeypatch, tmp_path, offline_cache):
+    monkeypatch.delenv('JCLOUD_NO_BUILD_CACHE', raising=False)
+    pushed = []
+
+    def _push(executor, suffix, tag, secret, verbose, exists):
+        # the suffixed name is new, it isn't looked up on Hubble
+        assert exists is False
+        pushed.append(executor.src_dir)
+        executor.name = f'{executor.name}-{suffix}'
+        executor.id = f'id-{len(pushed)}'
+        return executor
+
+    monkeypatch.setattr('jcloud.normalize.hubble_push', _push)
+    src_dir = tmp_path / 'executor'
+    src_dir.mkdir()
+    (src_dir / 'config.yml').write_text('jtype: MyExecutor')
+
+    def _executors():
+        return [ExecutorData(name='executor0-MyExecutor', src_dir=src_dir)]
+
+    first = _executors()
+    push_executors_to_hubble(first)
+    second = _executors()
+    # the manifest is rewritten by every push, it doesn't count as a change
+    (src_dir / 'manifest.yml').write_text('name: whatever')
+    push_executors_to_hubble(second)
+    assert pushed == [src_dir]
+    assert (second[0].name, second[0].id) == (first[0].name, first[0].id)
+
+    (src_dir / 'requirements.txt').write_text('numpy')
+    push_executors_to_hubble(_executors())
+    assert pushed == [src_dir, src_dir]
+
+
+def test_push_executors_keeps_workers_busy(monkeypatch, tmp_path, offline_cache):
+    import threading
+
+    monkeypatch.setenv('JCLOUD_NO_BUILD_CACHE', '1')
+    monkeypatch.setenv('JCLOUD_NO_PROGRESSBAR', '1')
+    others_done = threading.Event()
+    pushed = []
+
+    def _push(executor, *args):
+        if executor.name == 'slow':
+            # only returns early if the other pushes don't wait for this one
+            assert others_done.wait(timeout=5)
+        else:
+            pushed.append(executor.name)
+            if len(pushed) == 5:
+                others_done.set()
+        executor.id = executor.name
+        return executor
+
+    monkeypatch.setattr('jcloud.normalize.hubble_push', _push)
+    executors = [ExecutorData(name='slow', src_dir=tmp_path)] + [
+        ExecutorData(name=f'fast{i}', src_dir=tmp_path) for i in range(5)
+    ]
+    push_executors_to_hubble(executors, concurrency=3)
+    assert sorted(pushed) == [f'fast{i}' for i in range(5)]
+    assert all(executor.id == executor.name for executor in executors)
+
+
+def test_json_cache_drops_expired_entries(tmp_path):
+    import json
+    import time
+
+    from jcloud.cache import JSONCache
+
+    cache = JSONCache('specs.json', cache_dir=tmp_path, max_age=60)
+    cache.set('old', {'exists': True})
+    cache._data['old']['cached_at'] = time.time() - 120
+    cache.set('new', {'exists': False})
+    assert list(json.loads((tmp_path / 'specs.json').read_text())) == ['new']
+
+
+def test_inspect_executors_without_jina(monkeypatch, cur_dir):
+    monkeypatch.setattr('jcloud.normalize._installed_version', lambda name: None)
+    flow_dir = os.path.join(cur_dir, 'flows')
+    flow_dict = load_flow_data(Path(os.path.join(flow_dir, 'flow1.yml')))
+    with pytest.raises(ModuleNotFoundError, match='pip install jina'):
+        inspect_executors(flow_dict=flow_dict, workspace=flow_dir)
@@ -0,0 +1,34 @@
+import io
+import json
+
+import pytest
+import yaml
+
+from jcloud.output import write_output
+
+FLOWS = [{'id': 'flow-1', 'status': {'phase': 'Serving'}}, {'id': 'flow-2'}]
+
+
+@pytest.mark.parametrize('data', [FLOWS, []])
+def test_write_output_lists(data):
+    outputs = {}
+    for output in ('json', 'yaml', 'ndjson'):
+        stream = io.StringIO()
+        # lists are streamed, a generator is enough
+        write_output((item for item in data), output, stream)
+        outputs[output] = stream.getvalue()
+
+    assert json.loads(outputs['json']) == data
+    assert yaml.safe_load(outputs['yaml']) == data
+    assert [json.loads(line) for line in outputs['ndjson'].splitlines()] == data
+
+
+def test_write_output_object():
+    for output, load in (('json', json.loads), ('yaml', yaml.safe_load)):
+        stream = io.StringIO()
+        write_output(FLOWS[0], output, stream)
+        assert load(stream.getvalue()) == FLOWS[0]
+
+    stream = io.StringIO()
+    write_output(FLOWS[0], 'ndjson', stream)
+    assert stream.getvalue() == json.dumps(FLOWS[0]) + '\n'
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+# only the subcommands talking to the API or to Hubble need these
+HEAVY_MODULES = ['aiohttp', 'hubble', 'pkg_resources', 'requests', 'rich.progress']
+
+
+def test_cli_startup_is_lazy():
+    code = (
+        'import sys\n'
+        'from jcloud.parsers import get_main_parser\n'
+        'args = get_main_parser().parse_args(["flow", "status", "flow-id"])\n'
+        'from jcloud import api\n'
+        'from jcloud.flow import CloudFlow\n'
+        f'print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True
+    ).stdout
+    assert output.strip() == '[]'
+
+
+def test_cli_help_imports_no_third_party_module():
+    code = (
+        'import sys\n'
+        'from jcloud.__main__ import main\n'
+        'sys.argv = ["jc", "--help"]\n'
+        'try:\n'
+        '    main()\n'
+        'except SystemExit:\n'
+        '    pass\n'
+        'loaded = {m.split(".")[0] for m in sys.modules}\n'
+        'print(sorted(loaded & {"asyncio", "dateutil", "dotenv", "rich", "yaml"}),'
+        ' file=sys.stderr)\n'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True
+    ).stderr
+    assert output.strip() == '[]'
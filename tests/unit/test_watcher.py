@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from hubble.utils.auth import Auth
+
+from jcloud.client import JCloudClient, PollPolicy
+from jcloud.constants import Phase
+from jcloud.flow import CloudFlow
+from jcloud.watcher import StatusWatcher, UnexpectedPhaseError
+
+pytestmark = pytest.mark.usefixtures('auth_token')
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    phases = {}
+    calls = {'list': 0, 'get': [], 'auth': 0}
+
+    async def list_all(self, phase=None, name=None, labels=None, quiet=False):
+        calls['list'] += 1
+        wanted = phase.split(',')
+        return {
+            'flows': [
+                {'id': _id, 'status': {'phase': _phase}}
+                for _id, _phase in phases.items()
+                if _phase in wanted
+            ]
+        }
+
+    async def request(self, method, url, **kwargs):
+        _id = url.rsplit('/', 1)[-1]
+        calls['get'].append(_id)
+        return {'id': _id, 'status': {'phase': phases[_id]}}
+
+    _get_token = Auth.get_auth_token
+
+    def get_auth_token():
+        calls['auth'] += 1
+        return _get_token()
+
+    _sleep = asyncio.sleep
+
+    async def no_sleep(delay):
+        # let the removals progress between two ticks
+        for _id, _phase in phases.items():
+            if _phase == Phase.Serving:
+                phases[_id] = Phase.Deleted
+                break
+        await _sleep(0)
+
+    monkeypatch.setattr(CloudFlow, 'list_all', list_all)
+    monkeypatch.setattr(JCloudClient, 'request', request)
+    monkeypatch.setattr(Auth, 'get_auth_token', staticmethod(get_auth_token))
+    monkeypatch.setattr('asyncio.sleep', no_sleep)
+    return phases, calls
+
+
+@pytest.mark.asyncio
+async def test_watcher_batches_status_polls(fake_api):
+    phases, calls = fake_api
+    flow_ids = [f'flow-{i}' for i in range(20)]
+    phases.update({_id: Phase.Serving for _id in flow_ids})
+
+    watcher = StatusWatcher(poll_policy=PollPolicy(timeout=60))
+    results = await asyncio.gather(
+        *(
+            watcher.wait_for(_id, intermediate=[Phase.Serving], desired=Phase.Deleted)
+            for _id in flow_ids
+        )
+    )
+    assert [res['id'] for res in results] == flow_ids
+    # one list per tick, plus one single fetch per resource to confirm its final phase
+    assert calls['list'] <= len(flow_ids) + 1
+    assert sorted(calls['get']) == sorted(flow_ids)
+    # the auth config is read once, by the single resource of the watcher
+    assert calls['auth'] == 1
+
+
+@pytest.mark.asyncio
+async def test_watcher_reports_unexpected_phase(fake_api):
+    phases, _ = fake_api
+    phases.update({'flow-ok': Phase.Serving, 'flow-failed': Phase.Failed})
+
+    watcher = StatusWatcher(poll_policy=PollPolicy(timeout=60))
+    ok, failed = await asyncio.gather(
+        watcher.wait_for(
+            'flow-ok', intermediate=[Phase.Serving], desired=Phase.Deleted
+        ),
+        watcher.wait_for(
+            'flow-failed', intermediate=[Phase.Serving], desired=Phase.Deleted
+        ),
+        return_exceptions=True,
+    )
+    assert ok['status']['phase'] == Phase.Deleted
+    assert isinstance(failed, UnexpectedPhaseError)
+
+
+@pytest.mark.asyncio
+async def test_watcher_deadline_is_per_waiter(monkeypatch):
+    phases = {'flow-stuck': Phase.Serving, 'flow-late': Phase.Serving}
+
+    async def list_all(self, phase=None, name=None, labels=None, quiet=False):
+        return {
+            'flows': [{'id': _id, 'status': {'phase': p}} for _id, p in phases.items()]
+        }
+
+    async def request(self, method, url, **kwargs):
+        _id = url.rsplit('/', 1)[-1]
+        return {'id': _id, 'status': {'phase': phases[_id]}}
+
+    monkeypatch.setattr(CloudFlow, 'list_all', list_all)
+    monkeypatch.setattr(JCloudClient, 'request', request)
+
+    watcher = StatusWatcher(
+        poll_policy=PollPolicy(timeout=0.5, initial_interval=0.01, max_interval=0.01)
+    )
+    stuck = asyncio.ensure_future(
+        watcher.wait_for('flow-stuck', [Phase.Serving], Phase.Deleted)
+    )
+    await asyncio.sleep(0.3)
+    late = asyncio.ensure_future(
+        watcher.wait_for('flow-late', [Phase.Serving], Phase.Deleted)
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        await stuck
+    # the late waiter outlives the deadline of the first one
+    await asyncio.sleep(0.1)
+    phases['flow-late'] = Phase.Deleted
+    assert (await late)['status']['phase'] == Phase.Deleted
+    watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_watcher_list_failure_is_silent(monkeypatch, capsys):
+    from unittest.mock import Mock
+
+    async def send(self, method, url, **kwargs):
+        return Mock(status=500), {'error': 'boom'}
+
+    monkeypatch.setattr(JCloudClient, 'send', send)
+    watcher = StatusWatcher()
+    assert await watcher._list_phases([Phase.Serving]) is None
+    # no error shown to the user, the watcher falls back to single fetches
+    assert 'Bad response' not in capsys.readouterr().out